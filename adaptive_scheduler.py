@@ -0,0 +1,251 @@
+import json
+import logging
+import os
+import random
+import threading
+import time
+from collections import deque
+from typing import Dict, Any, Callable, Optional, TypeVar
+
+import requests
+
+from post_api import PostLookupAPI
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar('T')
+
+SCHEDULER_RATE = float(os.getenv('SCHEDULER_RATE', 5))
+SCHEDULER_BURST = int(os.getenv('SCHEDULER_BURST', 10))
+SCHEDULER_MIN_CONCURRENCY = int(os.getenv('SCHEDULER_MIN_CONCURRENCY', 1))
+SCHEDULER_MAX_CONCURRENCY = int(os.getenv('SCHEDULER_MAX_CONCURRENCY', 10))
+SCHEDULER_MAX_ATTEMPTS = int(os.getenv('SCHEDULER_MAX_ATTEMPTS', 5))
+SCHEDULER_BASE_DELAY = float(os.getenv('SCHEDULER_BASE_DELAY', 2))
+SCHEDULER_MAX_DELAY = float(os.getenv('SCHEDULER_MAX_DELAY', 60))
+
+# Responses that mean "slow down" rather than "this account is broken"
+THROTTLE_STATUS_CODES = {429, 503}
+
+
+class ThrottledError(Exception):
+    """Instagram signalled overload (429/503 or a timeout) during a request"""
+
+
+class TokenBucket:
+    """Thread-safe token bucket: rate tokens per second, up to burst stored"""
+
+    def __init__(self, rate: float = SCHEDULER_RATE, burst: int = SCHEDULER_BURST):
+        self.rate = rate
+        self.burst = burst
+        self._tokens = float(burst)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """Block until a token is available and take it"""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self.rate
+            time.sleep(wait)
+
+
+class AIMDLimiter:
+    """Concurrency limit that grows additively on success and halves on throttling.
+
+    Each success adds 1/limit, so the limit grows by about one per round of
+    requests. A throttle signal only cuts the limit if its request started
+    after the last cut, so one burst of 429s from requests that were already
+    in flight counts as a single signal.
+    """
+
+    def __init__(self, initial: Optional[float] = None, minimum: int = SCHEDULER_MIN_CONCURRENCY,
+                 maximum: int = SCHEDULER_MAX_CONCURRENCY, decrease: float = 0.5):
+        self.minimum = minimum
+        self.maximum = maximum
+        self.decrease = decrease
+        self.limit = float(initial if initial is not None else max(minimum, maximum // 2))
+        self.in_flight = 0
+        self._last_decrease = 0.0
+        self._cond = threading.Condition()
+
+    def acquire(self) -> float:
+        """Wait for a slot, returning the start time to pass back to release"""
+        with self._cond:
+            while self.in_flight >= int(self.limit):
+                self._cond.wait()
+            self.in_flight += 1
+            return time.monotonic()
+
+    def release(self, started: float, throttled: bool = False):
+        with self._cond:
+            self.in_flight -= 1
+            if throttled:
+                if started >= self._last_decrease:
+                    self.limit = max(self.minimum, self.limit * self.decrease)
+                    self._last_decrease = time.monotonic()
+            else:
+                self.limit = min(self.maximum, self.limit + 1 / self.limit)
+            self._cond.notify_all()
+
+
+def backoff_delay(attempt: int, base: float = SCHEDULER_BASE_DELAY, cap: float = SCHEDULER_MAX_DELAY) -> float:
+    """Exponential backoff with full jitter for the given (1-based) retry attempt"""
+    return random.uniform(0, min(cap, base * 2 ** (attempt - 1)))
+
+
+class ThrottleAwareInstagramAPI(PostLookupAPI):
+    """InstagramAPI that paces every request through a token bucket.
+
+    reelscraper turns every failed request into None and retries at once, so
+    a 429 looks like any other error. This raises ThrottledError instead,
+    letting the scheduler back off and shrink concurrency.
+    """
+
+    def __init__(self, timeout: Optional[int] = 40, proxy: Optional[str] = None,
+                 bucket: Optional[TokenBucket] = None, base_url: Optional[str] = None):
+        super().__init__(timeout=timeout, proxy=proxy, base_url=base_url)
+        self.bucket = bucket
+
+    def _handle_request(self, method: str, url: str, headers: Dict[str, str], **kwargs: Any) -> Optional[Dict[str, Any]]:
+        if self.bucket is not None:
+            self.bucket.acquire()
+        try:
+            response = requests.request(
+                method=method,
+                url=url,
+                headers=headers,
+                timeout=self.timeout,
+                proxies=self.proxy,
+                **kwargs,
+            )
+        except requests.Timeout:
+            raise ThrottledError(f"Timed out after {self.timeout}s: {url}")
+        except requests.RequestException:
+            return None
+
+        if response.status_code in THROTTLE_STATUS_CODES:
+            raise ThrottledError(f"HTTP {response.status_code} from {url}")
+        if "csrftoken" in response.cookies:
+            self.csrf_token = response.cookies["csrftoken"]
+        try:
+            return response.json()
+        except (json.JSONDecodeError, ValueError):
+            return None
+
+
+class AdaptiveScheduler:
+    """Runs per-account scrapes under a rate limit, AIMD concurrency and retry backoff.
+
+    Use instrument(scraper) so the scraper's requests are paced by the token
+    bucket and report throttling, then wrap each account in call().
+    """
+
+    def __init__(self, rate: float = SCHEDULER_RATE, burst: int = SCHEDULER_BURST,
+                 min_concurrency: int = SCHEDULER_MIN_CONCURRENCY, max_concurrency: int = SCHEDULER_MAX_CONCURRENCY,
+                 initial_concurrency: Optional[float] = None, max_attempts: int = SCHEDULER_MAX_ATTEMPTS,
+                 base_delay: float = SCHEDULER_BASE_DELAY, max_delay: float = SCHEDULER_MAX_DELAY):
+        self.bucket = TokenBucket(rate, burst)
+        self.limiter = AIMDLimiter(initial_concurrency, min_concurrency, max_concurrency)
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+
+        self._lock = threading.Lock()
+        self._started = time.monotonic()
+        self._finished = deque()  # monotonic completion times for the throughput window
+        self._stats = {"succeeded": 0, "failed": 0, "attempts": 0, "retries": 0, "throttled": 0}
+        self._reporter: Optional[threading.Thread] = None
+        self._stop_reporter = threading.Event()
+
+    @property
+    def max_concurrency(self) -> int:
+        return self.limiter.maximum
+
+    def instrument(self, scraper, base_url: Optional[str] = None):
+        """Swap a ReelScraper's API for one paced by this scheduler's token bucket"""
+        api = ThrottleAwareInstagramAPI(timeout=scraper.api.timeout, bucket=self.bucket, base_url=base_url)
+        api.proxy = scraper.api.proxy
+        scraper.api = api
+        return scraper
+
+    def call(self, key: str, fn: Callable[[], T]) -> T:
+        """Run fn with a concurrency slot, retrying with backoff; raises the last error"""
+        attempt = 0
+        while True:
+            attempt += 1
+            started = self.limiter.acquire()
+            throttled = False
+            try:
+                result = fn()
+            except ThrottledError as e:
+                throttled = True
+                error = e
+            except Exception as e:
+                error = e
+            else:
+                self._record("succeeded", attempt)
+                return result
+            finally:
+                self.limiter.release(started, throttled)
+
+            if throttled:
+                self._count("throttled")
+            if attempt >= self.max_attempts:
+                self._record("failed", attempt)
+                raise error
+
+            delay = backoff_delay(attempt, self.base_delay, self.max_delay)
+            self._count("retries")
+            logger.info(f"🔁 {key}: {'throttled' if throttled else 'failed'} ({error}), retry {attempt} in {delay:.1f}s")
+            time.sleep(delay)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            now = time.monotonic()
+            while self._finished and now - self._finished[0] > 60:
+                self._finished.popleft()
+            stats = dict(self._stats)
+            done = stats["succeeded"] + stats["failed"]
+            window = min(60.0, now - self._started) or 1.0
+            stats["accounts_per_minute"] = round(len(self._finished) * 60 / window, 1)
+            stats["error_rate"] = round(stats["failed"] / done, 3) if done else 0.0
+            stats["throttle_rate"] = round(stats["throttled"] / stats["attempts"], 3) if stats["attempts"] else 0.0
+        stats["concurrency_limit"] = round(self.limiter.limit, 2)
+        stats["in_flight"] = self.limiter.in_flight
+        stats["rate_limit"] = self.bucket.rate
+        return stats
+
+    def summary(self) -> str:
+        s = self.stats()
+        return (f"📈 {s['succeeded']} ok / {s['failed']} failed | {s['accounts_per_minute']} accounts/min | "
+                f"errors {s['error_rate']:.1%} | throttled {s['throttled']} | retries {s['retries']} | "
+                f"concurrency {s['concurrency_limit']} ({s['in_flight']} in flight)")
+
+    def start_reporter(self, interval: float = 10.0, output: Callable[[str], None] = print):
+        """Print the live summary every interval seconds until stop_reporter()"""
+        def report():
+            while not self._stop_reporter.wait(interval):
+                output(self.summary())
+
+        self._stop_reporter.clear()
+        self._reporter = threading.Thread(target=report, name="scheduler-reporter", daemon=True)
+        self._reporter.start()
+
+    def stop_reporter(self):
+        self._stop_reporter.set()
+
+    def _count(self, name: str):
+        with self._lock:
+            self._stats[name] += 1
+
+    def _record(self, outcome: str, attempts: int):
+        with self._lock:
+            self._stats[outcome] += 1
+            self._stats["attempts"] += attempts
+            self._finished.append(time.monotonic())
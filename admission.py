@@ -0,0 +1,214 @@
+import asyncio
+import logging
+import math
+import os
+import threading
+import time
+from collections import OrderedDict, deque
+from contextlib import contextmanager, asynccontextmanager
+from typing import Deque, Dict, Any, Optional, Mapping
+
+logger = logging.getLogger(__name__)
+
+ADMISSION_MAX_CONCURRENT = int(os.getenv('ADMISSION_MAX_CONCURRENT', 4))
+ADMISSION_MAX_QUEUE = int(os.getenv('ADMISSION_MAX_QUEUE', 16))
+ADMISSION_MAX_QUEUE_PER_CLIENT = int(os.getenv('ADMISSION_MAX_QUEUE_PER_CLIENT', 4))
+ADMISSION_MAX_WAIT = float(os.getenv('ADMISSION_MAX_WAIT', 15))
+# Weight of the newest sample in the wait and service time moving averages
+EWMA_ALPHA = 0.2
+
+
+class AdmissionRejected(Exception):
+    """Raised when a request can't be admitted; retry_after is in whole seconds"""
+
+    def __init__(self, message: str, retry_after: int):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+def client_key(headers: Mapping[str, str], remote_addr: Optional[str]) -> str:
+    """Identify the API caller: X-Client-Id, else the original client address"""
+    client_id = headers.get('X-Client-Id', '').strip()
+    if client_id:
+        return client_id
+    # App Engine and Railway sit behind a proxy that appends to X-Forwarded-For
+    forwarded = headers.get('X-Forwarded-For', '').split(',')[0].strip()
+    return forwarded or remote_addr or "anonymous"
+
+
+class _Waiter:
+    __slots__ = ('client', 'enqueued', 'granted', 'wake')
+
+    def __init__(self, client: str, wake):
+        self.client = client
+        self.enqueued = time.perf_counter()
+        self.granted = False
+        self.wake = wake
+
+
+class AdmissionGate:
+    """Bounded concurrency in front of the scrape, with a short fair wait queue.
+
+    At most max_concurrent requests run at once. Others wait in a queue of
+    max_queue slots, of which one client may hold max_queue_per_client.
+    Freed slots go round-robin across clients with waiters, so one caller
+    sending many requests can't starve the rest. Requests that find the
+    queue full, or wait longer than max_wait, are rejected with an
+    AdmissionRejected carrying a Retry-After estimate. Patient requests
+    (batch items) skip the per-client limit and max_wait: their batch's
+    worker pool already bounds how many of them queue at once.
+    """
+
+    def __init__(self, max_concurrent: int = ADMISSION_MAX_CONCURRENT, max_queue: int = ADMISSION_MAX_QUEUE,
+                 max_queue_per_client: int = ADMISSION_MAX_QUEUE_PER_CLIENT, max_wait: float = ADMISSION_MAX_WAIT):
+        self.max_concurrent = max(1, max_concurrent)
+        self.max_queue = max(0, max_queue)
+        self.max_queue_per_client = max(0, max_queue_per_client)
+        self.max_wait = max_wait
+        self._lock = threading.Lock()
+        self._waiting: "OrderedDict[str, Deque[_Waiter]]" = OrderedDict()
+        self.active = 0
+        self.queued = 0
+        self.admitted = 0
+        self.rejected = 0
+        self.timed_out = 0
+        self.wait_ms_avg: Optional[float] = None
+        self.wait_ms_max = 0.0
+        self.service_seconds_avg: Optional[float] = None
+
+    @contextmanager
+    def admit(self, client: str, patient: bool = False):
+        """Hold a slot for the block, waiting in the queue if all are busy"""
+        event = threading.Event()
+        waiter = self._enter(client, event.set, patient)
+        if waiter is not None and not event.wait(None if patient else self.max_wait) and not self._abandon(waiter):
+            raise self._timed_out(client)
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self._release(started)
+
+    def stats(self) -> Dict[str, Any]:
+        """Queue depth and wait times for the status endpoint"""
+        with self._lock:
+            return {
+                "active": self.active,
+                "max_concurrent": self.max_concurrent,
+                "queued": self.queued,
+                "max_queue": self.max_queue,
+                "clients_waiting": len(self._waiting),
+                "admitted": self.admitted,
+                "rejected": self.rejected,
+                "timed_out": self.timed_out,
+                "wait_ms_avg": round(self.wait_ms_avg, 1) if self.wait_ms_avg is not None else None,
+                "wait_ms_max": round(self.wait_ms_max, 1),
+                "service_seconds_avg": round(self.service_seconds_avg, 2) if self.service_seconds_avg is not None else None,
+            }
+
+    def _enter(self, client: str, wake, patient: bool = False) -> Optional[_Waiter]:
+        """Take a slot (returns None) or a place in the queue (returns the waiter)"""
+        with self._lock:
+            if self.active < self.max_concurrent and not self._waiting:
+                self.active += 1
+                self._record_wait(0.0)
+                return None
+
+            queue = self._waiting.get(client)
+            client_full = not patient and queue is not None and len(queue) >= self.max_queue_per_client
+            if self.queued >= self.max_queue or client_full:
+                self.rejected += 1
+                retry_after = self._retry_after()
+                logger.warning(f"🚦 Rejected request from {client}: admission queue full ({self.queued} waiting)")
+                raise AdmissionRejected("Too many requests in progress, retry later", retry_after)
+
+            waiter = _Waiter(client, wake)
+            self._waiting.setdefault(client, deque()).append(waiter)
+            self.queued += 1
+            return waiter
+
+    def _abandon(self, waiter: _Waiter) -> bool:
+        """Leave the queue; True if the waiter was granted a slot meanwhile and must release it"""
+        with self._lock:
+            if waiter.granted:
+                return True
+            queue = self._waiting.get(waiter.client)
+            if queue is not None and waiter in queue:
+                queue.remove(waiter)
+                self.queued -= 1
+                if not queue:
+                    del self._waiting[waiter.client]
+            return False
+
+    def _timed_out(self, client: str) -> AdmissionRejected:
+        with self._lock:
+            self.timed_out += 1
+            self.rejected += 1
+            retry_after = self._retry_after()
+        logger.warning(f"⏳ Request from {client} waited {self.max_wait:g}s without a free slot")
+        return AdmissionRejected("Timed out waiting for a free scrape slot, retry later", retry_after)
+
+    def _release(self, started: Optional[float]):
+        with self._lock:
+            self.active -= 1
+            if started is not None:
+                elapsed = time.perf_counter() - started
+                self.service_seconds_avg = elapsed if self.service_seconds_avg is None else (
+                    EWMA_ALPHA * elapsed + (1 - EWMA_ALPHA) * self.service_seconds_avg)
+            if not self._waiting or self.active >= self.max_concurrent:
+                return
+
+            # Round-robin: serve the client at the head, then send it to the back
+            client, queue = next(iter(self._waiting.items()))
+            waiter = queue.popleft()
+            del self._waiting[client]
+            if queue:
+                self._waiting[client] = queue
+            self.queued -= 1
+            self.active += 1
+            waiter.granted = True
+            self._record_wait((time.perf_counter() - waiter.enqueued) * 1000)
+        waiter.wake()
+
+    def _record_wait(self, wait_ms: float):
+        self.admitted += 1
+        self.wait_ms_avg = wait_ms if self.wait_ms_avg is None else (
+            EWMA_ALPHA * wait_ms + (1 - EWMA_ALPHA) * self.wait_ms_avg)
+        self.wait_ms_max = max(self.wait_ms_max, wait_ms)
+
+    def _retry_after(self) -> int:
+        # Time for the queue ahead to drain through the running slots
+        service = self.service_seconds_avg if self.service_seconds_avg is not None else self.max_wait
+        return max(1, math.ceil(service * (self.queued + 1) / self.max_concurrent))
+
+
+class AsyncAdmissionGate(AdmissionGate):
+    """AdmissionGate for handlers running on an event loop"""
+
+    @asynccontextmanager
+    async def admit(self, client: str, patient: bool = False):
+        """Hold a slot for the block, waiting in the queue if all are busy"""
+        loop = asyncio.get_running_loop()
+        granted = loop.create_future()
+
+        def wake():
+            loop.call_soon_threadsafe(lambda: granted.done() or granted.set_result(None))
+
+        waiter = self._enter(client, wake, patient)
+        if waiter is not None:
+            try:
+                await asyncio.wait_for(granted, None if patient else self.max_wait)
+            except asyncio.TimeoutError:
+                if not self._abandon(waiter):
+                    raise self._timed_out(client)
+            except asyncio.CancelledError:
+                # Client went away while queued; hand back a slot granted in the meantime
+                if self._abandon(waiter):
+                    self._release(None)
+                raise
+
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self._release(started)
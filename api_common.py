@@ -0,0 +1,284 @@
+import logging
+from datetime import datetime, timezone
+from typing import List, Dict, Any, Awaitable, Callable, Mapping, Optional, Tuple
+
+from admission import AdmissionRejected
+from encoding import encode_body, encode_json
+from matching import extract_shortcode_from_url, match_posts_with_targets, parse_fields, project_matched_posts
+from metrics import stage_seconds, reels_scraped
+from post_lookup import lookup_summary
+from reel_index import REEL_SOURCES
+from target_scan import parse_scan_options
+from tracing import trace_stage
+
+logger = logging.getLogger(__name__)
+
+# Request validation, response building and match assembly shared by app.py,
+# app_playwright.py and asgi_playwright.py. Nothing here runs at import time;
+# framework specifics (the Response class, the request's headers) are passed in.
+
+# The source= query parameter: the reel index's sources (see REEL_SOURCES), or
+#   lookup - fetch each target post directly by shortcode, cost proportional to the targets
+REQUEST_SOURCES = REEL_SOURCES + ("lookup",)
+
+FetchFn = Callable[[str, List[str]], Optional[Dict[str, Any]]]
+AsyncFetchFn = Callable[[str, List[str]], Awaitable[Optional[Dict[str, Any]]]]
+
+
+class UpstreamError(RuntimeError):
+    """A scrape failed on Instagram's (or the browser's) side; answered with 502 rather than 500"""
+
+
+def validate_request_data(data: Dict[str, Any]) -> Tuple[bool, str, Dict[str, Any]]:
+    """Validate incoming request data"""
+    if not data:
+        return False, "Request body is required", {}
+
+    username = data.get("username")
+    post_links = data.get("post_links")
+
+    if not username:
+        return False, "username is required", {}
+
+    if not post_links:
+        return False, "post_links is required", {}
+
+    if not isinstance(post_links, list):
+        return False, "post_links must be a list", {}
+
+    if len(post_links) == 0:
+        return False, "post_links cannot be empty", {}
+
+    # Validate each post link
+    for i, link in enumerate(post_links):
+        if not isinstance(link, str):
+            return False, f"post_links[{i}] must be a string", {}
+        if not link.strip():
+            return False, f"post_links[{i}] cannot be empty", {}
+
+    return True, "", {"username": username.strip(), "post_links": [link.strip() for link in post_links]}
+
+
+def parse_request_options(args: Mapping[str, Any]) -> Tuple[bool, str, Dict[str, Any]]:
+    """Validate the max_posts, scan, source and fields query parameters"""
+    source = args.get('source', 'live')
+    if source not in REQUEST_SOURCES:
+        return False, f"source must be one of {list(REQUEST_SOURCES)}", {}
+
+    try:
+        fields = parse_fields(args.get('fields'))
+    except ValueError as e:
+        return False, str(e), {}
+
+    try:
+        max_posts = int(args.get('max_posts', 10))
+        scan = parse_scan_options(args)
+    except ValueError as e:
+        return False, f"Invalid query parameter: {e}", {}
+
+    return True, "", {"max_posts": max_posts, "scan": scan, "source": source, "fields": fields}
+
+
+def create_response(success: bool, data: Any = None, error: str = None, status_code: int = 200) -> Tuple[Dict[str, Any], int]:
+    """Create standardized API response"""
+    response = {
+        "success": success,
+        "timestamp": datetime.now(timezone.utc).isoformat()
+    }
+
+    if success and data is not None:
+        response["data"] = data
+    elif not success and error:
+        response["error"] = error
+
+    return response, status_code
+
+
+def no_reels_response(username: str) -> Tuple[Dict[str, Any], int]:
+    return create_response(False, error=f"No reels found for user '{username}'", status_code=404)
+
+
+def match_response(username: str, response_data: Optional[Dict[str, Any]]) -> Tuple[Dict[str, Any], int]:
+    """Response for the result of fetch_and_match.
+
+    404 when there were no reels, 502 (with the data, for its lookup block)
+    when a lookup could not fetch any target post.
+    """
+    if response_data is None:
+        return no_reels_response(username)
+    lookup = response_data.get("lookup")
+    if lookup is not None and lookup["failed"] and not lookup["fetched"]:
+        body, status_code = create_response(
+            False, error=f"Could not fetch any target post for user '{username}'", status_code=502)
+        body["data"] = response_data
+        return body, status_code
+    return create_response(True, data=response_data)
+
+
+def upstream_error_response(error: UpstreamError) -> Tuple[Dict[str, Any], int]:
+    logger.error(f"❌ Upstream error: {str(error)}")
+    return create_response(False, error=str(error), status_code=502)
+
+
+def json_response(response_class, body: Dict[str, Any], status_code: int, accept_encoding: str = ""):
+    """jsonify(body, status_code) through the fast encoder, compressed when the client accepts it"""
+    payload, headers = encode_body([body, status_code], accept_encoding)
+    return response_class(payload, mimetype="application/json", headers=headers)
+
+
+def rejected_response(response_class, error: AdmissionRejected):
+    """429 with Retry-After for a request the admission gate turned away"""
+    body, status_code = create_response(False, error=str(error), status_code=429)
+    return response_class(encode_json([body, status_code]), status=429, mimetype="application/json",
+                          headers={"Retry-After": str(error.retry_after)})
+
+
+def target_shortcodes(username: str, post_links: List[str]) -> List[str]:
+    """Shortcodes of the target links, logging the request"""
+    logger.info(f"📥 Processing request for username: {username}, post_links: {len(post_links)}")
+    shortcodes = []
+    for link in post_links:
+        shortcode = extract_shortcode_from_url(link)
+        if shortcode:
+            shortcodes.append(shortcode)
+    logger.info(f"🔍 Looking for shortcodes: {shortcodes}")
+    return shortcodes
+
+
+def build_match_response(username: str, post_links: List[str], reels: List[Dict[str, Any]],
+                         indexed_reels: List[Dict[str, Any]], backend: str, source: str = "live",
+                         fields: Optional[List[str]] = None, scan_result: Optional[Dict[str, Any]] = None,
+                         lookup_result: Optional[Dict[str, Any]] = None,
+                         extra: Optional[Dict[str, Any]] = None) -> Optional[Dict[str, Any]]:
+    """Match scraped and indexed reels against post_links and build the response data.
+
+    extra is merged in after the match counts (e.g. the Playwright apps'
+    scraper_type). Returns None when there were no reels to match, except
+    for a lookup, whose summary says why each target did not match.
+    """
+    reels_scraped.observe(len(reels), backend=backend)
+
+    if not reels and not indexed_reels and lookup_result is None:
+        logger.warning(f"❌ No reels found for user: {username}")
+        return None
+
+    logger.info(f"📹 Scraped {len(reels)} reels for user: {username}")
+
+    # Match with provided post links
+    with stage_seconds.time(stage="match", backend=backend), trace_stage("match"):
+        matched = match_posts_with_targets(reels + indexed_reels, post_links)
+
+    logger.info(f"✅ Found {len(matched)} matched posts for user: {username}")
+
+    # Create response with metadata
+    response_data = {
+        "username": username,
+        "total_reels_scraped": len(reels),
+        "total_target_links": len(post_links),
+        "matched_posts_count": len(matched),
+        "matched_posts": project_matched_posts(matched, fields)
+    }
+    response_data.update(extra or {})
+
+    if source != "live":
+        response_data["source"] = source
+        response_data["indexed_reels_used"] = len(indexed_reels)
+
+    if lookup_result is not None:
+        response_data["lookup"] = lookup_summary(lookup_result, post_links)
+
+    if scan_result is not None:
+        matched_shortcodes = {post["matched_post_data"]["shortcode"] for post in matched}
+        response_data["scan"] = {
+            "depth": scan_result["depth"],
+            "stop_reason": scan_result["stop_reason"],
+            "unmatched_targets": [
+                link for link in post_links if extract_shortcode_from_url(link) not in matched_shortcodes
+            ]
+        }
+
+    return response_data
+
+
+def batch_item_line(item: tuple, fetch: FetchFn) -> Dict[str, Any]:
+    """Fetch and match one validated batch item, returning its NDJSON line.
+
+    fetch is expected to admit the item through the app's admission gate;
+    a rejection becomes a 429 line for that item only.
+    """
+    is_valid, error_msg, validated_data = item
+    if not is_valid:
+        return create_response(False, error=error_msg, status_code=400)[0]
+
+    username = validated_data["username"]
+    try:
+        response_data = fetch(username, validated_data["post_links"])
+    except AdmissionRejected as e:
+        return rejected_line(e)
+    except UpstreamError as e:
+        return upstream_error_response(e)[0]
+    except Exception as e:
+        logger.error(f"❌ Error processing batch item for {username}: {str(e)}")
+        return create_response(False, error=f"Internal server error: {str(e)}", status_code=500)[0]
+    return _batch_line(username, response_data)
+
+
+async def abatch_item_line(item: tuple, fetch: AsyncFetchFn) -> Dict[str, Any]:
+    """batch_item_line for a coroutine fetch"""
+    is_valid, error_msg, validated_data = item
+    if not is_valid:
+        return create_response(False, error=error_msg, status_code=400)[0]
+
+    username = validated_data["username"]
+    try:
+        response_data = await fetch(username, validated_data["post_links"])
+    except AdmissionRejected as e:
+        return rejected_line(e)
+    except UpstreamError as e:
+        return upstream_error_response(e)[0]
+    except Exception as e:
+        logger.error(f"❌ Error processing batch item for {username}: {str(e)}")
+        return create_response(False, error=f"Internal server error: {str(e)}", status_code=500)[0]
+    return _batch_line(username, response_data)
+
+
+def rejected_line(error: AdmissionRejected) -> Dict[str, Any]:
+    """NDJSON line for a batch item the admission gate turned away; retry_after stands in for the header"""
+    line = create_response(False, error=str(error), status_code=429)[0]
+    line["retry_after"] = error.retry_after
+    return line
+
+
+def _batch_line(username: str, response_data: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    return match_response(username, response_data)[0]
+
+
+def job_payload(validated_data: Dict[str, Any], options: Dict[str, Any]) -> Dict[str, Any]:
+    """Queued job for a validated request and its query options"""
+    return {**validated_data, "max_posts": options["max_posts"], "scan": options["scan"], "source": options["source"],
+            "fields": options["fields"]}
+
+
+def job_result(payload: Dict[str, Any], response_data: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    """A finished job's stored result; no reels, or a lookup that fetched nothing, fails the job"""
+    body, status_code = match_response(payload["username"], response_data)
+    if status_code == 404:
+        raise LookupError(body["error"])
+    if not body["success"]:
+        raise RuntimeError(body["error"])
+    return response_data
+
+
+def job_created_response(job_id: str, username: str) -> Tuple[Dict[str, Any], int]:
+    logger.info(f"🗂️ Queued job {job_id} for username: {username}")
+    return create_response(True, data={
+        "job_id": job_id,
+        "status": "queued",
+        "status_url": f"/v1/jobs/{job_id}"
+    }, status_code=202)
+
+
+def job_status_response(job_id: str, job: Optional[Dict[str, Any]]) -> Tuple[Dict[str, Any], int]:
+    if job is None:
+        return create_response(False, error=f"Job '{job_id}' not found", status_code=404)
+    return create_response(True, data=job)
@@ -1,13 +1,38 @@
-from flask import Flask, request, jsonify
-from reelscraper import ReelScraper
-from reelscraper.utils import LoggerManager
-from bulk_main import extract_shortcode_from_url, match_posts_with_targets
+from startup import StartupReport
 import traceback
 import logging
 import os
-from datetime import datetime, timezone
-from typing import List, Dict, Any
-import json
+import threading
+import asyncio
+from concurrent.futures import Future
+from typing import List, Dict, Any, Optional, Set, TYPE_CHECKING
+
+# Import and init costs, logged once the module is loaded and shown on /v1/status
+startup = StartupReport()
+
+with startup.phase("import flask"):
+    from flask import Flask, request, jsonify, Response, stream_with_context
+with startup.phase("import app modules"):
+    from api_common import (validate_request_data, parse_request_options, create_response, match_response,
+                            json_response, rejected_response, upstream_error_response, UpstreamError,
+                            target_shortcodes, build_match_response,
+                            batch_item_line, job_payload, job_result, job_created_response, job_status_response)
+    from encoding import encode_json
+    from scrape_cache import ScrapeCache
+    from single_flight import SingleFlight
+    from batch import validate_batch_request, iter_batch_results, BATCH_MAX_WORKERS
+    from job_queue import JobQueue
+    from metrics import stage_seconds, scrapes_total, counted_scrape, register_stats, render_metrics, CONTENT_TYPE as METRICS_CONTENT_TYPE
+    from tracing import traced, trace_stage, profiled, current_trace, debug_requested
+    from admission import AdmissionGate, AdmissionRejected, client_key
+    from reel_index import ReelIndex
+    from target_scan import parse_scan_options, scan_for_targets, iter_reel_pages
+    from proxy_pool import get_proxy_pool
+    from hedging import HedgedScraper, HEDGE_ENABLED, threaded
+    from post_lookup import lookup_posts, fetch_post
+
+if TYPE_CHECKING:
+    from reelscraper import ReelScraper
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -15,113 +40,207 @@ logger = logging.getLogger(__name__)
 
 app = Flask(__name__)
 
-# Initialize scraper with configurable settings
-scraper = ReelScraper(
-    timeout=int(os.getenv('SCRAPER_TIMEOUT', 30)),
-    proxy=os.getenv('SCRAPER_PROXY', None),
-    logger_manager=LoggerManager()
-)
-
-def validate_request_data(data: Dict[str, Any]) -> tuple[bool, str, Dict[str, Any]]:
-    """Validate incoming request data"""
-    if not data:
-        return False, "Request body is required", {}
-    
-    username = data.get("username")
-    post_links = data.get("post_links")
-    
-    if not username:
-        return False, "username is required", {}
-    
-    if not post_links:
-        return False, "post_links is required", {}
-    
-    if not isinstance(post_links, list):
-        return False, "post_links must be a list", {}
-    
-    if len(post_links) == 0:
-        return False, "post_links cannot be empty", {}
-    
-    # Validate each post link
-    for i, link in enumerate(post_links):
-        if not isinstance(link, str):
-            return False, f"post_links[{i}] must be a string", {}
-        if not link.strip():
-            return False, f"post_links[{i}] cannot be empty", {}
-    
-    return True, "", {"username": username.strip(), "post_links": [link.strip() for link in post_links]}
-
-def create_response(success: bool, data: Any = None, error: str = None, status_code: int = 200) -> tuple[Dict[str, Any], int]:
-    """Create standardized API response"""
-    response = {
-        "success": success,
-        "timestamp": datetime.now(timezone.utc).isoformat()
-    }
+SCRAPER_TIMEOUT = int(os.getenv('SCRAPER_TIMEOUT', 30))
+# Overridable so the scrapers can be pointed at a local stand-in (see benchmarks/fake_instagram.py)
+INSTAGRAM_BASE_URL = os.getenv('INSTAGRAM_BASE_URL', '').rstrip('/')
+PLAYWRIGHT_SCRAPE_TIMEOUT = float(os.getenv('PLAYWRIGHT_SCRAPE_TIMEOUT', 90))
+
+# Proxies from SCRAPER_PROXIES / SCRAPER_PROXY_FILE / SCRAPER_PROXY, or a direct connection
+proxy_pool = get_proxy_pool()
+
+def make_scraper(proxy: Optional[str], logger_manager) -> "ReelScraper":
+    from reelscraper import ReelScraper
+    from post_api import PostLookupAPI
+
+    scraper = ReelScraper(timeout=SCRAPER_TIMEOUT, proxy=proxy, logger_manager=logger_manager)
+    # Same egress, plus single-post fetches for source=lookup
+    scraper.api = PostLookupAPI(timeout=SCRAPER_TIMEOUT, proxy=proxy, base_url=INSTAGRAM_BASE_URL)
+    return scraper
+
+# One scraper per proxy, each keeping its own egress and CSRF token. reelscraper
+# pulls in pandas and SQLAlchemy, so the scrapers are built on warmup or first use.
+_scrapers: Optional[Dict[Optional[str], "ReelScraper"]] = None
+_scrapers_lock = threading.Lock()
+
+def get_scraper(proxy: Optional[str]) -> "ReelScraper":
+    global _scrapers
+    if _scrapers is None:
+        with _scrapers_lock:
+            if _scrapers is None:
+                with startup.phase("build scrapers"):
+                    from reelscraper.utils import LoggerManager
+
+                    logger_manager = LoggerManager()
+                    _scrapers = {proxy: make_scraper(proxy, logger_manager) for proxy in proxy_pool.proxies}
+    return _scrapers[proxy]
+
+def lookup_post(shortcode: str) -> Optional[Dict[str, Any]]:
+    """Fetch one post by shortcode through the proxy pool"""
+    return proxy_pool.call(shortcode, lambda proxy: fetch_post(get_scraper(proxy).api, shortcode))
+
+def scrape_reelscraper(username: str, max_posts: int) -> List[Dict[str, Any]]:
+    """Scrape a profile with reelscraper, failing over across proxies"""
+    return proxy_pool.call(username, lambda proxy: get_scraper(proxy).get_user_reels(username, max_posts=max_posts))
+
+def start_playwright_scrape(username: str, max_posts: int) -> Future:
+    """Start a Playwright scrape on the browser pool; cancelling the future cancels the scrape"""
+    # Only the hedge uses Playwright, so it is imported (and Chromium launched) on first use
+    from browser_pool import get_browser_pool
+    from playwright_scraper import scrape_user_reels_pooled
+
+    pool = get_browser_pool()
+
+    async def scrape(user: str, count: int) -> List[Dict[str, Any]]:
+        return await asyncio.wait_for(scrape_user_reels_pooled(pool, user, count), PLAYWRIGHT_SCRAPE_TIMEOUT)
+
+    return asyncio.run_coroutine_threadsafe(counted_scrape("playwright", scrape)(username, max_posts), pool.loop)
+
+# With HEDGE_ENABLED, slow or empty reelscraper scrapes are raced against Playwright
+hedged_scraper = HedgedScraper(
+    ("reelscraper", threaded(counted_scrape("reelscraper", scrape_reelscraper))),
+    ("playwright", start_playwright_scrape)
+) if HEDGE_ENABLED else None
+
+# Per-user scrape results shared across requests
+with startup.phase("load scrape cache"):
+    scrape_cache = ScrapeCache()
+# Concurrent scrapes of the same profile share one execution
+scrape_flights = SingleFlight()
+# Every scraped reel, keyed by shortcode, for delta scrapes and index-only lookups
+with startup.phase("open reel index"):
+    reel_index = ReelIndex()
+# Bounds concurrent scrapes; excess requests wait briefly in a fair queue, then get 429
+admission = AdmissionGate()
+register_stats("cache", scrape_cache.stats,
+               counters=("hits", "stale_hits", "misses", "disk_hits", "refreshes", "refresh_errors", "evictions"))
+register_stats("coalescing", scrape_flights.stats, counters=("scrapes", "coalesced"))
+register_stats("admission", admission.stats, counters=("admitted", "rejected", "timed_out"))
+if hedged_scraper is not None:
+    register_stats("hedging", hedged_scraper.stats,
+                   counters=("scrapes", "hedged", "hedged_slow", "hedged_empty", "hedged_error", "primary_wins", "hedge_wins"))
+
+def scrape_profile(username: str, max_posts: int) -> List[Dict[str, Any]]:
+    """Scrape a profile through the result cache, coalescing concurrent scrapes"""
+    return scrape_cache.get_or_scrape(username, max_posts, "reelscraper", _coalesced_scrape)
+
+def _coalesced_scrape(username: str, max_posts: int) -> List[Dict[str, Any]]:
+    return scrape_flights.scrape(
+        username, max_posts, "reelscraper",
+        hedged_scraper.scrape if hedged_scraper is not None else counted_scrape("reelscraper", scrape_reelscraper)
+    )
+
+def scan_profile(username: str, target_shortcodes: List[str], max_posts: int, scan: Dict[str, Any],
+                 known_shortcodes: Optional[Set[str]] = None) -> Dict[str, Any]:
+    """Page through a profile until every target shortcode is found"""
+    with proxy_pool.session(username) as proxy:
+        try:
+            result = scan_for_targets(iter_reel_pages(get_scraper(proxy), username), set(target_shortcodes),
+                                      scan["max_depth"], scan["cutoff"], known_shortcodes)
+        except Exception:
+            scrapes_total.inc(backend="reelscraper", outcome="failure")
+            raise
+    scrapes_total.inc(backend="reelscraper", outcome="success" if result["reels"] else "empty")
+    if result["reels"]:
+        # The scanned reels are the newest `depth` posts, so they can answer later requests too
+        scrape_cache.put("reelscraper", username, result["depth"], result["reels"])
+    return result
+
+def fetch_and_match(username: str, post_links: List[str], max_posts: int,
+                    scan: Optional[Dict[str, Any]] = None, source: str = "live",
+                    fields: Optional[List[str]] = None) -> Optional[Dict[str, Any]]:
+    """Scrape a user's latest reels and match them against post_links.
+
+    With scan options (see parse_scan_options) the profile is paged through
+    until all targets are found instead of scraping exactly max_posts.
+    source (see REQUEST_SOURCES) selects a full scrape, a delta scrape on top
+    of the reel index, an index-only lookup or a direct fetch of each target.
+    fields (see parse_fields) limits the keys of each returned matched post.
+    Returns the response data, or None when no reels were found (never
+    for a lookup).
+    """
+    shortcodes = target_shortcodes(username, post_links)
     
-    if success and data is not None:
-        response["data"] = data
-    elif not success and error:
-        response["error"] = error
+    # Scrape latest posts from user
+    scan_result = None
+    lookup_result = None
+    indexed_reels = []
+    with stage_seconds.time(stage="scrape", backend="reelscraper"), trace_stage("scrape"):
+        if source == "index":
+            logger.info(f"📚 Looking up shortcodes in the reel index for user: {username}")
+            reels = []
+            indexed_reels = reel_index.lookup(username, shortcodes)
+        elif source == "lookup":
+            logger.info(f"🎯 Fetching {len(shortcodes)} target posts directly for user: {username}")
+            lookup_result = lookup_posts(username, shortcodes, lookup_post)
+            reels = lookup_result["reels"]
+            reel_index.upsert(username, reels)
+        else:
+            known = reel_index.known_shortcodes(username) if source == "delta" else set()
+            if known:
+                # Only page through posts newer than the index; indexed targets are answered from it
+                logger.info(f"🚀 Scraping posts newer than the reel index for user: {username}")
+                scan = scan or parse_scan_options({"scan": "targets"})
+                scan_result = scan_profile(username, [code for code in shortcodes if code not in known], max_posts, scan, known)
+                reels = scan_result["reels"]
+            elif scan is not None:
+                logger.info(f"🚀 Scanning up to {scan['max_depth']} posts for user: {username} until all targets are found")
+                scan_result = scan_profile(username, shortcodes, max_posts, scan)
+                reels = scan_result["reels"]
+            else:
+                logger.info(f"🚀 Scraping up to {max_posts} posts for user: {username}")
+            
+                reels = scrape_profile(username, max_posts)
+        
+            reel_index.upsert(username, reels)
+            if known:
+                fresh = {reel["shortcode"] for reel in reels}
+                indexed_reels = reel_index.lookup(username, [code for code in shortcodes if code not in fresh])
     
-    return response, status_code
+    return build_match_response(username, post_links, reels, indexed_reels, "reelscraper", source=source,
+                                fields=fields, scan_result=scan_result, lookup_result=lookup_result)
 
 @app.route("/v1/fetch-instagram-post", methods=["POST"])
+@traced
 def fetch_instagram_post():
     """API endpoint to fetch and match Instagram posts"""
     try:
         # Get request data
         data = request.get_json()
         
+        # Opt-in profiler and page timeline (see DEBUG_PROFILING_ENABLED)
+        trace = current_trace()
+        trace.debug = debug_requested(request.headers, request.args)
+        
         # Validate request data
-        is_valid, error_msg, validated_data = validate_request_data(data)
+        with stage_seconds.time(stage="validation", backend="reelscraper"), trace_stage("validation"):
+            is_valid, error_msg, validated_data = validate_request_data(data)
+            if is_valid:
+                is_valid, error_msg, options = parse_request_options(request.args)
         if not is_valid:
             return jsonify(*create_response(False, error=error_msg, status_code=400))
         
         username = validated_data["username"]
         post_links = validated_data["post_links"]
         
-        logger.info(f"📥 Processing request for username: {username}, post_links: {len(post_links)}")
-        
-        # Extract shortcodes for logging
-        shortcodes = []
-        for link in post_links:
-            shortcode = extract_shortcode_from_url(link)
-            if shortcode:
-                shortcodes.append(shortcode)
-        
-        logger.info(f"🔍 Looking for shortcodes: {shortcodes}")
-        
-        # Scrape latest posts from user
-        max_posts = int(request.args.get('max_posts', 10))
-        logger.info(f"🚀 Scraping up to {max_posts} posts for user: {username}")
+        # Scrape latest posts from user and match with provided post links
+        with admission.admit(client_key(request.headers, request.remote_addr)):
+            with profiled(username):
+                response_data = fetch_and_match(username, post_links, options["max_posts"], scan=options["scan"],
+                                                source=options["source"], fields=options["fields"])
         
-        reels = scraper.get_user_reels(username, max_posts=max_posts)
+        if response_data is not None and trace.debug:
+            response_data["debug"] = trace.debug_info()
         
-        if not reels:
-            logger.warning(f"❌ No reels found for user: {username}")
-            return jsonify(*create_response(
-                False, 
-                error=f"No reels found for user '{username}'", 
-                status_code=404
-            ))
+        with stage_seconds.time(stage="serialization", backend="reelscraper"), trace_stage("serialization"):
+            response = json_response(Response, *match_response(username, response_data),
+                                     accept_encoding=request.headers.get('Accept-Encoding', ''))
+        return response
         
-        logger.info(f"📹 Scraped {len(reels)} reels for user: {username}")
-        
-        # Match with provided post links
-        matched = match_posts_with_targets(reels, post_links)
-        
-        logger.info(f"✅ Found {len(matched)} matched posts for user: {username}")
-        
-        # Create response with metadata
-        response_data = {
-            "username": username,
-            "total_reels_scraped": len(reels),
-            "total_target_links": len(post_links),
-            "matched_posts_count": len(matched),
-            "matched_posts": matched
-        }
+    except AdmissionRejected as e:
+        return rejected_response(Response, e)
         
-        return jsonify(*create_response(True, data=response_data))
+    except UpstreamError as e:
+        return jsonify(*upstream_error_response(e))
         
     except Exception as e:
         logger.error(f"❌ Error processing request: {str(e)}")
@@ -132,6 +251,94 @@ def fetch_instagram_post():
             status_code=500
         ))
 
+@app.route("/v1/fetch-instagram-posts/batch", methods=["POST"])
+def fetch_instagram_posts_batch():
+    """API endpoint to fetch and match posts for many users, streamed as NDJSON"""
+    data = request.get_json(silent=True)
+    
+    is_valid, error_msg, items = validate_batch_request(data, validate_request_data)
+    if is_valid:
+        is_valid, error_msg, options = parse_request_options(request.args)
+    if not is_valid:
+        return jsonify(*create_response(False, error=error_msg, status_code=400))
+    logger.info(f"📦 Processing batch of {len(items)} users")
+    # Items run on worker threads, outside the request context
+    key = client_key(request.headers, request.remote_addr)
+    
+    def fetch(username: str, post_links: List[str]) -> Optional[Dict[str, Any]]:
+        # Each item takes an admission slot like a single request, but waits for it
+        # however long it takes, so the batch's own items never crowd each other out
+        with admission.admit(key, patient=True):
+            return fetch_and_match(username, post_links, options["max_posts"], scan=options["scan"],
+                                   source=options["source"], fields=options["fields"])
+    
+    def generate():
+        # One line per user, in completion order; "index" refers to the request's items
+        for index, line in iter_batch_results(items, lambda item: batch_item_line(item, fetch), BATCH_MAX_WORKERS):
+            line["index"] = index
+            yield encode_json(line) + b"\n"
+    
+    return Response(stream_with_context(generate()), mimetype="application/x-ndjson")
+
+def run_fetch_job(payload: Dict[str, Any]) -> Dict[str, Any]:
+    """Job handler: fetch and match posts for one queued request"""
+    return job_result(payload, fetch_and_match(payload["username"], payload["post_links"], payload["max_posts"],
+                                               scan=payload.get("scan"), source=payload.get("source", "live"),
+                                               fields=payload.get("fields")))
+
+# Background workers for long scrapes submitted through /v1/jobs, started with the
+# server or by the first request it serves rather than by importing this module
+job_queue = JobQueue(run_fetch_job, backend="reelscraper")
+
+@app.before_request
+def start_job_queue():
+    """Start the job workers on the first request, so a WSGI server (which never
+    runs __main__) resumes jobs queued or leased before a restart"""
+    job_queue.start()
+
+@app.route("/v1/jobs", methods=["POST"])
+def create_job():
+    """API endpoint to queue a fetch and return immediately with a job id"""
+    try:
+        data = request.get_json(silent=True)
+        
+        is_valid, error_msg, validated_data = validate_request_data(data)
+        if is_valid:
+            is_valid, error_msg, options = parse_request_options(request.args)
+        if not is_valid:
+            return jsonify(*create_response(False, error=error_msg, status_code=400))
+        
+        job_id = job_queue.enqueue(job_payload(validated_data, options))
+        return jsonify(*job_created_response(job_id, validated_data["username"]))
+        
+    except Exception as e:
+        logger.error(f"❌ Error queueing job: {str(e)}")
+        return jsonify(*create_response(False, error=f"Internal server error: {str(e)}", status_code=500))
+
+@app.route("/v1/jobs/<job_id>", methods=["GET"])
+def get_job(job_id: str):
+    """API endpoint to poll a queued job's status and result"""
+    return jsonify(*job_status_response(job_id, job_queue.get(job_id)))
+
+@app.route("/v1/metrics", methods=["GET"])
+def prometheus_metrics():
+    """Metrics in the Prometheus text exposition format"""
+    return Response(render_metrics(), content_type=METRICS_CONTENT_TYPE)
+
+@app.route("/_ah/warmup", methods=["GET"])
+def warmup():
+    """App Engine warmup request: build the scrapers (and the hedge's browser pool) before traffic arrives"""
+    get_scraper(proxy_pool.proxies[0])
+    if hedged_scraper is not None:
+        from browser_pool import get_browser_pool, browser_pool_stats
+
+        if browser_pool_stats() is None:
+            with startup.phase("launch browser pool"):
+                get_browser_pool()
+    with startup.phase("start job queue"):
+        job_queue.start()
+    return jsonify(*create_response(True, data={"status": "warm", "startup": startup.to_dict()}))
+
 @app.route("/v1/health", methods=["GET"])
 def health_check():
     """Health check endpoint for GCP"""
@@ -144,9 +351,20 @@ def status():
         "service": "Instagram Post Matcher API",
         "version": "1.0.0",
         "status": "running",
-        "scraper_timeout": scraper.timeout,
+        "scraper_timeout": SCRAPER_TIMEOUT,
+        "proxies": proxy_pool.stats(),
+        "admission": admission.stats(),
+        "cache": scrape_cache.stats(),
+        "coalescing": scrape_flights.stats(),
+        "hedging": hedged_scraper.stats() if hedged_scraper is not None else None,
+        "jobs": job_queue.stats(),
+        "reel_index": reel_index.stats(),
+        "startup": startup.to_dict(),
         "endpoints": {
             "fetch_posts": "/v1/fetch-instagram-post",
+            "fetch_posts_batch": "/v1/fetch-instagram-posts/batch",
+            "jobs": "/v1/jobs",
+            "metrics": "/v1/metrics",
             "health": "/v1/health",
             "status": "/v1/status"
         }
@@ -159,6 +377,10 @@ def home():
         "message": "Instagram Post Match API is running!",
         "documentation": {
             "fetch_posts": "POST /v1/fetch-instagram-post",
+            "fetch_posts_batch": "POST /v1/fetch-instagram-posts/batch",
+            "create_job": "POST /v1/jobs",
+            "get_job": "GET /v1/jobs/<job_id>",
+            "metrics": "GET /v1/metrics",
             "health": "GET /v1/health",
             "status": "GET /v1/status"
         }
@@ -176,9 +398,12 @@ def method_not_allowed(error):
 def internal_error(error):
     return jsonify(*create_response(False, error="Internal server error", status_code=500))
 
+startup.ready()
+
 if __name__ == "__main__":
     port = int(os.getenv('PORT', 5000))
     debug = os.getenv('FLASK_DEBUG', 'False').lower() == 'true'
     
     logger.info(f"🚀 Starting Instagram Post Matcher API on port {port}")
+    job_queue.start()
     app.run(host="0.0.0.0", port=port, debug=debug)
@@ -1,13 +1,34 @@
-from flask import Flask, request, jsonify
-from reelscraper.utils import LoggerManager
-from bulk_main import extract_shortcode_from_url, match_posts_with_targets
-from playwright_scraper import scrape_user_reels_sync
+from startup import StartupReport
 import traceback
 import logging
 import os
-from datetime import datetime, timezone
-from typing import List, Dict, Any
-import json
+from typing import List, Dict, Any, Optional, Set
+
+# Import and init costs, logged once the module is loaded and shown on /v1/status
+startup = StartupReport()
+
+with startup.phase("import flask"):
+    from flask import Flask, request, jsonify, Response, stream_with_context
+with startup.phase("import playwright"):
+    from playwright_scraper import scrape_user_reels_sync, lookup_posts_sync
+    from browser_pool import get_browser_pool, browser_pool_stats
+with startup.phase("import app modules"):
+    from api_common import (validate_request_data, parse_request_options, create_response, match_response,
+                            json_response, rejected_response, upstream_error_response, UpstreamError,
+                            target_shortcodes, build_match_response,
+                            batch_item_line, job_payload, job_result, job_created_response, job_status_response)
+    from encoding import encode_json
+    from proxy_pool import get_proxy_pool
+    from resource_policy import resource_totals
+    from scrape_cache import ScrapeCache
+    from single_flight import SingleFlight
+    from batch import validate_batch_request, iter_batch_results, BATCH_MAX_WORKERS
+    from job_queue import JobQueue
+    from metrics import stage_seconds, counted_scrape, register_stats, render_metrics, CONTENT_TYPE as METRICS_CONTENT_TYPE
+    from tracing import traced, trace_stage, profiled, current_trace, debug_requested
+    from admission import AdmissionGate, AdmissionRejected, client_key
+    from reel_index import ReelIndex
+    from target_scan import parse_scan_options, scan_for_targets, iter_growing_scrapes
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -15,111 +36,135 @@ logger = logging.getLogger(__name__)
 
 app = Flask(__name__)
 
-# Initialize logger
-logger_manager = LoggerManager()
+# Per-user scrape results shared across requests
+with startup.phase("load scrape cache"):
+    scrape_cache = ScrapeCache()
+# Concurrent scrapes of the same profile share one execution
+scrape_flights = SingleFlight()
+# Every scraped reel, keyed by shortcode, for delta scrapes and index-only lookups
+with startup.phase("open reel index"):
+    reel_index = ReelIndex()
+# Bounds concurrent scrapes (and Chromium instances); excess requests wait briefly in a fair queue, then get 429
+admission = AdmissionGate(max_concurrent=int(os.getenv('ADMISSION_MAX_CONCURRENT', os.getenv('PLAYWRIGHT_POOL_SIZE', 3))))
+register_stats("cache", scrape_cache.stats,
+               counters=("hits", "stale_hits", "misses", "disk_hits", "refreshes", "refresh_errors", "evictions"))
+register_stats("coalescing", scrape_flights.stats, counters=("scrapes", "coalesced"))
+register_stats("admission", admission.stats, counters=("admitted", "rejected", "timed_out"))
 
-def validate_request_data(data: Dict[str, Any]) -> tuple[bool, str, Dict[str, Any]]:
-    """Validate incoming request data"""
-    if not data:
-        return False, "Request body is required", {}
-    
-    username = data.get("username")
-    post_links = data.get("post_links")
-    
-    if not username:
-        return False, "username is required", {}
-    
-    if not post_links:
-        return False, "post_links is required", {}
-    
-    if not isinstance(post_links, list):
-        return False, "post_links must be a list", {}
-    
-    if len(post_links) == 0:
-        return False, "post_links cannot be empty", {}
-    
-    # Validate each post link
-    for i, link in enumerate(post_links):
-        if not isinstance(link, str):
-            return False, f"post_links[{i}] must be a string", {}
-        if not link.strip():
-            return False, f"post_links[{i}] cannot be empty", {}
-    
-    return True, "", {"username": username.strip(), "post_links": [link.strip() for link in post_links]}
-
-def create_response(success: bool, data: Any = None, error: str = None, status_code: int = 200) -> tuple[Dict[str, Any], int]:
-    """Create standardized API response"""
-    response = {
-        "success": success,
-        "timestamp": datetime.now(timezone.utc).isoformat()
-    }
+def scrape_profile(username: str, max_posts: int) -> List[Dict[str, Any]]:
+    """Scrape a profile through the result cache, coalescing concurrent scrapes"""
+    return scrape_cache.get_or_scrape(username, max_posts, "playwright", _coalesced_scrape)
+
+def _coalesced_scrape(username: str, max_posts: int) -> List[Dict[str, Any]]:
+    return scrape_flights.scrape(
+        username, max_posts, "playwright",
+        counted_scrape("playwright", lambda user, count: scrape_user_reels_sync(user, max_posts=count))
+    )
+
+def scan_profile(username: str, target_shortcodes: List[str], max_posts: int, scan: Dict[str, Any],
+                 known_shortcodes: Optional[Set[str]] = None) -> Dict[str, Any]:
+    """Scrape progressively deeper until every target shortcode is found"""
+    pages = iter_growing_scrapes(scrape_profile, username, max_posts, scan["max_depth"])
+    return scan_for_targets(pages, set(target_shortcodes), scan["max_depth"], scan["cutoff"], known_shortcodes)
+
+def fetch_and_match(username: str, post_links: List[str], max_posts: int,
+                    scan: Optional[Dict[str, Any]] = None, source: str = "live",
+                    fields: Optional[List[str]] = None) -> Optional[Dict[str, Any]]:
+    """Scrape a user's latest reels and match them against post_links using Playwright.
+
+    With scan options (see parse_scan_options) the profile is paged through
+    until all targets are found instead of scraping exactly max_posts.
+    source (see REQUEST_SOURCES) selects a full scrape, a delta scrape on top
+    of the reel index, an index-only lookup or a direct fetch of each target.
+    fields (see parse_fields) limits the keys of each returned matched post.
+    Returns the response data, or None when no reels were found (never
+    for a lookup).
+    """
+    shortcodes = target_shortcodes(username, post_links)
     
-    if success and data is not None:
-        response["data"] = data
-    elif not success and error:
-        response["error"] = error
+    # Scrape latest posts from user using Playwright
+    scan_result = None
+    lookup_result = None
+    indexed_reels = []
+    with stage_seconds.time(stage="scrape", backend="playwright"), trace_stage("scrape"):
+        if source == "index":
+            logger.info(f"📚 Looking up shortcodes in the reel index for user: {username}")
+            reels = []
+            indexed_reels = reel_index.lookup(username, shortcodes)
+        elif source == "lookup":
+            logger.info(f"🎯 Fetching {len(shortcodes)} target posts directly for user: {username} using Playwright")
+            lookup_result = lookup_posts_sync(username, shortcodes)
+            reels = lookup_result["reels"]
+            reel_index.upsert(username, reels)
+        else:
+            known = reel_index.known_shortcodes(username) if source == "delta" else set()
+            if known:
+                # Only page through posts newer than the index; indexed targets are answered from it
+                logger.info(f"🚀 Scraping posts newer than the reel index for user: {username} using Playwright")
+                scan = scan or parse_scan_options({"scan": "targets"})
+                scan_result = scan_profile(username, [code for code in shortcodes if code not in known], max_posts, scan, known)
+                reels = scan_result["reels"]
+            elif scan is not None:
+                logger.info(f"🚀 Scanning up to {scan['max_depth']} posts for user: {username} until all targets are found using Playwright")
+                scan_result = scan_profile(username, shortcodes, max_posts, scan)
+                reels = scan_result["reels"]
+            else:
+                logger.info(f"🚀 Scraping up to {max_posts} posts for user: {username} using Playwright")
+            
+                # Use Playwright scraper instead of reelscraper
+                reels = scrape_profile(username, max_posts)
+        
+            reel_index.upsert(username, reels)
+            if known:
+                fresh = {reel["shortcode"] for reel in reels}
+                indexed_reels = reel_index.lookup(username, [code for code in shortcodes if code not in fresh])
     
-    return response, status_code
+    return build_match_response(username, post_links, reels, indexed_reels, "playwright", source=source,
+                                fields=fields, scan_result=scan_result, lookup_result=lookup_result,
+                                extra={"scraper_type": "playwright"})
 
 @app.route("/v1/fetch-instagram-post", methods=["POST"])
+@traced
 def fetch_instagram_post():
     """API endpoint to fetch and match Instagram posts using Playwright"""
     try:
         # Get request data
         data = request.get_json()
         
+        # Opt-in profiler and page timeline (see DEBUG_PROFILING_ENABLED)
+        trace = current_trace()
+        trace.debug = debug_requested(request.headers, request.args)
+        
         # Validate request data
-        is_valid, error_msg, validated_data = validate_request_data(data)
+        with stage_seconds.time(stage="validation", backend="playwright"), trace_stage("validation"):
+            is_valid, error_msg, validated_data = validate_request_data(data)
+            if is_valid:
+                is_valid, error_msg, options = parse_request_options(request.args)
         if not is_valid:
             return jsonify(*create_response(False, error=error_msg, status_code=400))
         
         username = validated_data["username"]
         post_links = validated_data["post_links"]
         
-        logger.info(f"📥 Processing request for username: {username}, post_links: {len(post_links)}")
-        
-        # Extract shortcodes for logging
-        shortcodes = []
-        for link in post_links:
-            shortcode = extract_shortcode_from_url(link)
-            if shortcode:
-                shortcodes.append(shortcode)
-        
-        logger.info(f"🔍 Looking for shortcodes: {shortcodes}")
-        
-        # Scrape latest posts from user using Playwright
-        max_posts = int(request.args.get('max_posts', 10))
-        logger.info(f"🚀 Scraping up to {max_posts} posts for user: {username} using Playwright")
-        
-        # Use Playwright scraper instead of reelscraper
-        reels = scrape_user_reels_sync(username, max_posts=max_posts)
-        
-        if not reels:
-            logger.warning(f"❌ No reels found for user: {username}")
-            return jsonify(*create_response(
-                False, 
-                error=f"No reels found for user '{username}'", 
-                status_code=404
-            ))
-        
-        logger.info(f"📹 Scraped {len(reels)} reels for user: {username}")
+        # Scrape latest posts from user and match with provided post links
+        with admission.admit(client_key(request.headers, request.remote_addr)):
+            with profiled(username):
+                response_data = fetch_and_match(username, post_links, options["max_posts"], scan=options["scan"],
+                                                source=options["source"], fields=options["fields"])
         
-        # Match with provided post links
-        matched = match_posts_with_targets(reels, post_links)
+        if response_data is not None and trace.debug:
+            response_data["debug"] = trace.debug_info()
         
-        logger.info(f"✅ Found {len(matched)} matched posts for user: {username}")
+        with stage_seconds.time(stage="serialization", backend="playwright"), trace_stage("serialization"):
+            response = json_response(Response, *match_response(username, response_data),
+                                     accept_encoding=request.headers.get('Accept-Encoding', ''))
+        return response
         
-        # Create response with metadata
-        response_data = {
-            "username": username,
-            "total_reels_scraped": len(reels),
-            "total_target_links": len(post_links),
-            "matched_posts_count": len(matched),
-            "matched_posts": matched,
-            "scraper_type": "playwright"
-        }
+    except AdmissionRejected as e:
+        return rejected_response(Response, e)
         
-        return jsonify(*create_response(True, data=response_data))
+    except UpstreamError as e:
+        return jsonify(*upstream_error_response(e))
         
     except Exception as e:
         logger.error(f"❌ Error processing request: {str(e)}")
@@ -130,6 +175,90 @@ def fetch_instagram_post():
             status_code=500
         ))
 
+@app.route("/v1/fetch-instagram-posts/batch", methods=["POST"])
+def fetch_instagram_posts_batch():
+    """API endpoint to fetch and match posts for many users, streamed as NDJSON"""
+    data = request.get_json(silent=True)
+    
+    is_valid, error_msg, items = validate_batch_request(data, validate_request_data)
+    if is_valid:
+        is_valid, error_msg, options = parse_request_options(request.args)
+    if not is_valid:
+        return jsonify(*create_response(False, error=error_msg, status_code=400))
+    logger.info(f"📦 Processing batch of {len(items)} users")
+    # Items run on worker threads, outside the request context
+    key = client_key(request.headers, request.remote_addr)
+    
+    def fetch(username: str, post_links: List[str]) -> Optional[Dict[str, Any]]:
+        # Each item takes an admission slot like a single request, but waits for it
+        # however long it takes, so the batch's own items never crowd each other out
+        with admission.admit(key, patient=True):
+            return fetch_and_match(username, post_links, options["max_posts"], scan=options["scan"],
+                                   source=options["source"], fields=options["fields"])
+    
+    def generate():
+        # One line per user, in completion order; "index" refers to the request's items
+        for index, line in iter_batch_results(items, lambda item: batch_item_line(item, fetch), BATCH_MAX_WORKERS):
+            line["index"] = index
+            yield encode_json(line) + b"\n"
+    
+    return Response(stream_with_context(generate()), mimetype="application/x-ndjson")
+
+def run_fetch_job(payload: Dict[str, Any]) -> Dict[str, Any]:
+    """Job handler: fetch and match posts for one queued request"""
+    return job_result(payload, fetch_and_match(payload["username"], payload["post_links"], payload["max_posts"],
+                                               scan=payload.get("scan"), source=payload.get("source", "live"),
+                                               fields=payload.get("fields")))
+
+# Background workers for long scrapes submitted through /v1/jobs, started with the
+# server or by the first request it serves rather than by importing this module
+job_queue = JobQueue(run_fetch_job, backend="playwright")
+
+@app.before_request
+def start_job_queue():
+    """Start the job workers on the first request, so a WSGI server (which never
+    runs __main__) resumes jobs queued or leased before a restart"""
+    job_queue.start()
+
+@app.route("/v1/jobs", methods=["POST"])
+def create_job():
+    """API endpoint to queue a fetch and return immediately with a job id"""
+    try:
+        data = request.get_json(silent=True)
+        
+        is_valid, error_msg, validated_data = validate_request_data(data)
+        if is_valid:
+            is_valid, error_msg, options = parse_request_options(request.args)
+        if not is_valid:
+            return jsonify(*create_response(False, error=error_msg, status_code=400))
+        
+        job_id = job_queue.enqueue(job_payload(validated_data, options))
+        return jsonify(*job_created_response(job_id, validated_data["username"]))
+        
+    except Exception as e:
+        logger.error(f"❌ Error queueing job: {str(e)}")
+        return jsonify(*create_response(False, error=f"Internal server error: {str(e)}", status_code=500))
+
+@app.route("/v1/jobs/<job_id>", methods=["GET"])
+def get_job(job_id: str):
+    """API endpoint to poll a queued job's status and result"""
+    return jsonify(*job_status_response(job_id, job_queue.get(job_id)))
+
+@app.route("/v1/metrics", methods=["GET"])
+def prometheus_metrics():
+    """Metrics in the Prometheus text exposition format"""
+    return Response(render_metrics(), content_type=METRICS_CONTENT_TYPE)
+
+@app.route("/_ah/warmup", methods=["GET"])
+def warmup():
+    """App Engine warmup request: launch the browser pool before traffic arrives"""
+    if os.getenv('PLAYWRIGHT_POOL_ENABLED', 'True').lower() == 'true' and browser_pool_stats() is None:
+        with startup.phase("launch browser pool"):
+            get_browser_pool()
+    with startup.phase("start job queue"):
+        job_queue.start()
+    return jsonify(*create_response(True, data={"status": "warm", "startup": startup.to_dict()}))
+
 @app.route("/v1/health", methods=["GET"])
 def health_check():
     """Health check endpoint for Railway"""
@@ -147,8 +276,20 @@ def status():
         "version": "1.0.0",
         "status": "running",
         "scraper": "playwright",
+        "browser_pool": browser_pool_stats(),
+        "proxies": get_proxy_pool().stats(),
+        "resource_blocking": resource_totals.to_dict(),
+        "admission": admission.stats(),
+        "cache": scrape_cache.stats(),
+        "coalescing": scrape_flights.stats(),
+        "jobs": job_queue.stats(),
+        "reel_index": reel_index.stats(),
+        "startup": startup.to_dict(),
         "endpoints": {
             "fetch_posts": "/v1/fetch-instagram-post",
+            "fetch_posts_batch": "/v1/fetch-instagram-posts/batch",
+            "jobs": "/v1/jobs",
+            "metrics": "/v1/metrics",
             "health": "/v1/health",
             "status": "/v1/status"
         }
@@ -162,6 +303,10 @@ def home():
         "scraper": "playwright",
         "documentation": {
             "fetch_posts": "POST /v1/fetch-instagram-post",
+            "fetch_posts_batch": "POST /v1/fetch-instagram-posts/batch",
+            "create_job": "POST /v1/jobs",
+            "get_job": "GET /v1/jobs/<job_id>",
+            "metrics": "GET /v1/metrics",
             "health": "GET /v1/health",
             "status": "GET /v1/status"
         }
@@ -179,9 +324,12 @@ def method_not_allowed(error):
 def internal_error(error):
     return jsonify(*create_response(False, error="Internal server error", status_code=500))
 
+startup.ready()
+
 if __name__ == "__main__":
     port = int(os.getenv('PORT', 5000))
     debug = os.getenv('FLASK_DEBUG', 'False').lower() == 'true'
     
     logger.info(f"🚀 Starting Instagram Post Matcher API (Playwright) on port {port}")
+    job_queue.start()
     app.run(host="0.0.0.0", port=port, debug=debug) 
\ No newline at end of file
@@ -0,0 +1,366 @@
+from startup import StartupReport
+import asyncio
+import traceback
+import logging
+import os
+from typing import List, Dict, Any, Optional, Set
+
+# Import and init costs, logged once the server is ready and shown on /v1/status
+startup = StartupReport()
+
+with startup.phase("import quart"):
+    from quart import Quart, request, jsonify, Response
+with startup.phase("import playwright"):
+    from playwright_scraper import scrape_user_reels_pooled, lookup_posts_pooled
+    from browser_pool import BrowserPool
+with startup.phase("import app modules"):
+    from api_common import (validate_request_data, parse_request_options, create_response, match_response,
+                            json_response, rejected_response, upstream_error_response, UpstreamError,
+                            target_shortcodes, build_match_response,
+                            abatch_item_line, job_payload, job_result, job_created_response, job_status_response)
+    from encoding import encode_json
+    from proxy_pool import get_proxy_pool
+    from resource_policy import resource_totals
+    from scrape_cache import ScrapeCache
+    from single_flight import AsyncSingleFlight
+    from batch import validate_batch_request, BATCH_MAX_WORKERS
+    from job_queue import JobQueue
+    from metrics import stage_seconds, counted_scrape, register_stats, render_metrics, CONTENT_TYPE as METRICS_CONTENT_TYPE
+    from tracing import traced, trace_stage, profiled, current_trace, debug_requested, LoopActivity
+    from admission import AsyncAdmissionGate, AdmissionRejected, client_key
+    from reel_index import ReelIndex
+    from target_scan import parse_scan_options, ascan_for_targets, aiter_growing_scrapes
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+app = Quart(__name__)
+
+PLAYWRIGHT_SCRAPE_TIMEOUT = float(os.getenv('PLAYWRIGHT_SCRAPE_TIMEOUT', 90))
+
+# One Chromium on the server's event loop; handlers await scrapes on it directly,
+# so the pool size (not a thread count) bounds concurrent page scrapes
+browser_pool = BrowserPool(size=int(os.getenv('PLAYWRIGHT_POOL_SIZE', 16)), proxy_pool=get_proxy_pool())
+
+# Per-user scrape results shared across requests
+with startup.phase("load scrape cache"):
+    scrape_cache = ScrapeCache()
+# Concurrent scrapes of the same profile share one execution
+scrape_flights = AsyncSingleFlight()
+# Every scraped reel, keyed by shortcode, for delta scrapes and index-only lookups
+with startup.phase("open reel index"):
+    reel_index = ReelIndex()
+# Bounds concurrent scrapes to the pooled contexts; excess requests wait briefly in a fair queue, then get 429
+admission = AsyncAdmissionGate(max_concurrent=int(os.getenv('ADMISSION_MAX_CONCURRENT', browser_pool.size)))
+register_stats("cache", scrape_cache.stats,
+               counters=("hits", "stale_hits", "misses", "disk_hits", "refreshes", "refresh_errors", "evictions"))
+register_stats("coalescing", scrape_flights.stats, counters=("scrapes", "coalesced"))
+register_stats("admission", admission.stats, counters=("admitted", "rejected", "timed_out"))
+
+# Scrapes in flight on the loop, so a profiled request can tell it had the loop to itself
+loop_activity = LoopActivity()
+
+# Event loop serving requests; job worker threads submit their scrapes to it
+server_loop: Optional[asyncio.AbstractEventLoop] = None
+
+async def scrape_profile(username: str, max_posts: int) -> List[Dict[str, Any]]:
+    """Scrape a profile through the result cache, coalescing concurrent scrapes"""
+    return await scrape_cache.get_or_scrape_async(username, max_posts, "playwright", _coalesced_scrape)
+
+async def _coalesced_scrape(username: str, max_posts: int) -> List[Dict[str, Any]]:
+    return await scrape_flights.scrape(username, max_posts, "playwright", counted_scrape("playwright", _scrape_pooled))
+
+async def _scrape_pooled(username: str, max_posts: int) -> List[Dict[str, Any]]:
+    return await asyncio.wait_for(scrape_user_reels_pooled(browser_pool, username, max_posts),
+                                  timeout=PLAYWRIGHT_SCRAPE_TIMEOUT)
+
+async def scan_profile(username: str, target_shortcodes: List[str], max_posts: int, scan: Dict[str, Any],
+                       known_shortcodes: Optional[Set[str]] = None) -> Dict[str, Any]:
+    """Scrape progressively deeper until every target shortcode is found"""
+    pages = aiter_growing_scrapes(scrape_profile, username, max_posts, scan["max_depth"])
+    return await ascan_for_targets(pages, set(target_shortcodes), scan["max_depth"], scan["cutoff"], known_shortcodes)
+
+@loop_activity.tracked
+async def fetch_and_match(username: str, post_links: List[str], max_posts: int,
+                          scan: Optional[Dict[str, Any]] = None, source: str = "live",
+                          fields: Optional[List[str]] = None) -> Optional[Dict[str, Any]]:
+    """Scrape a user's latest reels and match them against post_links using Playwright.
+
+    Same behaviour as app_playwright.fetch_and_match, awaiting the scraper
+    on the server's event loop. Returns the response data, or None when no
+    reels were found.
+    """
+    shortcodes = target_shortcodes(username, post_links)
+
+    # Scrape latest posts from user using Playwright
+    scan_result = None
+    lookup_result = None
+    indexed_reels = []
+    with stage_seconds.time(stage="scrape", backend="playwright"), trace_stage("scrape"):
+        if source == "index":
+            logger.info(f"📚 Looking up shortcodes in the reel index for user: {username}")
+            reels = []
+            indexed_reels = await asyncio.to_thread(reel_index.lookup, username, shortcodes)
+        elif source == "lookup":
+            logger.info(f"🎯 Fetching {len(shortcodes)} target posts directly for user: {username} using Playwright")
+            lookup_result = await asyncio.wait_for(lookup_posts_pooled(browser_pool, username, shortcodes),
+                                                   timeout=PLAYWRIGHT_SCRAPE_TIMEOUT)
+            reels = lookup_result["reels"]
+            await asyncio.to_thread(reel_index.upsert, username, reels)
+        else:
+            known = await asyncio.to_thread(reel_index.known_shortcodes, username) if source == "delta" else set()
+            if known:
+                # Only page through posts newer than the index; indexed targets are answered from it
+                logger.info(f"🚀 Scraping posts newer than the reel index for user: {username} using Playwright")
+                scan = scan or parse_scan_options({"scan": "targets"})
+                scan_result = await scan_profile(username, [code for code in shortcodes if code not in known],
+                                                 max_posts, scan, known)
+                reels = scan_result["reels"]
+            elif scan is not None:
+                logger.info(f"🚀 Scanning up to {scan['max_depth']} posts for user: {username} until all targets are found using Playwright")
+                scan_result = await scan_profile(username, shortcodes, max_posts, scan)
+                reels = scan_result["reels"]
+            else:
+                logger.info(f"🚀 Scraping up to {max_posts} posts for user: {username} using Playwright")
+                reels = await scrape_profile(username, max_posts)
+
+            await asyncio.to_thread(reel_index.upsert, username, reels)
+            if known:
+                fresh = {reel["shortcode"] for reel in reels}
+                indexed_reels = await asyncio.to_thread(
+                    reel_index.lookup, username, [code for code in shortcodes if code not in fresh])
+
+    return build_match_response(username, post_links, reels, indexed_reels, "playwright", source=source,
+                                fields=fields, scan_result=scan_result, lookup_result=lookup_result,
+                                extra={"scraper_type": "playwright"})
+
+@app.route("/v1/fetch-instagram-post", methods=["POST"])
+@traced
+async def fetch_instagram_post():
+    """API endpoint to fetch and match Instagram posts using Playwright"""
+    try:
+        # Get request data
+        data = await request.get_json(silent=True)
+
+        # Opt-in profiler and page timeline (see DEBUG_PROFILING_ENABLED)
+        trace = current_trace()
+        trace.debug = debug_requested(request.headers, request.args)
+
+        # Validate request data
+        with stage_seconds.time(stage="validation", backend="playwright"), trace_stage("validation"):
+            is_valid, error_msg, validated_data = validate_request_data(data)
+            if is_valid:
+                is_valid, error_msg, options = parse_request_options(request.args)
+        if not is_valid:
+            return jsonify(*create_response(False, error=error_msg, status_code=400))
+
+        username = validated_data["username"]
+        post_links = validated_data["post_links"]
+
+        # Scrape latest posts from user and match with provided post links
+        async with admission.admit(client_key(request.headers, request.remote_addr)):
+            with profiled(username, loop_activity):
+                response_data = await fetch_and_match(username, post_links, options["max_posts"], scan=options["scan"],
+                                                      source=options["source"], fields=options["fields"])
+
+        if response_data is not None and trace.debug:
+            response_data["debug"] = trace.debug_info()
+
+        with stage_seconds.time(stage="serialization", backend="playwright"), trace_stage("serialization"):
+            response = json_response(Response, *match_response(username, response_data),
+                                     accept_encoding=request.headers.get('Accept-Encoding', ''))
+        return response
+
+    except AdmissionRejected as e:
+        return rejected_response(Response, e)
+
+    except UpstreamError as e:
+        return jsonify(*upstream_error_response(e))
+
+    except Exception as e:
+        logger.error(f"❌ Error processing request: {str(e)}")
+        logger.error(traceback.format_exc())
+        return jsonify(*create_response(
+            False,
+            error=f"Internal server error: {str(e)}",
+            status_code=500
+        ))
+
+@app.route("/v1/fetch-instagram-posts/batch", methods=["POST"])
+async def fetch_instagram_posts_batch():
+    """API endpoint to fetch and match posts for many users, streamed as NDJSON"""
+    data = await request.get_json(silent=True)
+
+    is_valid, error_msg, items = validate_batch_request(data, validate_request_data)
+    if is_valid:
+        is_valid, error_msg, options = parse_request_options(request.args)
+    if not is_valid:
+        return jsonify(*create_response(False, error=error_msg, status_code=400))
+    logger.info(f"📦 Processing batch of {len(items)} users")
+    key = client_key(request.headers, request.remote_addr)
+
+    async def fetch(username: str, post_links: List[str]) -> Optional[Dict[str, Any]]:
+        # Each item takes an admission slot like a single request, but waits for it
+        # however long it takes, so the batch's own items never crowd each other out
+        async with admission.admit(key, patient=True):
+            return await fetch_and_match(username, post_links, options["max_posts"], scan=options["scan"],
+                                         source=options["source"], fields=options["fields"])
+
+    limit = asyncio.Semaphore(BATCH_MAX_WORKERS)
+
+    async def process(index: int, item: tuple):
+        async with limit:
+            return index, await abatch_item_line(item, fetch)
+
+    async def generate():
+        # One line per user, in completion order; "index" refers to the request's items
+        tasks = [asyncio.ensure_future(process(index, item)) for index, item in enumerate(items)]
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                index, line = await next_done
+                line["index"] = index
+                yield encode_json(line) + b"\n"
+        finally:
+            # The client went away: stop items that have not finished
+            for task in tasks:
+                task.cancel()
+
+    return Response(generate(), mimetype="application/x-ndjson")
+
+def run_fetch_job(payload: Dict[str, Any]) -> Dict[str, Any]:
+    """Job handler: fetch and match posts for one queued request on the server loop"""
+    future = asyncio.run_coroutine_threadsafe(
+        fetch_and_match(payload["username"], payload["post_links"], payload["max_posts"],
+                        scan=payload.get("scan"), source=payload.get("source", "live"), fields=payload.get("fields")),
+        server_loop
+    )
+    return job_result(payload, future.result())
+
+# Background workers for long scrapes submitted through /v1/jobs (started with the server)
+job_queue = JobQueue(run_fetch_job, backend="playwright")
+
+@app.before_serving
+async def start_serving():
+    """Launch Chromium on the server loop and start the job workers"""
+    global server_loop
+    server_loop = asyncio.get_running_loop()
+    with startup.phase("launch browser pool"):
+        await browser_pool.start()
+    with startup.phase("start job queue"):
+        job_queue.start()
+    # Hypercorn only accepts connections once this returns, so the browser is part of the cold start
+    startup.ready()
+
+@app.after_serving
+async def stop_serving():
+    job_queue.stop()
+    await browser_pool.close()
+
+@app.route("/v1/jobs", methods=["POST"])
+async def create_job():
+    """API endpoint to queue a fetch and return immediately with a job id"""
+    try:
+        data = await request.get_json(silent=True)
+
+        is_valid, error_msg, validated_data = validate_request_data(data)
+        if is_valid:
+            is_valid, error_msg, options = parse_request_options(request.args)
+        if not is_valid:
+            return jsonify(*create_response(False, error=error_msg, status_code=400))
+
+        job_id = await asyncio.to_thread(job_queue.enqueue, job_payload(validated_data, options))
+        return jsonify(*job_created_response(job_id, validated_data["username"]))
+
+    except Exception as e:
+        logger.error(f"❌ Error queueing job: {str(e)}")
+        return jsonify(*create_response(False, error=f"Internal server error: {str(e)}", status_code=500))
+
+@app.route("/v1/jobs/<job_id>", methods=["GET"])
+async def get_job(job_id: str):
+    """API endpoint to poll a queued job's status and result"""
+    return jsonify(*job_status_response(job_id, await asyncio.to_thread(job_queue.get, job_id)))
+
+@app.route("/v1/metrics", methods=["GET"])
+async def prometheus_metrics():
+    """Metrics in the Prometheus text exposition format"""
+    return Response(render_metrics(), content_type=METRICS_CONTENT_TYPE)
+
+@app.route("/v1/health", methods=["GET"])
+async def health_check():
+    """Health check endpoint for Railway"""
+    return jsonify(*create_response(True, data={
+        "status": "healthy",
+        "service": "instagram-post-matcher-playwright",
+        "scraper": "playwright"
+    }))
+
+@app.route("/v1/status", methods=["GET"])
+async def status():
+    """Detailed status endpoint"""
+    return jsonify(*create_response(True, data={
+        "service": "Instagram Post Matcher API (Playwright)",
+        "version": "1.0.0",
+        "status": "running",
+        "scraper": "playwright",
+        "server": "asgi",
+        "browser_pool": browser_pool.stats(),
+        "proxies": get_proxy_pool().stats(),
+        "resource_blocking": resource_totals.to_dict(),
+        "admission": admission.stats(),
+        "cache": scrape_cache.stats(),
+        "coalescing": scrape_flights.stats(),
+        "jobs": await asyncio.to_thread(job_queue.stats),
+        "reel_index": await asyncio.to_thread(reel_index.stats),
+        "startup": startup.to_dict(),
+        "endpoints": {
+            "fetch_posts": "/v1/fetch-instagram-post",
+            "fetch_posts_batch": "/v1/fetch-instagram-posts/batch",
+            "jobs": "/v1/jobs",
+            "metrics": "/v1/metrics",
+            "health": "/v1/health",
+            "status": "/v1/status"
+        }
+    }))
+
+@app.route("/", methods=["GET"])
+async def home():
+    """Root endpoint"""
+    return jsonify(*create_response(True, data={
+        "message": "Instagram Post Match API (Playwright) is running!",
+        "scraper": "playwright",
+        "documentation": {
+            "fetch_posts": "POST /v1/fetch-instagram-post",
+            "fetch_posts_batch": "POST /v1/fetch-instagram-posts/batch",
+            "create_job": "POST /v1/jobs",
+            "get_job": "GET /v1/jobs/<job_id>",
+            "metrics": "GET /v1/metrics",
+            "health": "GET /v1/health",
+            "status": "GET /v1/status"
+        }
+    }))
+
+@app.errorhandler(404)
+async def not_found(error):
+    return jsonify(*create_response(False, error="Endpoint not found", status_code=404))
+
+@app.errorhandler(405)
+async def method_not_allowed(error):
+    return jsonify(*create_response(False, error="Method not allowed", status_code=405))
+
+@app.errorhandler(500)
+async def internal_error(error):
+    return jsonify(*create_response(False, error="Internal server error", status_code=500))
+
+if __name__ == "__main__":
+    from hypercorn.asyncio import serve
+    from hypercorn.config import Config
+
+    config = Config()
+    config.bind = [f"0.0.0.0:{int(os.getenv('PORT', 5000))}"]
+    config.accesslog = "-"
+    # Playwright scrapes can take a while; don't let keep-alive or shutdown cut them short
+    config.graceful_timeout = PLAYWRIGHT_SCRAPE_TIMEOUT
+
+    logger.info(f"🚀 Starting Instagram Post Matcher API (Playwright, ASGI) on {config.bind[0]}")
+    asyncio.run(serve(app, config))
@@ -0,0 +1,57 @@
+import os
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import List, Dict, Any, Callable, Iterator, Tuple
+
+BATCH_MAX_ITEMS = int(os.getenv('BATCH_MAX_ITEMS', 500))
+BATCH_MAX_WORKERS = int(os.getenv('BATCH_MAX_WORKERS', 5))
+
+Validator = Callable[[Dict[str, Any]], Tuple[bool, str, Dict[str, Any]]]
+
+
+def validate_batch_request(data: Any, validate_item: Validator,
+                           max_items: int = BATCH_MAX_ITEMS) -> Tuple[bool, str, List[Tuple[bool, str, Dict[str, Any]]]]:
+    """Validate a batch request body.
+
+    Structural problems reject the whole batch; each item is validated with
+    validate_item and its result returned so invalid items can be reported
+    individually.
+    """
+    if not data:
+        return False, "Request body is required", []
+
+    items = data.get("items") if isinstance(data, dict) else None
+    if items is None:
+        return False, "items is required", []
+
+    if not isinstance(items, list):
+        return False, "items must be a list", []
+
+    if len(items) == 0:
+        return False, "items cannot be empty", []
+
+    if len(items) > max_items:
+        return False, f"items cannot contain more than {max_items} entries", []
+
+    results = []
+    for i, item in enumerate(items):
+        if not isinstance(item, dict):
+            results.append((False, f"items[{i}] must be an object", {}))
+        else:
+            results.append(validate_item(item))
+    return True, "", results
+
+
+def iter_batch_results(items: List[Any], process_item: Callable[[Any], Dict[str, Any]],
+                       max_workers: int = BATCH_MAX_WORKERS) -> Iterator[Tuple[int, Dict[str, Any]]]:
+    """Run process_item over items with bounded concurrency.
+
+    Yields (index, result) pairs in completion order. Closing the generator
+    early (e.g. the client disconnected) cancels items that have not started.
+    """
+    executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="batch")
+    try:
+        futures = {executor.submit(process_item, item): index for index, item in enumerate(items)}
+        for future in as_completed(futures):
+            yield futures[future], future.result()
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
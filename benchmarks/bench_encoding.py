@@ -0,0 +1,90 @@
+"""Bytes and encode time of matched post responses per 1k matched posts.
+
+Run from the repository root:
+
+    python benchmarks/bench_encoding.py [--posts 1000] [--fields target_link,shortcode,views]
+
+Compares the indented bulk output, compact stdlib JSON and orjson (when
+installed), for full posts and a fields= projection, then the same bodies
+after gzip and zstd (when zstandard is installed) at the response levels.
+"""
+import argparse
+import json
+import os
+import random
+import string
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import encoding  # noqa: E402
+from matching import build_matched_post, parse_fields, project_matched_posts  # noqa: E402
+
+DEFAULT_FIELDS = "target_link,shortcode,likes,comments,views"
+
+
+def make_posts(count: int, seed: int = 0):
+    rng = random.Random(seed)
+    posts = []
+    for i in range(count):
+        code = "".join(rng.choices(string.ascii_letters + string.digits, k=11))
+        reel = {"username": f"user_{i // 10:05d}", "shortcode": code, "url": f"https://www.instagram.com/reel/{code}/",
+                "likes": rng.randint(0, 10000), "comments": rng.randint(0, 500),
+                "views": rng.randint(0, 100000), "posted_time": 1700000000 + rng.randint(0, 10 ** 7),
+                "video_duration": round(rng.uniform(5, 90), 3), "dimensions": {"width": 720, "height": 1280},
+                "numbers_of_qualities": 3}
+        posts.append(build_matched_post(reel, f"https://www.instagram.com/reel/{code}/?igsh=abc"))
+    return posts
+
+
+def best_ms(fn, repeat: int) -> float:
+    """Fastest of repeat runs, in ms"""
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    return min(times) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--posts", type=int, default=1000)
+    parser.add_argument("--fields", default=DEFAULT_FIELDS, help="projection compared with the full posts")
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    posts = make_posts(args.posts)
+    projected = project_matched_posts(posts, parse_fields(args.fields))
+    per_1k = 1000 / args.posts
+
+    encoders = [
+        ("json indent=2", lambda obj: json.dumps(obj, ensure_ascii=False, indent=2).encode("utf-8")),
+        ("json compact", lambda obj: json.dumps(obj, ensure_ascii=False, separators=(",", ":")).encode("utf-8")),
+    ]
+    if encoding.orjson is not None:
+        encoders.append(("orjson", encoding.encode_json))
+    else:
+        print("ℹ️ orjson is not installed; encode_json falls back to json compact")
+
+    print(f"Per 1k matched posts (json backend: {encoding.JSON_BACKEND}, codings: {', '.join(encoding.SUPPORTED_ENCODINGS)})")
+    print(f"{'posts':<10} {'encoder':<14} {'bytes':>10} {'encode ms':>10}")
+    bodies = {}
+    for label, data in (("full", posts), ("fields", projected)):
+        for name, encode in encoders:
+            body = encode(data)
+            ms = best_ms(lambda: encode(data), args.repeat)
+            print(f"{label:<10} {name:<14} {len(body) * per_1k:>10.0f} {ms * per_1k:>10.2f}")
+            bodies[label] = body
+
+    print(f"\n{'posts':<10} {'coding':<14} {'bytes':>10} {'compress ms':>12}")
+    for label, body in bodies.items():
+        for coding in encoding.SUPPORTED_ENCODINGS:
+            compressed = encoding.compress(body, coding)
+            ms = best_ms(lambda: encoding.compress(body, coding), args.repeat)
+            print(f"{label:<10} {coding:<14} {len(compressed) * per_1k:>10.0f} {ms * per_1k:>12.2f}")
+
+
+if __name__ == "__main__":
+    main()
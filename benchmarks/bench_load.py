@@ -0,0 +1,304 @@
+"""Load-test the API against a local fake Instagram and record throughput and latency.
+
+Run from the repository root:
+
+    python benchmarks/bench_load.py --app app.py --concurrency 16 --requests 400
+    python benchmarks/bench_load.py --app app_playwright.py --users 20 --latency-ms 50
+    python benchmarks/bench_load.py --url http://127.0.0.1:5000 --no-fake
+    python benchmarks/bench_load.py --source lookup --max-posts 48
+
+Unless --url is given, the app is started as a subprocess with
+INSTAGRAM_BASE_URL pointing at benchmarks/fake_instagram.py, its SQLite
+files in a temporary directory. Each worker sends requests back to back
+(closed loop) for usernames drawn from --users, asking for two reels that
+the fake does serve. Results are appended to benchmarks/results/load.jsonl
+together with the configuration and git commit, and the previous run with
+the same configuration is shown for comparison.
+"""
+import argparse
+import json
+import math
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter
+from datetime import datetime, timezone
+from typing import List, Dict, Any, Optional
+
+import requests
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from fake_instagram import FakeInstagram, start_fake_instagram, make_reels  # noqa: E402
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_RESULTS = os.path.join(REPO_ROOT, "benchmarks", "results", "load.jsonl")
+STARTUP_TIMEOUT = 120
+
+
+def percentile(sorted_values: List[float], pct: float) -> Optional[float]:
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return None
+    rank = max(1, math.ceil(pct / 100 * len(sorted_values)))
+    return sorted_values[rank - 1]
+
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], cwd=REPO_ROOT,
+                                       stderr=subprocess.DEVNULL, text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def start_app(app: str, port: int, env_overrides: Dict[str, str], workdir: str) -> subprocess.Popen:
+    """Start one of the API apps on port, logging to workdir/server.log"""
+    env = dict(os.environ, PORT=str(port), **env_overrides)
+    env.setdefault("JOB_QUEUE_DB", os.path.join(workdir, "jobs.db"))
+    env.setdefault("REEL_INDEX_DB", os.path.join(workdir, "reel_index.db"))
+    log = open(os.path.join(workdir, "server.log"), "w")
+    process = subprocess.Popen([sys.executable, os.path.join(REPO_ROOT, app)], cwd=workdir, env=env,
+                               stdout=log, stderr=subprocess.STDOUT)
+    process.log = log
+    return process
+
+
+def wait_until_healthy(url: str, process: Optional[subprocess.Popen], timeout: float = STARTUP_TIMEOUT):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if process is not None and process.poll() is not None:
+            raise RuntimeError(f"Server exited with code {process.returncode}; see {process.log.name}")
+        try:
+            if requests.get(f"{url}/v1/health", timeout=2).ok:
+                return
+        except requests.RequestException:
+            pass
+        time.sleep(0.5)
+    raise RuntimeError(f"Server at {url} did not become healthy within {timeout:.0f}s")
+
+
+def build_payloads(users: int, max_posts: int, seed: int) -> List[Dict[str, Any]]:
+    """One request body per username, targeting two reels within max_posts"""
+    rng = random.Random(seed)
+    payloads = []
+    for i in range(users):
+        username = f"bench_user_{i}"
+        codes = [reel["code"] for reel in make_reels(username, max_posts)]
+        targets = rng.sample(codes, min(2, len(codes)))
+        payloads.append({
+            "username": username,
+            "post_links": [f"https://www.instagram.com/reel/{code}/" for code in targets],
+        })
+    return payloads
+
+
+def run_load(url: str, payloads: List[Dict[str, Any]], total: int, concurrency: int, max_posts: int,
+             timeout: float, seed: int, source: str = "live") -> Dict[str, Any]:
+    """Send total requests from concurrency closed-loop workers"""
+    samples: List[Dict[str, Any]] = []
+    lock = threading.Lock()
+    remaining = [total]
+
+    def worker(worker_id: int):
+        rng = random.Random(seed + worker_id)
+        session = requests.Session()
+        while True:
+            with lock:
+                if remaining[0] <= 0:
+                    return
+                remaining[0] -= 1
+            payload = rng.choice(payloads)
+            start = time.perf_counter()
+            try:
+                response = session.post(f"{url}/v1/fetch-instagram-post", params={"max_posts": max_posts, "source": source},
+                                        json=payload, timeout=timeout)
+                body = response.json()
+                # The API returns [body, status]; the HTTP status is only set for 429s
+                status = body[1] if isinstance(body, list) and response.status_code == 200 else response.status_code
+                matched = body[0].get("data", {}).get("matched_posts_count", 0) if isinstance(body, list) else 0
+                outcome = str(status)
+            except requests.RequestException as e:
+                outcome, matched = type(e).__name__, 0
+            except ValueError:
+                outcome, matched = "bad_json", 0
+            elapsed = time.perf_counter() - start
+            with lock:
+                samples.append({"latency": elapsed, "outcome": outcome, "matched": matched})
+
+    threads = [threading.Thread(target=worker, args=(i,), daemon=True) for i in range(concurrency)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    wall = time.perf_counter() - started
+
+    ok_latencies = sorted(s["latency"] * 1000 for s in samples if s["outcome"] == "200")
+    all_latencies = sorted(s["latency"] * 1000 for s in samples)
+    ok = len(ok_latencies)
+
+    def rounded(value: Optional[float]) -> Optional[float]:
+        return round(value, 1) if value is not None else None
+
+    return {
+        "requests": len(samples),
+        "ok": ok,
+        "outcomes": dict(Counter(s["outcome"] for s in samples)),
+        "fully_matched": sum(1 for s in samples if s["matched"] == 2),
+        "wall_seconds": round(wall, 2),
+        "throughput_rps": round(len(samples) / wall, 2) if wall else None,
+        "ok_throughput_rps": round(ok / wall, 2) if wall else None,
+        "latency_ms": {
+            "p50": rounded(percentile(ok_latencies, 50)),
+            "p95": rounded(percentile(ok_latencies, 95)),
+            "p99": rounded(percentile(ok_latencies, 99)),
+            "max": rounded(ok_latencies[-1] if ok_latencies else None),
+            "mean": rounded(sum(ok_latencies) / ok if ok else None),
+        },
+        "all_latency_ms": {
+            "p50": rounded(percentile(all_latencies, 50)),
+            "p99": rounded(percentile(all_latencies, 99)),
+        },
+    }
+
+
+def previous_run(path: str, config: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """Latest saved run with the same configuration"""
+    if not os.path.exists(path):
+        return None
+    match = None
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            try:
+                run = json.loads(line)
+            except ValueError:
+                continue
+            if run.get("config") == config:
+                match = run
+    return match
+
+
+def print_results(results: Dict[str, Any], previous: Optional[Dict[str, Any]]):
+    latency = results["latency_ms"]
+    print(f"📊 {results['requests']} requests in {results['wall_seconds']}s: "
+          f"{results['throughput_rps']} req/s ({results['ok_throughput_rps']} ok/s)")
+    print(f"   outcomes: {results['outcomes']}, fully matched: {results['fully_matched']}")
+    print(f"   ok latency ms: p50={latency['p50']} p95={latency['p95']} p99={latency['p99']} "
+          f"max={latency['max']} mean={latency['mean']}")
+    if previous:
+        before = previous["results"]
+        print(f"   previous run ({previous['timestamp']}, commit {previous.get('git_commit')}): "
+              f"{before['ok_throughput_rps']} ok/s, p50={before['latency_ms']['p50']} "
+              f"p95={before['latency_ms']['p95']} p99={before['latency_ms']['p99']}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--app", default="app.py", help="app to start: app.py, app_playwright.py or asgi_playwright.py")
+    parser.add_argument("--url", help="load an already running server instead of starting --app")
+    parser.add_argument("--port", type=int, default=5055, help="port for the started app")
+    parser.add_argument("--no-fake", action="store_true", help="don't start the fake Instagram (with --url)")
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--warmup", type=int, default=0, help="requests sent before measuring")
+    parser.add_argument("--users", type=int, default=50, help="distinct usernames to request")
+    parser.add_argument("--max-posts", type=int, default=12)
+    parser.add_argument("--source", default="live", help="source= of every request: live, delta, index or lookup")
+    parser.add_argument("--timeout", type=float, default=120)
+    parser.add_argument("--latency-ms", type=float, default=20, help="fake Instagram response latency")
+    parser.add_argument("--throttle-rps", type=float, default=0, help="fake Instagram 429s above this rate")
+    parser.add_argument("--throttle-prob", type=float, default=0, help="fake Instagram 429 probability")
+    parser.add_argument("--no-cache", action="store_true", help="disable the scrape cache in the started app")
+    parser.add_argument("--server-env", nargs="*", default=[], metavar="KEY=VALUE",
+                        help="extra environment for the started app, e.g. ADMISSION_MAX_CONCURRENT=16")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--results", default=DEFAULT_RESULTS, help="JSONL file runs are appended to")
+    parser.add_argument("--no-save", action="store_true")
+    args = parser.parse_args()
+
+    fake = server = process = None
+    workdir = tempfile.mkdtemp(prefix="bench_load_")
+    if not args.no_fake:
+        fake = FakeInstagram(reels_per_user=max(50, args.max_posts), throttle_rps=args.throttle_rps,
+                             throttle_prob=args.throttle_prob, latency_ms=args.latency_ms)
+        server, base_url = start_fake_instagram(fake=fake)
+        print(f"🧪 Fake Instagram on {base_url}")
+
+    server_env = dict(item.split("=", 1) for item in args.server_env)
+    url = args.url.rstrip("/") if args.url else f"http://127.0.0.1:{args.port}"
+    try:
+        if not args.url:
+            env = dict(server_env)
+            if fake is not None:
+                env["INSTAGRAM_BASE_URL"] = base_url
+            if args.no_cache:
+                env["SCRAPE_CACHE_ENABLED"] = "false"
+            process = start_app(args.app, args.port, env, workdir)
+            print(f"🚀 Started {args.app} on {url} (logs in {workdir}/server.log)")
+        wait_until_healthy(url, process)
+
+        payloads = build_payloads(args.users, args.max_posts, args.seed)
+        if fake is not None:
+            # source=lookup fetches posts by id without visiting the profile first
+            for payload in payloads:
+                fake.register(payload["username"])
+        if args.warmup:
+            run_load(url, payloads, args.warmup, args.concurrency, args.max_posts, args.timeout, args.seed + 1000,
+                     args.source)
+        results = run_load(url, payloads, args.requests, args.concurrency, args.max_posts, args.timeout, args.seed,
+                           args.source)
+        if fake is not None:
+            results["fake_instagram"] = dict(fake.counts)
+        try:
+            status = requests.get(f"{url}/v1/status", timeout=5).json()[0]["data"]
+            results["server"] = {key: status[key] for key in ("cache", "coalescing", "admission") if key in status}
+        except (requests.RequestException, ValueError, KeyError, IndexError):
+            pass
+    finally:
+        if process is not None:
+            process.terminate()
+            try:
+                process.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                process.kill()
+            process.log.close()
+        if server is not None:
+            server.shutdown()
+
+    config = {
+        "app": args.url or args.app,
+        "requests": args.requests,
+        "concurrency": args.concurrency,
+        "warmup": args.warmup,
+        "users": args.users,
+        "max_posts": args.max_posts,
+        "latency_ms": None if args.no_fake else args.latency_ms,
+        "throttle_rps": None if args.no_fake else args.throttle_rps,
+        "throttle_prob": None if args.no_fake else args.throttle_prob,
+        "cache": not args.no_cache,
+        "server_env": server_env,
+    }
+    if args.source != "live":
+        config["source"] = args.source
+    print_results(results, previous_run(args.results, config))
+
+    if not args.no_save:
+        os.makedirs(os.path.dirname(os.path.abspath(args.results)), exist_ok=True)
+        run = {
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "git_commit": git_commit(),
+            "config": config,
+            "results": results,
+        }
+        with open(args.results, "a", encoding="utf-8") as f:
+            f.write(json.dumps(run) + "\n")
+        print(f"💾 Saved to {args.results}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+"""Compare the per-user matching loop with the vectorized join in bulk_main.
+
+Run from the repository root:
+
+    python benchmarks/bench_matching.py [--sizes 1000 10000 100000]
+
+Each size is the number of spreadsheet rows. Every user has REELS_PER_USER
+scraped reels and TARGETS_PER_USER target links, half of which match. The
+loop is quadratic and needs well over ten minutes at 100k rows; pass
+--loop-max-rows to time only the join above that size.
+"""
+import argparse
+import contextlib
+import io
+import os
+import random
+import string
+import sys
+import time
+
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bulk_main import match_posts_frame, match_posts_with_targets  # noqa: E402
+
+REELS_PER_USER = 20
+TARGETS_PER_USER = 10
+LINK_FORMATS = [
+    "https://www.instagram.com/reel/{}/",
+    "https://www.instagram.com/p/{}/?igsh=abc",
+    "instagram.com/reel/{}",
+]
+
+
+def _shortcode(rng: random.Random) -> str:
+    return "".join(rng.choices(string.ascii_letters + string.digits, k=11))
+
+
+def make_dataset(rows: int, seed: int = 0):
+    rng = random.Random(seed)
+    users = max(1, rows // TARGETS_PER_USER)
+    reels, links = [], []
+    for u in range(users):
+        username = f"user_{u:06d}"
+        codes = [_shortcode(rng) for _ in range(REELS_PER_USER)]
+        reels.extend({"username": username, "shortcode": code, "url": f"https://www.instagram.com/reel/{code}/",
+                      "likes": rng.randint(0, 10000), "comments": rng.randint(0, 500),
+                      "views": rng.randint(0, 100000), "posted_time": 1700000000 + rng.randint(0, 10 ** 7),
+                      "video_duration": 12.5, "dimensions": {"width": 720, "height": 1280},
+                      "numbers_of_qualities": 3} for code in codes)
+        for i in range(TARGETS_PER_USER):
+            code = codes[i] if i % 2 == 0 else _shortcode(rng)
+            links.append({"username": username, "post_link": rng.choice(LINK_FORMATS).format(code)})
+    rng.shuffle(reels)
+    return pd.DataFrame(links[:rows]), reels
+
+
+def loop_matching(df: pd.DataFrame, all_reels):
+    """The matching loop process_excel_input used before the join"""
+    username_groups = df.groupby('username')['post_link'].apply(list).to_dict()
+    all_matched_posts = []
+    with contextlib.redirect_stdout(io.StringIO()):
+        for username, target_links in username_groups.items():
+            user_reels = [reel for reel in all_reels if reel.get('username') == username]
+            all_matched_posts.extend(match_posts_with_targets(user_reels, target_links))
+    return all_matched_posts
+
+
+def timed(fn, *args):
+    start = time.perf_counter()
+    result = fn(*args)
+    return result, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000])
+    parser.add_argument("--loop-max-rows", type=int, default=None,
+                        help="skip the loop (and the comparison) above this many rows")
+    args = parser.parse_args()
+
+    print(f"{'rows':>8} {'reels':>8} {'matches':>8} {'loop (s)':>10} {'join (s)':>10} {'speedup':>8}")
+    for rows in args.sizes:
+        df, reels = make_dataset(rows)
+        actual, join_time = timed(match_posts_frame, df, reels)
+        if args.loop_max_rows is not None and rows > args.loop_max_rows:
+            print(f"{rows:>8} {len(reels):>8} {len(actual):>8} {'-':>10} {join_time:>10.3f} {'-':>8}")
+            continue
+        expected, loop_time = timed(loop_matching, df, reels)
+        assert actual == expected, f"join and loop disagree at {rows} rows"
+        print(f"{rows:>8} {len(reels):>8} {len(actual):>8} {loop_time:>10.3f} {join_time:>10.3f} "
+              f"{loop_time / join_time:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+"""Scrape accounts from the fake Instagram through a pool of local fake proxies.
+
+Run from the repository root:
+
+    python benchmarks/bench_proxy_pool.py [--accounts 60]
+
+Three proxies are started: a healthy one, a slow one and one that fails
+most requests. The pool should quarantine the broken proxy, keep each
+account on a single proxy, and finish every account.
+"""
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from reelscraper import ReelScraper  # noqa: E402
+
+from proxy_pool import ProxyPool  # noqa: E402
+from fake_instagram import start_fake_instagram  # noqa: E402
+from fake_proxy import start_fake_proxy  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--accounts", type=int, default=60)
+    parser.add_argument("--workers", type=int, default=6)
+    args = parser.parse_args()
+
+    instagram, base_url = start_fake_instagram()
+    proxies = {
+        "healthy": start_fake_proxy(),
+        "slow": start_fake_proxy(latency_ms=150),
+        "broken": start_fake_proxy(fail_rate=0.8),
+    }
+    names = {address: name for name, (_, address) in proxies.items()}
+    pool = ProxyPool([address for _, address in proxies.values()], quarantine_seconds=30)
+
+    scrapers = {}
+    for proxy in pool.proxies:
+        scraper = ReelScraper(timeout=10, proxy=proxy)
+        scraper.api.BASE_URL = base_url
+        scraper.api.CLIPS_USER_URL = f"{base_url}/api/v1/clips/user/"
+        scrapers[proxy] = scraper
+
+    def scrape(username):
+        return pool.call(username, lambda proxy: scrapers[proxy].get_user_reels(username, max_posts=22, max_retries=2))
+
+    ok = failed = 0
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.workers) as executor:
+        for future in [executor.submit(scrape, f"user_{i}") for i in range(args.accounts)]:
+            try:
+                future.result()
+                ok += 1
+            except Exception:
+                failed += 1
+    elapsed = time.perf_counter() - start
+
+    print(f"{ok} ok, {failed} failed in {elapsed:.2f}s")
+    print(f"{'proxy':>8} {'accounts':>9} {'failures':>9} {'fail rate':>10} {'latency':>9} {'quarantines':>12} {'requests':>9}")
+    for stats in pool.stats()["proxies"]:
+        server = proxies[names[stats["proxy"]]][0]
+        print(f"{names[stats['proxy']]:>8} {stats['requests']:>9} {stats['failures']:>9} {stats['failure_rate']:>10.2f} "
+              f"{stats['latency_ms']:>7.0f}ms {stats['quarantines']:>12} {server.counts['requests']:>9}")
+    instagram.shutdown()
+
+
+if __name__ == "__main__":
+    main()
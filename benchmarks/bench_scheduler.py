@@ -0,0 +1,76 @@
+"""Scrape accounts from a throttling fake Instagram with fixed vs adaptive scheduling.
+
+Run from the repository root:
+
+    python benchmarks/bench_scheduler.py [--accounts 60] [--throttle-rps 15]
+
+"fixed" is what bulk_main.py does by default: 5 workers, 10 immediate
+retries per account. "adaptive" uses AdaptiveScheduler (token bucket,
+AIMD concurrency and backoff with jitter).
+"""
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from reelscraper import ReelScraper  # noqa: E402
+
+from adaptive_scheduler import AdaptiveScheduler  # noqa: E402
+from fake_instagram import FakeInstagram, start_fake_instagram  # noqa: E402
+
+
+def point_at(scraper: ReelScraper, base_url: str) -> ReelScraper:
+    scraper.api.BASE_URL = base_url
+    scraper.api.GRAPHQL_URL = f"{base_url}/graphql/query/"
+    scraper.api.CLIPS_USER_URL = f"{base_url}/api/v1/clips/user/"
+    return scraper
+
+
+def run(usernames, max_posts, scrape_one, workers):
+    ok = failed = 0
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        for future in [executor.submit(scrape_one, username) for username in usernames]:
+            try:
+                future.result()
+                ok += 1
+            except Exception:
+                failed += 1
+    return ok, failed, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--accounts", type=int, default=60)
+    parser.add_argument("--max-posts", type=int, default=22)
+    parser.add_argument("--throttle-rps", type=float, default=15)
+    parser.add_argument("--rate", type=float, default=12, help="token bucket rate for the adaptive run")
+    args = parser.parse_args()
+
+    print(f"{'mode':>9} {'ok':>5} {'failed':>6} {'time (s)':>9} {'requests':>9} {'429s':>6}")
+    for mode in ("fixed", "adaptive"):
+        fake = FakeInstagram(throttle_rps=args.throttle_rps)
+        server, base_url = start_fake_instagram(fake=fake)
+        usernames = [f"{mode}_user_{i}" for i in range(args.accounts)]
+        scraper = point_at(ReelScraper(timeout=10), base_url)
+
+        if mode == "fixed":
+            ok, failed, elapsed = run(usernames, args.max_posts,
+                                      lambda u: scraper.get_user_reels(u, max_posts=args.max_posts, max_retries=10), 5)
+        else:
+            scheduler = AdaptiveScheduler(rate=args.rate, burst=5, max_concurrency=10, base_delay=0.5, max_delay=8)
+            scheduler.instrument(scraper, base_url=base_url)
+            ok, failed, elapsed = run(usernames, args.max_posts, lambda u: scheduler.call(
+                u, lambda: scraper.get_user_reels(u, max_posts=args.max_posts, max_retries=1)), scheduler.max_concurrency)
+            print(f"          {scheduler.summary()}")
+
+        print(f"{mode:>9} {ok:>5} {failed:>6} {elapsed:>9.2f} {fake.counts['requests']:>9} {fake.counts['throttled']:>6}")
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
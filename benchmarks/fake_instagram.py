@@ -0,0 +1,339 @@
+"""Local stand-in for the Instagram endpoints reelscraper and Playwright use.
+
+Serves GET /api/v1/users/web_profile_info/ and POST /api/v1/clips/user/
+with deterministic reels for any username, and profile pages at
+/<username>/ and /<username>/reels/ whose script loads the same clips
+payload and renders reel anchors, one more page per scroll to the bottom.
+Single posts are served by the post page GraphQL query (POST
+/graphql/query with a shortcode variable) and as /reel/<shortcode>/ pages
+embedding the media JSON, for usernames whose profile was requested or
+passed to FakeInstagram.register. Shortcodes
+encode the media id as Instagram's do. It can inject throttling (429s
+above a request rate or at random) and latency. Usernames starting with
+"missing" do not exist.
+
+    python benchmarks/fake_instagram.py --port 8765 --throttle-rps 20
+
+Point the apps, ThrottleAwareInstagramAPI and PlaywrightInstagramScraper at
+it with INSTAGRAM_BASE_URL=http://127.0.0.1:8765, or a ReelScraper by
+setting BASE_URL, GRAPHQL_URL and CLIPS_USER_URL on scraper.api.
+"""
+import argparse
+import hashlib
+import json
+import random
+import re
+import threading
+import time
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Any, Optional, Tuple, Union
+from urllib.parse import urlparse, parse_qs
+
+PAGE_SIZE = 11
+# Reels the profile page's grid loads per page
+GRID_PAGE_SIZE = 12
+PROFILE_PATH = re.compile(r"^/(?P<username>[A-Za-z0-9_.]+)(?:/reels)?/?$")
+POST_PATH = re.compile(r"^/(?:reel|p)/(?P<shortcode>[A-Za-z0-9_-]+)/?$")
+SHORTCODE_ALPHABET = "ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789-_"
+# Media ids are the user's seed followed by four digits of post index
+POSTS_PER_SEED = 10000
+
+NOT_FOUND_PAGE = """<!doctype html>
+<html><head><title>Page not found</title></head>
+<body><h2>Sorry, this page isn't available.</h2></body></html>
+"""
+
+# Mirrors what the scraper relies on: a reels tab link, /reel/ anchors in
+# the grid and the clips/user XHR carrying the media payload
+PROFILE_PAGE = """<!doctype html>
+<html><head><title>@{username}</title></head>
+<body>
+<header><h2>{username}</h2><a href="/{username}/reels/">Reels</a></header>
+<main id="grid"></main>
+<script>
+const USER_ID = "{user_id}";
+let maxId = "", more = true, loading = false;
+async function loadPage() {{
+  if (!more || loading) return;
+  loading = true;
+  try {{
+    const body = new URLSearchParams({{target_user_id: USER_ID, page_size: "{page_size}", max_id: maxId}});
+    const res = await fetch("/api/v1/clips/user/", {{method: "POST", body}});
+    if (res.ok) {{
+      const data = await res.json();
+      const grid = document.getElementById("grid");
+      for (const item of data.items) {{
+        const a = document.createElement("a");
+        a.href = "/reel/" + item.media.code + "/";
+        a.textContent = item.media.code;
+        a.style.display = "block";
+        a.style.height = "200px";
+        grid.appendChild(a);
+      }}
+      more = data.paging_info.more_available;
+      maxId = data.paging_info.max_id || "";
+    }}
+  }} finally {{
+    loading = false;
+  }}
+}}
+window.addEventListener("scroll", () => {{
+  if (window.innerHeight + window.scrollY >= document.body.scrollHeight - 400) loadPage();
+}});
+loadPage();
+</script>
+</body></html>
+"""
+
+# Post pages carry the media in the same JSON envelope as Instagram's
+POST_PAGE = """<!doctype html>
+<html><head><title>Reel</title></head>
+<body>
+<main><video></video></main>
+<script type="application/json">{payload}</script>
+</body></html>
+"""
+
+
+def _seed(username: str) -> int:
+    return int(hashlib.sha1(username.encode('utf-8')).hexdigest()[:8], 16)
+
+
+def user_id(username: str) -> str:
+    return str(_seed(username))
+
+
+def media_id_to_shortcode(media_id: int) -> str:
+    code = ""
+    while media_id:
+        media_id, digit = divmod(media_id, 64)
+        code = SHORTCODE_ALPHABET[digit] + code
+    return code or SHORTCODE_ALPHABET[0]
+
+
+def shortcode_to_media_id(shortcode: str) -> Optional[int]:
+    media_id = 0
+    for char in shortcode:
+        digit = SHORTCODE_ALPHABET.find(char)
+        if digit < 0:
+            return None
+        media_id = media_id * 64 + digit
+    return media_id
+
+
+def make_reels(username: str, count: int):
+    """The same count reels for username on every call, newest first"""
+    rng = random.Random(_seed(username))
+    now = 1750000000
+    reels = []
+    for i in range(count):
+        pk = _seed(username) * POSTS_PER_SEED + i
+        reels.append({
+            "code": media_id_to_shortcode(pk),
+            "pk": str(pk),
+            "like_count": rng.randint(0, 50000),
+            "comment_count": rng.randint(0, 2000),
+            "play_count": rng.randint(0, 1000000),
+            "taken_at": now - i * 86400 - rng.randint(0, 3600),
+            "video_duration": round(rng.uniform(5, 90), 3),
+            "original_width": 1080,
+            "original_height": 1920,
+            "number_of_qualities": rng.randint(1, 5),
+            "media_type": 2,
+            "product_type": "clips",
+            "owner": {"username": username, "id": user_id(username)},
+        })
+    return reels
+
+
+class FakeInstagram:
+    """Throttling and latency knobs shared by all request handlers"""
+
+    def __init__(self, reels_per_user: int = 50, throttle_rps: float = 0, throttle_prob: float = 0,
+                 latency_ms: float = 0):
+        self.reels_per_user = reels_per_user
+        self.throttle_rps = throttle_rps
+        self.throttle_prob = throttle_prob
+        self.latency_ms = latency_ms
+        self.usernames: Dict[str, str] = {}
+        self.counts = {"requests": 0, "throttled": 0}
+        self._recent = deque()
+        self._lock = threading.Lock()
+
+    def should_throttle(self) -> bool:
+        with self._lock:
+            now = time.monotonic()
+            self.counts["requests"] += 1
+            while self._recent and now - self._recent[0] > 1:
+                self._recent.popleft()
+            self._recent.append(now)
+            throttled = (
+                (self.throttle_rps and len(self._recent) > self.throttle_rps)
+                or (self.throttle_prob and random.random() < self.throttle_prob)
+            )
+            if throttled:
+                self.counts["throttled"] += 1
+            return bool(throttled)
+
+    def register(self, username: str):
+        """Make username's posts resolvable by media id and shortcode"""
+        with self._lock:
+            self.usernames[user_id(username)] = username
+
+    def media(self, media_id: int) -> Optional[Dict[str, Any]]:
+        username = self.usernames.get(str(media_id // POSTS_PER_SEED))
+        index = media_id % POSTS_PER_SEED
+        if username is None or index >= self.reels_per_user:
+            return None
+        return make_reels(username, index + 1)[index]
+
+    def profile(self, username: str) -> Tuple[int, Dict[str, Any]]:
+        if username.startswith("missing"):
+            return 404, {"status": "fail", "message": "User not found"}
+        self.register(username)
+        return 200, {"data": {"user": {"id": user_id(username), "username": username}}, "status": "ok"}
+
+    def profile_page(self, username: str) -> Tuple[int, str]:
+        if username.startswith("missing"):
+            return 404, NOT_FOUND_PAGE
+        self.register(username)
+        return 200, PROFILE_PAGE.format(username=username, user_id=user_id(username), page_size=GRID_PAGE_SIZE)
+
+    def post_query(self, form: Dict[str, str]) -> Tuple[int, Dict[str, Any]]:
+        """The post page's GraphQL query: the post as a GraphQL node, null if there is none"""
+        try:
+            shortcode = json.loads(form.get("variables") or "{}").get("shortcode") or ""
+        except ValueError:
+            return 400, {"status": "fail", "message": "Invalid variables"}
+        media_id = shortcode_to_media_id(shortcode) if shortcode else None
+        media = self.media(media_id) if media_id is not None else None
+        node = None
+        if media is not None:
+            node = {
+                "__typename": "XDTGraphVideo",
+                "id": media["pk"],
+                "shortcode": media["code"],
+                "is_video": True,
+                "video_view_count": media["play_count"],
+                "edge_media_preview_like": {"count": media["like_count"]},
+                "edge_media_to_comment": {"count": media["comment_count"]},
+                "taken_at_timestamp": media["taken_at"],
+                "video_duration": media["video_duration"],
+                "dimensions": {"width": media["original_width"], "height": media["original_height"]},
+                "owner": media["owner"],
+            }
+        return 200, {"data": {"xdt_shortcode_media": node}, "status": "ok"}
+
+    def post_page(self, shortcode: str) -> Tuple[int, str]:
+        media_id = shortcode_to_media_id(shortcode)
+        media = self.media(media_id) if media_id is not None else None
+        if media is None:
+            return 404, NOT_FOUND_PAGE
+        payload = {"xdt_api__v1__media__shortcode__web_info": {"items": [media]}}
+        return 200, POST_PAGE.format(payload=json.dumps(payload).replace("</", "<\\/"))
+
+    def clips(self, form: Dict[str, str]) -> Tuple[int, Dict[str, Any]]:
+        username = self.usernames.get(form.get("target_user_id", ""))
+        if username is None:
+            return 400, {"status": "fail", "message": "Unknown user"}
+        start = int(form.get("max_id") or 0)
+        page_size = int(form.get("page_size") or PAGE_SIZE)
+        reels = make_reels(username, self.reels_per_user)
+        page = reels[start:start + page_size]
+        more = start + page_size < len(reels)
+        return 200, {
+            "items": [{"media": media} for media in page],
+            "paging_info": {"more_available": more, "max_id": str(start + page_size) if more else None},
+            "status": "ok",
+        }
+
+
+class FakeInstagramHandler(BaseHTTPRequestHandler):
+    server_version = "FakeInstagram/1.0"
+
+    @property
+    def fake(self) -> FakeInstagram:
+        return self.server.fake
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        if url.path.rstrip('/') == "/api/v1/users/web_profile_info":
+            username = parse_qs(url.query).get("username", [""])[0]
+            self._respond(lambda: self.fake.profile(username))
+        elif POST_PATH.match(url.path):
+            shortcode = POST_PATH.match(url.path).group("shortcode")
+            self._respond(lambda: self.fake.post_page(shortcode))
+        elif PROFILE_PATH.match(url.path):
+            username = PROFILE_PATH.match(url.path).group("username")
+            self._respond(lambda: self.fake.profile_page(username))
+        else:
+            self._send(404, {"status": "fail", "message": "Not found"})
+
+    def do_POST(self):
+        url = urlparse(self.path)
+        length = int(self.headers.get("Content-Length") or 0)
+        form = {k: v[0] for k, v in parse_qs(self.rfile.read(length).decode('utf-8')).items()}
+        if url.path.rstrip('/') == "/api/v1/clips/user":
+            self._respond(lambda: self.fake.clips(form))
+        elif url.path.rstrip('/') == "/graphql/query":
+            self._respond(lambda: self.fake.post_query(form))
+        else:
+            self._send(404, {"status": "fail", "message": "Not found"})
+
+    def _respond(self, handler):
+        if self.fake.latency_ms:
+            time.sleep(self.fake.latency_ms / 1000)
+        if self.fake.should_throttle():
+            self._send(429, {"status": "fail", "message": "Please wait a few minutes before you try again."})
+            return
+        status, body = handler()
+        self._send(status, body)
+
+    def _send(self, status: int, body: Union[Dict[str, Any], str]):
+        if isinstance(body, str):
+            data, content_type = body.encode('utf-8'), "text/html; charset=utf-8"
+        else:
+            data, content_type = json.dumps(body).encode('utf-8'), "application/json"
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(data)))
+        self.send_header("Set-Cookie", "csrftoken=fakecsrftoken; Path=/")
+        self.end_headers()
+        self.wfile.write(data)
+
+
+def start_fake_instagram(port: int = 0, fake: Optional[FakeInstagram] = None) -> Tuple[ThreadingHTTPServer, str]:
+    """Serve a FakeInstagram on a background thread, returning (server, base_url)"""
+    server = ThreadingHTTPServer(("127.0.0.1", port), FakeInstagramHandler)
+    server.daemon_threads = True
+    server.fake = fake or FakeInstagram()
+    threading.Thread(target=server.serve_forever, name="fake-instagram", daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fake Instagram API for local load and throttling tests")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--reels-per-user", type=int, default=50)
+    parser.add_argument("--throttle-rps", type=float, default=0, help="answer 429 above this many requests per second")
+    parser.add_argument("--throttle-prob", type=float, default=0, help="answer 429 at random with this probability")
+    parser.add_argument("--latency-ms", type=float, default=0, help="delay added to every response")
+    args = parser.parse_args()
+
+    fake = FakeInstagram(args.reels_per_user, args.throttle_rps, args.throttle_prob, args.latency_ms)
+    server, base_url = start_fake_instagram(args.port, fake)
+    print(f"🧪 Fake Instagram listening on {base_url}")
+    try:
+        while True:
+            time.sleep(10)
+            print(f"📊 {fake.counts['requests']} requests, {fake.counts['throttled']} throttled")
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+"""Local stand-in HTTP proxy that can fail or slow down on purpose.
+
+Forwards plain-HTTP requests (absolute-URI form, as requests sends them to
+an http:// proxy), which is enough for benchmarks/fake_instagram.py.
+
+    python benchmarks/fake_proxy.py --port 9001 --fail-rate 0.5 --latency-ms 200
+"""
+import argparse
+import random
+import threading
+import time
+import urllib.error
+import urllib.request
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Tuple
+
+HOP_BY_HOP = {"connection", "keep-alive", "proxy-connection", "proxy-authorization", "transfer-encoding", "upgrade"}
+
+
+class FakeProxyHandler(BaseHTTPRequestHandler):
+    server_version = "FakeProxy/1.0"
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        self._forward()
+
+    def do_POST(self):
+        self._forward()
+
+    def _forward(self):
+        server = self.server
+        with server.lock:
+            server.counts["requests"] += 1
+        if server.latency_ms:
+            time.sleep(server.latency_ms / 1000)
+        if random.random() < server.fail_rate:
+            with server.lock:
+                server.counts["failed"] += 1
+            self.send_error(502, "Bad Gateway (injected)")
+            return
+
+        length = int(self.headers.get("Content-Length") or 0)
+        body = self.rfile.read(length) if length else None
+        headers = {k: v for k, v in self.headers.items() if k.lower() not in HOP_BY_HOP and k.lower() != "host"}
+        upstream = urllib.request.Request(self.path, data=body, headers=headers, method=self.command)
+        try:
+            with urllib.request.urlopen(upstream, timeout=30) as response:
+                status, response_headers, data = response.status, response.getheaders(), response.read()
+        except urllib.error.HTTPError as e:
+            status, response_headers, data = e.code, e.headers.items(), e.read()
+        except OSError as e:
+            self.send_error(502, f"Upstream error: {e}")
+            return
+
+        self.send_response(status)
+        for key, value in response_headers:
+            if key.lower() not in HOP_BY_HOP and key.lower() != "content-length":
+                self.send_header(key, value)
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+
+def start_fake_proxy(port: int = 0, fail_rate: float = 0, latency_ms: float = 0) -> Tuple[ThreadingHTTPServer, str]:
+    """Serve a fake proxy on a background thread, returning (server, 'host:port')"""
+    server = ThreadingHTTPServer(("127.0.0.1", port), FakeProxyHandler)
+    server.daemon_threads = True
+    server.fail_rate = fail_rate
+    server.latency_ms = latency_ms
+    server.counts = {"requests": 0, "failed": 0}
+    server.lock = threading.Lock()
+    threading.Thread(target=server.serve_forever, name="fake-proxy", daemon=True).start()
+    return server, f"127.0.0.1:{server.server_address[1]}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local HTTP proxy with injected failures and latency")
+    parser.add_argument("--port", type=int, default=9001)
+    parser.add_argument("--fail-rate", type=float, default=0, help="fraction of requests answered with 502")
+    parser.add_argument("--latency-ms", type=float, default=0, help="delay added to every request")
+    args = parser.parse_args()
+
+    server, address = start_fake_proxy(args.port, args.fail_rate, args.latency_ms)
+    print(f"🧪 Fake proxy listening on {address}")
+    try:
+        while True:
+            time.sleep(10)
+            print(f"📊 {server.counts['requests']} requests, {server.counts['failed']} failed")
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,350 @@
+import asyncio
+import atexit
+import concurrent.futures
+import logging
+import os
+import threading
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import Any, Awaitable, Deque, Dict, Optional
+
+from playwright.async_api import async_playwright, Browser, BrowserContext
+
+from proxy_pool import ProxyPool, get_proxy_pool, playwright_proxy
+
+logger = logging.getLogger(__name__)
+
+CHROMIUM_LAUNCH_ARGS = [
+    '--no-sandbox',
+    '--disable-setuid-sandbox',
+    '--disable-dev-shm-usage',
+    '--disable-accelerated-2d-canvas',
+    '--no-first-run',
+    '--no-zygote',
+    '--disable-gpu'
+]
+
+# How often a borrower re-checks for an idle context while the full pool has none
+CHECKOUT_POLL_INTERVAL = 0.05
+
+USER_AGENT = 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36'
+
+
+class BrowserPool:
+    """Long-lived Chromium process with a pool of warm, isolated BrowserContexts.
+
+    The browser and its contexts live on one event loop. Async callers on that
+    loop use `context()` directly; synchronous callers (Flask handlers) start the
+    pool on a dedicated thread with `start_background()` and submit coroutines
+    through `run()`.
+
+    There are never more than `size` contexts. With a proxy pool,
+    `context(key)` borrows one routed through the proxy the pool picks for
+    key. The pool starts with `size` contexts spread over the first proxies,
+    and creates contexts for other proxies on demand. When the pool is full,
+    it retires an idle context of another proxy to make room.
+    """
+
+    def __init__(self, size: Optional[int] = None, acquire_timeout: Optional[float] = None,
+                 health_interval: Optional[float] = None, max_context_uses: Optional[int] = None,
+                 proxy_pool: Optional[ProxyPool] = None):
+        self.size = size or int(os.getenv('PLAYWRIGHT_POOL_SIZE', 3))
+        self.acquire_timeout = acquire_timeout or float(os.getenv('PLAYWRIGHT_POOL_ACQUIRE_TIMEOUT', 30))
+        self.health_interval = health_interval or float(os.getenv('PLAYWRIGHT_HEALTH_INTERVAL', 30))
+        self.max_context_uses = max_context_uses or int(os.getenv('PLAYWRIGHT_CONTEXT_MAX_USES', 50))
+        self.proxy_pool = proxy_pool
+        self.proxies = proxy_pool.proxies if proxy_pool is not None else [None]
+
+        self.loop: Optional[asyncio.AbstractEventLoop] = None
+        self.browser: Optional[Browser] = None
+        self._playwright = None
+        self._thread: Optional[threading.Thread] = None
+        self._idle: Optional[Dict[Optional[str], Deque[BrowserContext]]] = None
+        # One slot per context: borrowers beyond size wait here
+        self._slots: Optional[asyncio.Semaphore] = None
+        # Contexts of the current browser, idle, borrowed or being created
+        self._live = 0
+        self._lock: Optional[asyncio.Lock] = None
+        self._health_task: Optional[asyncio.Task] = None
+        self._context_uses: Dict[int, int] = {}
+        self._context_proxies: Dict[int, Optional[str]] = {}
+        self._generation = 0
+
+        self.launches = 0
+        self.relaunches = 0
+        self.borrowed = 0
+        self.retired = 0
+        self.in_use = 0
+        self.last_health_check: Optional[float] = None
+
+    # ------------------------------------------------------------------
+    # Async API (must run on the pool's event loop)
+    # ------------------------------------------------------------------
+
+    async def start(self):
+        """Launch Chromium and fill the pool with warm contexts"""
+        if self._idle is not None:
+            return
+        self.loop = asyncio.get_running_loop()
+        self._idle = {proxy: deque() for proxy in self.proxies}
+        self._slots = asyncio.Semaphore(self.size)
+        self._lock = asyncio.Lock()
+        self._playwright = await async_playwright().start()
+        await self._launch()
+        self._health_task = asyncio.create_task(self._health_loop())
+
+    async def close(self):
+        """Close all contexts, the browser and the Playwright driver"""
+        if self._health_task:
+            self._health_task.cancel()
+            self._health_task = None
+        await self._teardown_browser()
+        if self._playwright:
+            await self._playwright.stop()
+            self._playwright = None
+        self._idle = None
+
+    @asynccontextmanager
+    async def context(self, key: Optional[str] = None):
+        """Borrow a warm BrowserContext, returning it to the pool afterwards"""
+        if self._idle is None:
+            await self.start()
+        await self._ensure_browser()
+
+        proxy = self.proxy_pool.choose(key) if self.proxy_pool is not None else None
+        await asyncio.wait_for(self._slots.acquire(), timeout=self.acquire_timeout)
+        try:
+            context = await self._checkout(proxy)
+        except BaseException:
+            self._slots.release()
+            raise
+        generation = self._generation
+        self.in_use += 1
+        self.borrowed += 1
+        try:
+            yield context
+        finally:
+            self.in_use -= 1
+            try:
+                await self._release(context, generation)
+            finally:
+                self._slots.release()
+
+    def proxy_of(self, context: BrowserContext) -> Optional[str]:
+        """The proxy a borrowed context is routed through"""
+        return self._context_proxies.get(id(context))
+
+    async def check_health(self) -> bool:
+        """Verify the browser is connected, relaunching it if Chromium has died"""
+        self.last_health_check = time.time()
+        await self._ensure_browser()
+        return self.browser is not None and self.browser.is_connected()
+
+    async def _launch(self):
+        launch_options = {}
+        if any(self.proxies):
+            # Chromium only honours per-context proxies when launched with a global one
+            launch_options['proxy'] = {'server': 'http://per-context'}
+        self.browser = await self._playwright.chromium.launch(headless=True, args=CHROMIUM_LAUNCH_ARGS,
+                                                              **launch_options)
+        self.browser.on('disconnected', lambda _: logger.warning("⚠️ Chromium disconnected from browser pool"))
+        self._generation += 1
+        self.launches += 1
+
+        # Contexts from a previous browser are dead; warm up size fresh ones,
+        # round-robin over the proxies (the rest get contexts on demand)
+        self._context_uses.clear()
+        self._context_proxies.clear()
+        for idle in self._idle.values():
+            idle.clear()
+        self._live = 0
+        for i in range(self.size):
+            proxy = self.proxies[i % len(self.proxies)]
+            self._live += 1
+            try:
+                self._idle[proxy].append(await self._new_context(proxy))
+            except Exception:
+                self._live -= 1
+                raise
+
+        egresses = min(self.size, len(self.proxies))
+        logger.info(f"🌐 Browser pool ready with {self._live} contexts over {egresses} of {len(self.proxies)} "
+                    f"egress(es) (launch #{self.launches})")
+
+    async def _checkout(self, proxy: Optional[str]) -> BrowserContext:
+        """An idle context for proxy, creating one within the size cap.
+
+        Callers hold a slot, so at most size - 1 contexts are borrowed by
+        others and a full pool normally has an idle context to retire. While
+        contexts are still being created or reset (e.g. during a relaunch)
+        there may be none; then wait for one to land, up to acquire_timeout.
+        """
+        deadline = time.monotonic() + self.acquire_timeout
+        while True:
+            idle = self._idle[proxy]
+            if idle:
+                return idle.popleft()
+            if self._live < self.size:
+                break
+            other = next((contexts for contexts in self._idle.values() if contexts), None)
+            if other is not None:
+                await self._retire(other.popleft())
+                break
+            if time.monotonic() >= deadline:
+                raise asyncio.TimeoutError(f"No browser context became idle within {self.acquire_timeout:g}s")
+            await asyncio.sleep(CHECKOUT_POLL_INTERVAL)
+        self._live += 1
+        try:
+            return await self._new_context(proxy)
+        except BaseException:
+            self._live -= 1
+            raise
+
+    async def _retire(self, context: BrowserContext):
+        """Close an idle context to free its slot for another proxy"""
+        self._live -= 1
+        self.retired += 1
+        self._context_uses.pop(id(context), None)
+        self._context_proxies.pop(id(context), None)
+        try:
+            await context.close()
+        except Exception as e:
+            logger.warning(f"⚠️ Error closing retired browser context: {e}")
+
+    async def _new_context(self, proxy: Optional[str] = None) -> BrowserContext:
+        options = {'user_agent': USER_AGENT}
+        if proxy is not None:
+            options['proxy'] = playwright_proxy(proxy)
+        context = await self.browser.new_context(**options)
+        self._context_uses[id(context)] = 0
+        self._context_proxies[id(context)] = proxy
+        return context
+
+    async def _ensure_browser(self):
+        if self.browser is not None and self.browser.is_connected():
+            return
+        async with self._lock:
+            if self.browser is not None and self.browser.is_connected():
+                return
+            logger.warning("♻️ Chromium is not running, relaunching browser pool")
+            await self._teardown_browser()
+            await self._launch()
+            self.relaunches += 1
+
+    async def _release(self, context: BrowserContext, generation: int):
+        if generation != self._generation:
+            # Borrowed from a browser that has since been relaunched
+            return
+
+        uses = self._context_uses.pop(id(context), 0) + 1
+        proxy = self._context_proxies.pop(id(context), None)
+        try:
+            if uses >= self.max_context_uses:
+                await context.close()
+                context = await self._new_context(proxy)
+            else:
+                for page in list(context.pages):
+                    await page.close()
+                await context.clear_cookies()
+                self._context_uses[id(context)] = uses
+                self._context_proxies[id(context)] = proxy
+        except Exception as e:
+            logger.warning(f"⚠️ Could not reset browser context, replacing it: {e}")
+            try:
+                context = await self._new_context(proxy)
+            except Exception as e:
+                logger.error(f"❌ Could not create replacement browser context: {e}")
+                self._live -= 1
+                return
+
+        self._idle[proxy].append(context)
+
+    async def _teardown_browser(self):
+        if self.browser is None:
+            return
+        try:
+            await self.browser.close()
+        except Exception as e:
+            logger.warning(f"⚠️ Error closing Chromium: {e}")
+        self.browser = None
+
+    async def _health_loop(self):
+        while True:
+            await asyncio.sleep(self.health_interval)
+            try:
+                await self.check_health()
+            except Exception as e:
+                logger.error(f"❌ Browser pool health check failed: {e}")
+
+    # ------------------------------------------------------------------
+    # Thread bridge for synchronous callers
+    # ------------------------------------------------------------------
+
+    def start_background(self):
+        """Run the pool on its own event loop thread"""
+        if self._thread is not None:
+            return
+        self.loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self.loop.run_forever, name="browser-pool", daemon=True)
+        self._thread.start()
+        asyncio.run_coroutine_threadsafe(self.start(), self.loop).result()
+
+    def run(self, coro: Awaitable[Any], timeout: Optional[float] = None) -> Any:
+        """Run a coroutine on the pool's loop and block for its result"""
+        future = asyncio.run_coroutine_threadsafe(coro, self.loop)
+        try:
+            return future.result(timeout)
+        except concurrent.futures.TimeoutError:
+            future.cancel()
+            raise
+
+    def shutdown(self):
+        """Close the pool and stop its background loop"""
+        if self._thread is None:
+            return
+        try:
+            asyncio.run_coroutine_threadsafe(self.close(), self.loop).result(timeout=10)
+        except Exception as e:
+            logger.warning(f"⚠️ Error shutting down browser pool: {e}")
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self._thread.join(timeout=5)
+        self._thread = None
+
+    def stats(self) -> Dict[str, Any]:
+        """Pool statistics for the status endpoint"""
+        return {
+            "size": self.size,
+            "contexts": self._live,
+            "proxies": len(self.proxies),
+            "idle": sum(len(idle) for idle in self._idle.values()) if self._idle is not None else 0,
+            "in_use": self.in_use,
+            "borrowed_total": self.borrowed,
+            "retired_total": self.retired,
+            "launches": self.launches,
+            "relaunches": self.relaunches,
+            "browser_connected": bool(self.browser and self.browser.is_connected()),
+            "last_health_check": self.last_health_check,
+        }
+
+
+_pool: Optional[BrowserPool] = None
+_pool_lock = threading.Lock()
+
+
+def get_browser_pool() -> BrowserPool:
+    """Return the process-wide browser pool, starting it on first use"""
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                pool = BrowserPool(proxy_pool=get_proxy_pool())
+                pool.start_background()
+                atexit.register(pool.shutdown)
+                _pool = pool
+    return _pool
+
+
+def browser_pool_stats() -> Optional[Dict[str, Any]]:
+    """Stats of the process-wide pool, or None if it has not been started"""
+    return _pool.stats() if _pool is not None else None
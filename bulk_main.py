@@ -1,86 +1,96 @@
 import pandas as pd
+import argparse
 import json
-import re
-from typing import List, Dict, Any, Optional
+import os
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from openpyxl import load_workbook
+from typing import List, Dict, Any, Optional, Iterator, Tuple
 from reelscraper import ReelScraper, ReelMultiScraper
 from reelscraper.utils import LoggerManager
 from reelscraper.utils.database import DBManager
+from reel_index import ReelIndex
+from checkpoint import CheckpointJournal
+from adaptive_scheduler import AdaptiveScheduler
+from proxy_pool import get_proxy_pool
+# Re-exported: the matching helpers used to live here
+from matching import SHORTCODE_PATTERNS, extract_shortcode_from_url, build_matched_post, match_posts_with_targets
+from matching import parse_fields, project_matched_posts
+from encoding import encode_json
 
 # Configure logger and optional DB manager
 logger = LoggerManager()
 db_manager = DBManager(db_url="sqlite:///myreels.db")
 
-# Create a single scraper instance
-single_scraper = ReelScraper(timeout=30, proxy=None, logger_manager=logger)
+# Shortcode index shared with the API servers, so bulk scrapes are kept
+reel_index = ReelIndex()
 
-# MultiScraper for concurrency, database integration, and auto-logging
+# Proxies from SCRAPER_PROXIES / SCRAPER_PROXY_FILE / SCRAPER_PROXY, or a direct connection
+proxy_pool = get_proxy_pool()
+
+# One scraper per proxy; accounts stick to a proxy while it stays healthy
+scrapers = {proxy: ReelScraper(timeout=30, proxy=proxy, logger_manager=logger) for proxy in proxy_pool.proxies}
+single_scraper = scrapers[proxy_pool.proxies[0]]
+
+# MultiScraper for concurrency, database integration, and auto-logging (single proxy only)
 multi_scraper = ReelMultiScraper(
     single_scraper,
     max_workers=5,
     db_manager=None,
 )
 
-def extract_shortcode_from_url(url: str) -> Optional[str]:
-    """Extract shortcode from Instagram post/reel URL"""
-    if not url:
-        return None
-    
-    # Patterns to match Instagram post/reel URLs
-    patterns = [
-        r'/reel/([^/?]+)',
-        r'/p/([^/?]+)',
-        r'reel/([^/?]+)',
-        r'p/([^/?]+)',
-        r'instagram\.com/reel/([^/?]+)',
-        r'instagram\.com/p/([^/?]+)'
+def extract_shortcodes(links: pd.Series) -> pd.Series:
+    """Vectorized extract_shortcode_from_url over a Series of links (NaN where none)"""
+    links = links.astype(str)
+    shortcodes = links.str.extract(SHORTCODE_PATTERNS[0], expand=False)
+    for pattern in SHORTCODE_PATTERNS[1:]:
+        # Only links no earlier pattern matched need the next one
+        missing = shortcodes.isna()
+        if not missing.any():
+            break
+        shortcodes[missing] = links[missing].str.extract(pattern, expand=False)
+    return shortcodes
+
+def match_posts_frame(targets: pd.DataFrame, scraped_reels: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Match all scraped reels against all target rows with a single join.
+
+    targets needs username and post_link columns. Produces the same records,
+    in the same order, as running match_posts_with_targets per username:
+    usernames sorted, reels in scrape order, and the last link wins when a
+    user lists the same shortcode twice.
+    """
+    if targets.empty or not scraped_reels:
+        return []
+
+    target_frame = pd.DataFrame({
+        'username': targets['username'].to_numpy(),
+        'shortcode': extract_shortcodes(targets['post_link']).to_numpy(),
+        'target_link': targets['post_link'].to_numpy(),
+    }).dropna(subset=['shortcode'])
+    target_frame = target_frame.drop_duplicates(subset=['username', 'shortcode'], keep='last')
+
+    reel_frame = pd.DataFrame({
+        'username': [reel.get('username') for reel in scraped_reels],
+        'shortcode': [reel.get('shortcode') for reel in scraped_reels],
+        'position': range(len(scraped_reels)),
+    }).dropna(subset=['username', 'shortcode'])
+    reel_frame = reel_frame[reel_frame['shortcode'] != '']
+
+    joined = reel_frame.merge(target_frame, on=['username', 'shortcode'], how='inner')
+    joined = joined.sort_values(['username', 'position'], kind='stable')
+
+    return [
+        build_matched_post(scraped_reels[position], target_link)
+        for position, target_link in zip(joined['position'].tolist(), joined['target_link'].tolist())
     ]
-    
-    for pattern in patterns:
-        match = re.search(pattern, url)
-        if match:
-            return match.group(1)
-    
-    return None
-
-def match_posts_with_targets(scraped_reels: List[Dict[str, Any]], target_links: List[str]) -> List[Dict[str, Any]]:
-    """Match scraped reels with target post links based on shortcode"""
-    matched_posts = []
-    
-    # Extract shortcodes from target links
-    target_shortcodes = {}
-    for link in target_links:
-        shortcode = extract_shortcode_from_url(link)
-        if shortcode:
-            target_shortcodes[shortcode] = link
-    
-    print(f"🔍 Looking for {len(target_shortcodes)} target shortcodes: {list(target_shortcodes.keys())}")
-    
-    # Match scraped reels with target shortcodes
-    for reel in scraped_reels:
-        reel_shortcode = reel.get('shortcode')
-        if reel_shortcode and reel_shortcode in target_shortcodes:
-            matched_post = {
-                'username': reel.get('username'),
-                'target_link': target_shortcodes[reel_shortcode],
-                'matched_post_data': {
-                    'url': reel.get('url'),
-                    'shortcode': reel.get('shortcode'),
-                    'likes': reel.get('likes', 0),
-                    'comments': reel.get('comments', 0),
-                    'views': reel.get('views', 0),
-                    'posted_time': reel.get('posted_time', 0),
-                    'video_duration': reel.get('video_duration', 0.0),
-                    'dimensions': reel.get('dimensions', {}),
-                    'numbers_of_qualities': reel.get('numbers_of_qualities', 1)
-                }
-            }
-            matched_posts.append(matched_post)
-            print(f"✅ Matched: {reel_shortcode} for user {reel.get('username')}")
-    
-    return matched_posts
-
-def process_excel_input(excel_file_path: str, max_posts_per_profile: int = 10) -> List[Dict[str, Any]]:
-    """Process Excel file and return matched posts data"""
+
+def process_excel_input(excel_file_path: str, max_posts_per_profile: int = 10,
+                        journal: Optional[CheckpointJournal] = None,
+                        scheduler: Optional[AdaptiveScheduler] = None) -> List[Dict[str, Any]]:
+    """Process Excel file and return matched posts data.
+
+    With a journal, accounts finished by an earlier run are not scraped again.
+    With a scheduler, accounts are scraped under its adaptive rate limit.
+    """
     try:
         # Read Excel file
         df = pd.read_excel(excel_file_path)
@@ -104,36 +114,41 @@ def process_excel_input(excel_file_path: str, max_posts_per_profile: int = 10) -
         
         print(f"👥 Found {len(username_groups)} unique usernames")
         
-        # Create temporary accounts file for scraping
-        temp_accounts_file = "temp_accounts.txt"
-        with open(temp_accounts_file, 'w', encoding='utf-8') as f:
-            for username in username_groups.keys():
-                f.write(f"{username}\n")
+        if journal is not None or scheduler is not None or len(scrapers) > 1:
+            print("🚀 Starting to scrape accounts...")
+            all_reels = scrape_accounts_concurrently(list(username_groups.keys()), max_posts_per_profile,
+                                                     journal, scheduler)
+            print(f"📹 Scraped {len(all_reels)} total reels")
+        else:
+            # Create temporary accounts file for scraping
+            temp_accounts_file = "temp_accounts.txt"
+            with open(temp_accounts_file, 'w', encoding='utf-8') as f:
+                for username in username_groups.keys():
+                    f.write(f"{username}\n")
+        
+            # Scrape accounts concurrently
+            print("🚀 Starting to scrape accounts...")
+            all_reels = multi_scraper.scrape_accounts(
+                accounts_file=temp_accounts_file,
+                max_posts_per_profile=max_posts_per_profile,
+                max_retires_per_profile=10
+            )
         
-        # Scrape accounts concurrently
-        print("🚀 Starting to scrape accounts...")
-        all_reels = multi_scraper.scrape_accounts(
-            accounts_file=temp_accounts_file,
-            max_posts_per_profile=max_posts_per_profile,
-            max_retires_per_profile=10
-        )
+            if all_reels is None:
+                print("❌ No reels returned from scraper")
+                return []
         
-        if all_reels is None:
-            print("❌ No reels returned from scraper")
-            return []
+            print(f"📹 Scraped {len(all_reels)} total reels")
         
-        print(f"📹 Scraped {len(all_reels)} total reels")
+            # Keep every scraped reel in the shortcode index
+            reels_by_username = {}
+            for reel in all_reels:
+                reels_by_username.setdefault(reel.get('username'), []).append(reel)
+            indexed = sum(reel_index.upsert(username, reels) for username, reels in reels_by_username.items() if username)
+            print(f"📚 Indexed {indexed} reels")
         
-        # Match posts with target links
-        all_matched_posts = []
-        for username, target_links in username_groups.items():
-            # Filter reels for this username
-            user_reels = [reel for reel in all_reels if reel.get('username') == username]
-            print(f"🔍 Processing {len(user_reels)} reels for {username}")
-            
-            # Match with target links
-            matched_posts = match_posts_with_targets(user_reels, target_links)
-            all_matched_posts.extend(matched_posts)
+        # Match posts with target links in one join over all users
+        all_matched_posts = match_posts_frame(df, all_reels)
         
         print(f"✅ Total matched posts: {len(all_matched_posts)}")
         return all_matched_posts
@@ -142,41 +157,289 @@ def process_excel_input(excel_file_path: str, max_posts_per_profile: int = 10) -
         print(f"❌ Error processing Excel file: {str(e)}")
         return []
 
-def save_results_to_json(matched_posts: List[Dict[str, Any]], output_file: str = "matched_posts.json"):
-    """Save matched posts data to JSON file"""
+def iter_target_chunks(excel_file_path: str, chunk_size: int = 100) -> Iterator[Dict[str, List[str]]]:
+    """Read the Excel file row by row, yielding {username: [post_link, ...]} chunks.
+
+    Each chunk holds at most chunk_size usernames. Rows of one username are
+    expected to be close together; a username that shows up again after its
+    chunk was yielded is processed again with the later links.
+    """
+    workbook = load_workbook(excel_file_path, read_only=True, data_only=True)
     try:
-        with open(output_file, 'w', encoding='utf-8') as f:
-            json.dump(matched_posts, f, ensure_ascii=False, indent=2)
+        rows = workbook.active.iter_rows(values_only=True)
+        header = [str(cell).strip() if cell is not None else '' for cell in next(rows, ())]
+
+        required_columns = ['username', 'post_link']
+        missing_columns = [col for col in required_columns if col not in header]
+        if missing_columns:
+            raise ValueError(f"Missing required columns: {missing_columns}")
+        username_col = header.index('username')
+        link_col = header.index('post_link')
+
+        chunk: Dict[str, List[str]] = {}
+        for row in rows:
+            username = row[username_col] if username_col < len(row) else None
+            post_link = row[link_col] if link_col < len(row) else None
+            if username is None or post_link is None:
+                continue
+            username, post_link = str(username).strip(), str(post_link).strip()
+
+            if username not in chunk and len(chunk) >= chunk_size:
+                yield chunk
+                chunk = {}
+            chunk.setdefault(username, []).append(post_link)
+
+        if chunk:
+            yield chunk
+    finally:
+        workbook.close()
+
+def scrape_account(username: str, max_posts_per_profile: int, journal: Optional[CheckpointJournal] = None,
+                   scheduler: Optional[AdaptiveScheduler] = None) -> Tuple[List[Dict[str, Any]], bool]:
+    """Scrape and index one account, or read its reels back from the journal.
+
+    Returns (reels, resumed). Outcomes are journaled so a rerun can skip the
+    account. With a scheduler, retries are left to its backoff instead of
+    reelscraper's immediate ones.
+    """
+    if journal is not None and journal.is_done(username, max_posts_per_profile):
+        return journal.load_reels(username), True
+
+    try:
+        if scheduler is not None:
+            reels = scheduler.call(username, lambda: proxy_pool.call(
+                username, lambda proxy: scrapers[proxy].get_user_reels(username, max_posts=max_posts_per_profile, max_retries=1)
+            ))
+        else:
+            reels = proxy_pool.call(username, lambda proxy: scrapers[proxy].get_user_reels(
+                username, max_posts=max_posts_per_profile, max_retries=10))
+    except Exception as e:
+        if journal is not None:
+            journal.record_failure(username, max_posts_per_profile, str(e))
+        raise
+    reel_index.upsert(username, reels)
+    if journal is not None:
+        journal.record_success(username, max_posts_per_profile, reels)
+    return reels, False
+
+def scrape_and_match_account(username: str, target_links: List[str], max_posts_per_profile: int,
+                             journal: Optional[CheckpointJournal] = None,
+                             scheduler: Optional[AdaptiveScheduler] = None) -> Tuple[int, List[Dict[str, Any]], bool]:
+    """Scrape one account and match its reels, returning (reel count, matched posts, resumed)"""
+    reels, resumed = scrape_account(username, max_posts_per_profile, journal, scheduler)
+    targets = pd.DataFrame({'username': [username] * len(target_links), 'post_link': target_links})
+    return len(reels), match_posts_frame(targets, reels), resumed
+
+def warn_reused(usernames: List[str], journal: CheckpointJournal):
+    """Warn that these accounts' reels came from the journal rather than a fresh scrape"""
+    if usernames:
+        print(f"⚠️ Reused {len(usernames)} accounts from journal {journal.path} instead of scraping them "
+              f"(--refresh USERNAME or --journal-max-age to scrape again): {', '.join(sorted(usernames))}")
+
+def scrape_accounts_concurrently(usernames: List[str], max_posts_per_profile: int,
+                                 journal: Optional[CheckpointJournal] = None,
+                                 scheduler: Optional[AdaptiveScheduler] = None,
+                                 max_workers: int = 5) -> List[Dict[str, Any]]:
+    """Scrape usernames concurrently, skipping accounts the journal already finished"""
+    all_reels = []
+    pending = usernames
+    if journal is not None:
+        pending = [username for username in usernames if not journal.is_done(username, max_posts_per_profile)]
+        for username in usernames:
+            if journal.is_done(username, max_posts_per_profile):
+                all_reels.extend(journal.load_reels(username))
+        print(f"♻️ Resuming: {len(usernames) - len(pending)} accounts already done, {len(pending)} to scrape")
+        scraping = set(pending)
+        warn_reused([username for username in usernames if username not in scraping], journal)
+
+    if scheduler is not None:
+        max_workers = scheduler.max_concurrency
+    with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="bulk") as executor:
+        futures = {executor.submit(scrape_account, username, max_posts_per_profile, journal, scheduler): username
+                   for username in pending}
+        for future in futures:
+            try:
+                reels, _ = future.result()
+                all_reels.extend(reels)
+            except Exception as e:
+                print(f"❌ {futures[future]}: {str(e)}")
+    return all_reels
+
+def process_excel_streaming(excel_file_path: str, output_file: str = "matched_posts.jsonl",
+                            max_posts_per_profile: int = 10, chunk_size: int = 100,
+                            max_workers: int = 5, journal: Optional[CheckpointJournal] = None,
+                            scheduler: Optional[AdaptiveScheduler] = None,
+                            fields: Optional[List[str]] = None) -> Dict[str, Any]:
+    """Scrape and match account by account, appending matched posts to a JSONL file.
+
+    At most max_workers accounts are in flight and each account's reels are
+    dropped once matched, so memory is bounded by concurrency rather than by
+    the size of the input. Accounts the journal already finished are matched
+    from their journaled reels instead of being scraped again, so the output
+    is complete after a resumed run. With a scheduler, its concurrency
+    ceiling replaces max_workers and it decides how many actually run.
+    fields (see parse_fields) limits the keys written for each matched post.
+    Returns a summary of the run.
+    """
+    summary = {'accounts': 0, 'failed': 0, 'resumed': 0, 'reels': 0, 'matched': 0, 'matched_by_username': {}}
+    resumed_usernames = []
+
+    def record(future, username):
+        summary['accounts'] += 1
+        try:
+            reels_count, matched_posts, resumed = future.result()
+        except Exception as e:
+            summary['failed'] += 1
+            print(f"❌ {username}: {str(e)}")
+            return
+        for post in project_matched_posts(matched_posts, fields):
+            out.write(encode_json(post) + b"\n")
+        out.flush()
+        summary['reels'] += reels_count
+        summary['resumed'] += resumed
+        if resumed:
+            resumed_usernames.append(username)
+        summary['matched'] += len(matched_posts)
+        if matched_posts:
+            summary['matched_by_username'][username] = summary['matched_by_username'].get(username, 0) + len(matched_posts)
+        print(f"{'♻️' if resumed else '✅'} {username}: {len(matched_posts)} matched of {reels_count} reels")
+
+    if scheduler is not None:
+        max_workers = scheduler.max_concurrency
+    print(f"🚀 Streaming {excel_file_path} to {output_file} ({max_workers} workers)...")
+    with open(output_file, 'wb') as out, \
+            ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="bulk") as executor:
+        in_flight = {}
+        for chunk in iter_target_chunks(excel_file_path, chunk_size):
+            for username, target_links in chunk.items():
+                # Keep at most max_workers accounts scraping; collect finished ones first
+                while len(in_flight) >= max_workers:
+                    done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        record(future, in_flight.pop(future))
+                future = executor.submit(scrape_and_match_account, username, target_links,
+                                         max_posts_per_profile, journal, scheduler)
+                in_flight[future] = username
+
+        while in_flight:
+            done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+            for future in done:
+                record(future, in_flight.pop(future))
+
+    print(f"✅ Total matched posts: {summary['matched']} "
+          f"({summary['accounts']} accounts, {summary['resumed']} resumed, {summary['failed']} failed)")
+    if journal is not None:
+        warn_reused(resumed_usernames, journal)
+    return summary
+
+def save_results_to_json(matched_posts: List[Dict[str, Any]], output_file: str = "matched_posts.json",
+                         fields: Optional[List[str]] = None, compact: bool = False):
+    """Save matched posts data to JSON file, indented unless compact"""
+    matched_posts = project_matched_posts(matched_posts, fields)
+    try:
+        if compact:
+            with open(output_file, 'wb') as f:
+                f.write(encode_json(matched_posts))
+        else:
+            with open(output_file, 'w', encoding='utf-8') as f:
+                json.dump(matched_posts, f, ensure_ascii=False, indent=2)
         print(f"💾 Results saved to {output_file}")
         return True
     except Exception as e:
         print(f"❌ Error saving results: {str(e)}")
         return False
 
+def print_summary(username_counts: Dict[str, int], total: int):
+    """Print the end-of-run summary"""
+    print(f"\n📊 Summary:")
+    print(f"Total matched posts: {total}")
+    print(f"Users with matched posts: {len(username_counts)}")
+    for username, count in username_counts.items():
+        print(f"  - {username}: {count} posts")
+
 # Main execution
 if __name__ == "__main__":
-    # Excel file path - update this to your input file
-    excel_file_path = "input.xlsx"
-    
-    # Process the Excel file
-    matched_posts = process_excel_input(excel_file_path, max_posts_per_profile=10)
-    
-    if matched_posts:
-        # Save results to JSON
-        save_results_to_json(matched_posts)
-        
-        # Print summary
-        print(f"\n📊 Summary:")
-        print(f"Total matched posts: {len(matched_posts)}")
-        
-        # Group by username for summary
-        username_counts = {}
-        for post in matched_posts:
-            username = post['username']
-            username_counts[username] = username_counts.get(username, 0) + 1
-        
-        print(f"Users with matched posts: {len(username_counts)}")
-        for username, count in username_counts.items():
-            print(f"  - {username}: {count} posts")
-    else:
-        print("❌ No matched posts found")
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Scrape Instagram reels for the usernames in an Excel file and match them with target links")
+    parser.add_argument('--input', default="input.xlsx", help="Excel file with username and post_link columns")
+    parser.add_argument('--output', default=None, help="output file (default: matched_posts.json, or matched_posts.jsonl with --stream)")
+    parser.add_argument('--max-posts', type=int, default=10, help="maximum posts to scrape per user")
+    parser.add_argument('--stream', action='store_true', help="scrape and match account by account, appending JSONL as results arrive")
+    parser.add_argument('--chunk-size', type=int, default=100, help="usernames read from the Excel file at a time in stream mode")
+    parser.add_argument('--workers', type=int, default=None, help="accounts scraped concurrently (default: 5; the ceiling in adaptive mode, default SCHEDULER_MAX_CONCURRENCY)")
+    parser.add_argument('--journal', nargs='?', const='', default=None, metavar='PATH', help="resume from a checkpoint journal of finished accounts (PATH defaults to <input>.journal.jsonl)")
+    parser.add_argument('--no-journal', action='store_true', help="scrape every account without a journal, even with --journal (the default)")
+    parser.add_argument('--refresh', nargs='+', default=[], metavar='USERNAME', help="scrape these accounts again even if the journal has them")
+    parser.add_argument('--journal-max-age', type=float, default=24, metavar='HOURS', help="scrape accounts again once their journal entry is older than this (default: 24; 0 never reuses entries)")
+    parser.add_argument('--adaptive', action='store_true', help="pace requests with a token bucket and adapt concurrency to throttling")
+    parser.add_argument('--rate', type=float, default=None, help="requests per second allowed in adaptive mode (default: SCHEDULER_RATE)")
+    parser.add_argument('--fields', default=None, help="comma-separated matched post fields to write, e.g. target_link,shortcode,views (default: all)")
+    parser.add_argument('--compact', action='store_true', help="write the JSON output without indentation")
+    args = parser.parse_args()
+    try:
+        fields = parse_fields(args.fields)
+    except ValueError as e:
+        parser.error(str(e))
+
+    scheduler = None
+    if args.adaptive:
+        scheduler_options = {}
+        if args.rate is not None:
+            scheduler_options['rate'] = args.rate
+        if args.workers is not None:
+            scheduler_options['max_concurrency'] = args.workers
+        scheduler = AdaptiveScheduler(**scheduler_options)
+        for proxy_scraper in scrapers.values():
+            scheduler.instrument(proxy_scraper)
+        scheduler.start_reporter()
+
+    journal = None
+    if args.journal is not None and not args.no_journal:
+        journal_path = args.journal or f"{os.path.splitext(args.input)[0]}.journal.jsonl"
+        journal = CheckpointJournal(journal_path, refresh=args.refresh, max_age=args.journal_max_age * 3600)
+        print(f"📒 Journal {journal_path}: {journal.stats()['done']} accounts done within {args.journal_max_age:g}h"
+              + (f", {journal.compacted} stale or superseded entries dropped" if journal.compacted else ""))
+
+    try:
+        if args.stream:
+            summary = process_excel_streaming(
+                args.input,
+                output_file=args.output or "matched_posts.jsonl",
+                max_posts_per_profile=args.max_posts,
+                chunk_size=args.chunk_size,
+                max_workers=args.workers or 5,
+                journal=journal,
+                scheduler=scheduler,
+                fields=fields
+            )
+            if summary['matched']:
+                print_summary(summary['matched_by_username'], summary['matched'])
+            else:
+                print("❌ No matched posts found")
+        else:
+            # Process the Excel file
+            matched_posts = process_excel_input(args.input, max_posts_per_profile=args.max_posts,
+                                                journal=journal, scheduler=scheduler)
+
+            if matched_posts:
+                # Save results to JSON
+                save_results_to_json(matched_posts, args.output or "matched_posts.json", fields=fields, compact=args.compact)
+
+                # Group by username for summary
+                username_counts = {}
+                for post in matched_posts:
+                    username = post['username']
+                    username_counts[username] = username_counts.get(username, 0) + 1
+                print_summary(username_counts, len(matched_posts))
+            else:
+                print("❌ No matched posts found")
+    finally:
+        if journal is not None:
+            journal.close()
+
+    if scheduler is not None:
+        scheduler.stop_reporter()
+        print(scheduler.summary())
+    if len(scrapers) > 1:
+        for proxy in proxy_pool.stats()['proxies']:
+            print(f"🌍 {proxy['proxy']}: {proxy['requests']} accounts, failure rate {proxy['failure_rate']:.0%}, "
+                  f"{proxy['quarantines']} quarantines")
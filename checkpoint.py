@@ -0,0 +1,134 @@
+import json
+import os
+import threading
+import time
+from typing import List, Dict, Any, Optional, Iterable
+
+DONE = "done"
+FAILED = "failed"
+
+
+class CheckpointJournal:
+    """Append-only JSONL journal of finished accounts for resumable bulk runs.
+
+    Every scraped account is written as one line with its reels (failures
+    with their error), so a rerun can skip it and rebuild its matches from
+    the journal. Only the byte offset of each account's latest entry is kept
+    in memory; reels are read back from disk when needed.
+
+    Entries older than max_age seconds are stale: the account is scraped
+    again so its counts are fresh. On load the file is compacted to the
+    latest fresh entry per account, dropping superseded, stale and partial
+    lines (a line cut short by a crash).
+    """
+
+    def __init__(self, path: str, refresh: Optional[Iterable[str]] = None, max_age: Optional[float] = None):
+        self.path = path
+        self.refresh = {username.strip() for username in refresh or []}
+        self.max_age = max_age
+        self._entries: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+        self.compacted = self._load()
+        self._file = open(self.path, 'ab')
+
+    def is_done(self, username: str, max_posts: int) -> bool:
+        """True if username was scraped recently with at least max_posts and is not being refreshed"""
+        entry = self._entries.get(username)
+        return (
+            entry is not None
+            and entry["status"] == DONE
+            and entry["max_posts"] >= max_posts
+            and not self._is_stale(entry)
+            and username not in self.refresh
+        )
+
+    def load_reels(self, username: str) -> List[Dict[str, Any]]:
+        """Read back the reels journaled for username"""
+        entry = self._entries[username]
+        with open(self.path, 'rb') as f:
+            f.seek(entry["offset"])
+            return json.loads(f.readline())["reels"]
+
+    def record_success(self, username: str, max_posts: int, reels: List[Dict[str, Any]]):
+        self._append(username, {
+            "username": username,
+            "status": DONE,
+            "max_posts": max_posts,
+            "finished_at": time.time(),
+            "reels": reels,
+        })
+
+    def record_failure(self, username: str, max_posts: int, error: str):
+        self._append(username, {
+            "username": username,
+            "status": FAILED,
+            "max_posts": max_posts,
+            "error": error,
+            "finished_at": time.time(),
+        })
+
+    def stats(self) -> Dict[str, int]:
+        statuses = [entry["status"] for entry in self._entries.values()]
+        return {"done": statuses.count(DONE), "failed": statuses.count(FAILED)}
+
+    def close(self):
+        self._file.close()
+
+    def __enter__(self) -> "CheckpointJournal":
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def _is_stale(self, entry: Dict[str, Any]) -> bool:
+        return self.max_age is not None and time.time() - entry["finished_at"] > self.max_age
+
+    def _append(self, username: str, record: Dict[str, Any]):
+        line = (json.dumps(record, ensure_ascii=False) + "\n").encode('utf-8')
+        with self._lock:
+            offset = self._file.tell()
+            self._file.write(line)
+            # Flushed per account so a crash loses at most the account in progress
+            self._file.flush()
+            self._entries[username] = {"status": record["status"], "max_posts": record["max_posts"],
+                                       "finished_at": record["finished_at"], "offset": offset}
+
+    def _load(self) -> int:
+        """Index the journal and compact it, returning the number of lines dropped"""
+        if not os.path.exists(self.path):
+            return 0
+        lines = 0
+        with open(self.path, 'rb') as f:
+            offset = 0
+            for line in f:
+                lines += 1
+                try:
+                    record = json.loads(line)
+                    if line.endswith(b"\n"):
+                        self._entries[record["username"]] = {
+                            "status": record["status"],
+                            "max_posts": record.get("max_posts", 0),
+                            "finished_at": record.get("finished_at", 0),
+                            "offset": offset,
+                        }
+                except (ValueError, KeyError):
+                    pass
+                offset += len(line)
+
+        self._entries = {username: entry for username, entry in self._entries.items() if not self._is_stale(entry)}
+        dropped = lines - len(self._entries)
+        if dropped:
+            self._compact()
+        return dropped
+
+    def _compact(self):
+        """Rewrite the journal with only the indexed entries, in their original order"""
+        entries = sorted(self._entries.values(), key=lambda entry: entry["offset"])
+        tmp_path = f"{self.path}.tmp"
+        with open(self.path, 'rb') as src, open(tmp_path, 'wb') as dst:
+            for entry in entries:
+                src.seek(entry["offset"])
+                line = src.readline()
+                entry["offset"] = dst.tell()
+                dst.write(line)
+        os.replace(tmp_path, self.path)
@@ -0,0 +1,21 @@
+import os
+import sys
+
+import pytest
+
+# The fake Instagram and proxy servers live with the benchmarks that drive them
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "benchmarks"))
+
+from fake_instagram import FakeInstagram, start_fake_instagram  # noqa: E402
+
+
+@pytest.fixture
+def fake_instagram():
+    """A FakeInstagram served on a free local port, as (fake, base_url)"""
+    fake = FakeInstagram()
+    server, base_url = start_fake_instagram(fake=fake)
+    try:
+        yield fake, base_url
+    finally:
+        server.shutdown()
+        server.server_close()
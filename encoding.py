@@ -0,0 +1,78 @@
+import gzip
+import json
+import os
+from typing import Dict, Any, Optional, Tuple
+
+# Optional faster backends: orjson for JSON, zstandard for zstd responses
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+# Responses smaller than this are sent uncompressed
+RESPONSE_COMPRESS_MIN_BYTES = int(os.getenv('RESPONSE_COMPRESS_MIN_BYTES', 1024))
+RESPONSE_GZIP_LEVEL = int(os.getenv('RESPONSE_GZIP_LEVEL', 5))
+RESPONSE_ZSTD_LEVEL = int(os.getenv('RESPONSE_ZSTD_LEVEL', 3))
+
+JSON_BACKEND = "orjson" if orjson is not None else "json"
+# Content codings we can produce, in order of preference
+SUPPORTED_ENCODINGS = ("zstd", "gzip") if zstandard is not None else ("gzip",)
+
+
+def encode_json(obj: Any) -> bytes:
+    """Compact UTF-8 JSON, through orjson when it is installed"""
+    if orjson is not None:
+        # OPT_NON_STR_KEYS matches json.dumps for dicts keyed by ints
+        return orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(obj, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def negotiate_encoding(accept_encoding: str) -> Optional[str]:
+    """Preferred content coding the client accepts, None for identity"""
+    accepted = {}
+    for part in accept_encoding.split(","):
+        coding, _, params = part.strip().partition(";")
+        coding = coding.strip().lower()
+        if not coding:
+            continue
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        accepted[coding] = q
+
+    best, best_q = None, 0.0
+    for coding in SUPPORTED_ENCODINGS:
+        q = accepted.get(coding, accepted.get("*", 0.0))
+        if q > best_q:
+            best, best_q = coding, q
+    return best
+
+
+def compress(body: bytes, coding: str) -> bytes:
+    if coding == "zstd":
+        return zstandard.ZstdCompressor(level=RESPONSE_ZSTD_LEVEL).compress(body)
+    return gzip.compress(body, compresslevel=RESPONSE_GZIP_LEVEL)
+
+
+def encode_body(payload: Any, accept_encoding: str = "") -> Tuple[bytes, Dict[str, str]]:
+    """Encode a JSON response body, compressed if the client accepts it.
+
+    Returns the body and the Content-Encoding / Vary headers to send with it.
+    """
+    body = encode_json(payload)
+    headers = {"Vary": "Accept-Encoding"}
+    if len(body) >= RESPONSE_COMPRESS_MIN_BYTES:
+        coding = negotiate_encoding(accept_encoding)
+        if coding is not None:
+            body = compress(body, coding)
+            headers["Content-Encoding"] = coding
+    return body, headers
@@ -0,0 +1,212 @@
+import contextvars
+import logging
+import math
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor, wait, FIRST_COMPLETED
+from typing import List, Dict, Any, Callable, Deque, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Off unless enabled: the hedge backend (Playwright) needs Chromium next to the primary
+HEDGE_ENABLED = os.getenv('HEDGE_ENABLED', 'False').lower() == 'true'
+# The hedge starts once the primary has run longer than this percentile of its recent latencies
+HEDGE_PERCENTILE = float(os.getenv('HEDGE_PERCENTILE', 0.9))
+HEDGE_MIN_DELAY = float(os.getenv('HEDGE_MIN_DELAY', 0.5))
+HEDGE_MAX_DELAY = float(os.getenv('HEDGE_MAX_DELAY', 10))
+# Delay used until the primary has HEDGE_MIN_SAMPLES latencies
+HEDGE_INITIAL_DELAY = float(os.getenv('HEDGE_INITIAL_DELAY', 3))
+HEDGE_MIN_SAMPLES = int(os.getenv('HEDGE_MIN_SAMPLES', 20))
+# Recent latencies kept per backend
+HEDGE_WINDOW = int(os.getenv('HEDGE_WINDOW', 200))
+HEDGE_MAX_WORKERS = int(os.getenv('HEDGE_MAX_WORKERS', 32))
+
+Reels = List[Dict[str, Any]]
+# Starts a scrape of (username, max_posts) and returns its future
+StartFn = Callable[[str, int], "Future[Reels]"]
+
+
+def percentile(values: List[float], q: float) -> float:
+    """Nearest-rank percentile of values, q in [0, 1]"""
+    ordered = sorted(values)
+    return ordered[max(0, math.ceil(q * len(ordered)) - 1)]
+
+
+class _BackendStats:
+    def __init__(self, name: str):
+        self.name = name
+        self.started = 0
+        self.succeeded = 0
+        self.empty = 0
+        self.failed = 0
+        self.cancelled = 0
+        self.wins = 0
+        self.latencies: Deque[float] = deque(maxlen=HEDGE_WINDOW)
+
+    def to_dict(self, decided: int) -> Dict[str, Any]:
+        latencies = list(self.latencies)
+        return {
+            "started": self.started,
+            "succeeded": self.succeeded,
+            "empty": self.empty,
+            "failed": self.failed,
+            "cancelled": self.cancelled,
+            "wins": self.wins,
+            "win_rate": round(self.wins / decided, 3) if decided else None,
+            "latency_ms_p50": round(percentile(latencies, 0.5) * 1000, 1) if latencies else None,
+            "latency_ms_p90": round(percentile(latencies, 0.9) * 1000, 1) if latencies else None,
+        }
+
+
+class HedgedScraper:
+    """Scrape with a primary backend, hedging with a second one when it is slow or empty.
+
+    The primary starts first. If it hasn't answered within the hedge delay,
+    or answers empty or with an error, the hedge backend starts too and the
+    first non-empty result wins. The loser is cancelled; a scrape already
+    running in a thread can't be interrupted, so its result is discarded.
+
+    The hedge delay is HEDGE_PERCENTILE of the primary's recent latencies
+    (every completed primary scrape counts, including ones that lost), kept
+    within [HEDGE_MIN_DELAY, HEDGE_MAX_DELAY], so the hedge fires for about
+    the slowest (1 - HEDGE_PERCENTILE) of scrapes as the primary speeds up
+    or slows down.
+    """
+
+    def __init__(self, primary: Tuple[str, StartFn], hedge: Tuple[str, StartFn],
+                 percentile: float = HEDGE_PERCENTILE, min_delay: float = HEDGE_MIN_DELAY,
+                 max_delay: float = HEDGE_MAX_DELAY, initial_delay: float = HEDGE_INITIAL_DELAY,
+                 min_samples: int = HEDGE_MIN_SAMPLES):
+        self.primary_name, self._start_primary = primary
+        self.hedge_name, self._start_hedge = hedge
+        self.percentile = percentile
+        self.min_delay = min_delay
+        self.max_delay = max_delay
+        self.initial_delay = initial_delay
+        self.min_samples = min_samples
+        self._lock = threading.Lock()
+        self._backends = {name: _BackendStats(name) for name in (self.primary_name, self.hedge_name)}
+        self.scrapes = 0
+        self.hedged = 0
+        self.hedge_reasons = {"slow": 0, "empty": 0, "error": 0}
+
+    def hedge_delay(self) -> float:
+        """Seconds to wait for the primary before starting the hedge"""
+        with self._lock:
+            latencies = list(self._backends[self.primary_name].latencies)
+        if len(latencies) < self.min_samples:
+            return self.initial_delay
+        return min(self.max_delay, max(self.min_delay, percentile(latencies, self.percentile)))
+
+    def scrape(self, username: str, max_posts: int) -> Reels:
+        with self._lock:
+            self.scrapes += 1
+        primary = self._start(self.primary_name, self._start_primary, username, max_posts)
+        delay = self.hedge_delay()
+
+        error: Optional[BaseException] = None
+        if wait([primary], timeout=delay).done:
+            reels, error = self._result(primary)
+            if reels:
+                return self._win(self.primary_name, reels)
+            reason = "error" if error is not None else "empty"
+            pending = set()
+        else:
+            reason = "slow"
+            pending = {primary}
+
+        logger.info(f"🪁 Hedging scrape of {username} with {self.hedge_name} ({reason} {self.primary_name}, "
+                    f"delay {delay:.2f}s)")
+        with self._lock:
+            self.hedged += 1
+            self.hedge_reasons[reason] += 1
+        names = {primary: self.primary_name}
+        hedge = self._start(self.hedge_name, self._start_hedge, username, max_posts)
+        names[hedge] = self.hedge_name
+        pending.add(hedge)
+
+        # A primary that answered empty already counts; a slow one hasn't answered yet
+        empty = reason == "empty"
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                reels, future_error = self._result(future)
+                if reels:
+                    for loser in pending:
+                        loser.cancel()
+                    return self._win(names[future], reels)
+                if future_error is None:
+                    empty = True
+                else:
+                    error = future_error
+
+        # Neither backend found reels: an empty answer means the profile has none
+        if empty:
+            return []
+        raise error
+
+    def stats(self) -> Dict[str, Any]:
+        """Hedge counts, current delay and per-backend win rates and latencies"""
+        delay = self.hedge_delay()
+        with self._lock:
+            decided = sum(backend.wins for backend in self._backends.values())
+            return {
+                "scrapes": self.scrapes,
+                "hedged": self.hedged,
+                "hedge_rate": round(self.hedged / self.scrapes, 3) if self.scrapes else None,
+                "hedged_slow": self.hedge_reasons["slow"],
+                "hedged_empty": self.hedge_reasons["empty"],
+                "hedged_error": self.hedge_reasons["error"],
+                "primary_wins": self._backends[self.primary_name].wins,
+                "hedge_wins": self._backends[self.hedge_name].wins,
+                "hedge_delay_ms": round(delay * 1000, 1),
+                "backends": {name: backend.to_dict(decided) for name, backend in self._backends.items()},
+            }
+
+    def _start(self, name: str, start: StartFn, username: str, max_posts: int) -> "Future[Reels]":
+        backend = self._backends[name]
+        with self._lock:
+            backend.started += 1
+        started = time.perf_counter()
+        future = start(username, max_posts)
+        future.add_done_callback(lambda f: self._record(backend, f, time.perf_counter() - started))
+        return future
+
+    def _record(self, backend: _BackendStats, future: "Future[Reels]", elapsed: float):
+        with self._lock:
+            if future.cancelled():
+                backend.cancelled += 1
+            elif future.exception() is not None:
+                backend.failed += 1
+            else:
+                if future.result():
+                    backend.succeeded += 1
+                else:
+                    backend.empty += 1
+                backend.latencies.append(elapsed)
+
+    def _result(self, future: "Future[Reels]") -> Tuple[Optional[Reels], Optional[BaseException]]:
+        error = future.exception()
+        if error is not None:
+            return None, error
+        return future.result(), None
+
+    def _win(self, name: str, reels: Reels) -> Reels:
+        with self._lock:
+            self._backends[name].wins += 1
+        return reels
+
+
+_executor = ThreadPoolExecutor(max_workers=HEDGE_MAX_WORKERS, thread_name_prefix="hedge")
+
+
+def threaded(scrape_fn: Callable[[str, int], Reels]) -> StartFn:
+    """StartFn running a blocking scrape on the hedge thread pool.
+
+    The caller's context goes with it, so the request trace still applies.
+    """
+    def start(username: str, max_posts: int) -> "Future[Reels]":
+        return _executor.submit(contextvars.copy_context().run, scrape_fn, username, max_posts)
+    return start
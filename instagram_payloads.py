@@ -0,0 +1,108 @@
+from typing import List, Dict, Any, Optional
+
+# URL fragments of the XHR/GraphQL responses that carry profile media
+MEDIA_RESPONSE_PATTERNS = [
+    '/api/v1/clips/user/',
+    '/api/v1/feed/user/',
+    '/api/v1/users/web_profile_info/',
+    '/api/v1/media/',
+    '/graphql/query',
+    '/api/graphql',
+]
+
+# Keys that mark a dict as a media node rather than some other object with a code
+MEDIA_MARKER_KEYS = (
+    'taken_at', 'taken_at_timestamp', 'like_count', 'play_count',
+    'edge_media_preview_like', 'media_type', 'is_video', 'video_view_count',
+)
+
+
+def is_media_response_url(url: str) -> bool:
+    """Check whether a response URL is one of Instagram's media payload endpoints"""
+    return any(pattern in url for pattern in MEDIA_RESPONSE_PATTERNS)
+
+
+def _count(node: Dict[str, Any], *keys: str) -> int:
+    """Return the first numeric value found under keys (plain or {"count": n} edges)"""
+    for key in keys:
+        value = node.get(key)
+        if isinstance(value, dict):
+            value = value.get('count')
+        if isinstance(value, (int, float)) and not isinstance(value, bool):
+            return int(value)
+    return 0
+
+
+def _owner_username(node: Dict[str, Any]) -> Optional[str]:
+    for key in ('owner', 'user'):
+        owner = node.get(key)
+        if isinstance(owner, dict) and owner.get('username'):
+            return owner['username']
+    return None
+
+
+def parse_media_node(node: Dict[str, Any], base_url: str = "https://www.instagram.com") -> Optional[Dict[str, Any]]:
+    """Convert an API (v1) or GraphQL media node into the reel dict used across the API"""
+    shortcode = node.get('code') or node.get('shortcode')
+    if not isinstance(shortcode, str) or not any(key in node for key in MEDIA_MARKER_KEYS):
+        return None
+
+    dimensions = node.get('dimensions') or {}
+    width = node.get('original_width') or dimensions.get('width') or 0
+    height = node.get('original_height') or dimensions.get('height') or 0
+
+    qualities = node.get('number_of_qualities')
+    if not isinstance(qualities, (int, float)):
+        qualities = len(node.get('video_versions') or []) or 1
+
+    duration = node.get('video_duration')
+    if not isinstance(duration, (int, float)):
+        duration = 0.0
+
+    return {
+        'url': f"{base_url}/reel/{shortcode}",
+        'shortcode': shortcode,
+        'username': _owner_username(node),
+        'likes': _count(node, 'like_count', 'edge_media_preview_like', 'edge_liked_by'),
+        'comments': _count(node, 'comment_count', 'edge_media_to_comment'),
+        'views': _count(node, 'play_count', 'view_count', 'video_view_count', 'video_play_count'),
+        'posted_time': _count(node, 'taken_at', 'taken_at_timestamp'),
+        'video_duration': float(duration),
+        'dimensions': {'width': int(width), 'height': int(height)},
+        'numbers_of_qualities': int(qualities),
+    }
+
+
+def extract_reels_from_payload(payload: Any, username: Optional[str] = None,
+                               base_url: str = "https://www.instagram.com") -> List[Dict[str, Any]]:
+    """Walk a JSON payload and return every media node in document order.
+
+    Nodes owned by a different account are skipped when username is given;
+    nodes without owner information are attributed to username.
+    """
+    reels: List[Dict[str, Any]] = []
+    seen = set()
+    stack = [payload]
+
+    while stack:
+        item = stack.pop()
+        if isinstance(item, list):
+            stack.extend(reversed(item))
+            continue
+        if not isinstance(item, dict):
+            continue
+
+        reel = parse_media_node(item, base_url)
+        if reel is not None:
+            owner = reel['username']
+            if username and owner and owner.lower() != username.lower():
+                continue
+            if reel['shortcode'] not in seen:
+                seen.add(reel['shortcode'])
+                reel['username'] = owner or username
+                reels.append(reel)
+            continue
+
+        stack.extend(reversed(list(item.values())))
+
+    return reels
@@ -0,0 +1,261 @@
+import json
+import logging
+import os
+import socket
+import sqlite3
+import threading
+import time
+import uuid
+from contextlib import closing
+from datetime import datetime, timezone
+from typing import Dict, Any, Callable, Optional, List
+
+logger = logging.getLogger(__name__)
+
+JobHandler = Callable[[Dict[str, Any]], Dict[str, Any]]
+
+QUEUED = "queued"
+RUNNING = "running"
+SUCCEEDED = "succeeded"
+FAILED = "failed"
+
+# A running job whose worker hasn't renewed its lease for this long is requeued
+JOB_LEASE_SECONDS = float(os.getenv('JOB_LEASE_SECONDS', 60))
+
+
+def _iso(timestamp: Optional[float]) -> Optional[str]:
+    if timestamp is None:
+        return None
+    return datetime.fromtimestamp(timestamp, timezone.utc).isoformat()
+
+
+class JobQueue:
+    """Persistent SQLite job queue drained by a pool of background worker threads.
+
+    Several processes (and apps) may share the database. Each queue only
+    runs jobs enqueued for its backend. A worker claims a job in a write
+    transaction, taking a lease of JOB_LEASE_SECONDS that it renews while
+    the job runs; a job whose lease expired was interrupted and is put back
+    in the queue. Nothing touches the database until start() or first use.
+    """
+
+    def __init__(self, handler: JobHandler, backend: str, db_path: Optional[str] = None,
+                 workers: Optional[int] = None, poll_interval: float = 1.0, retention: Optional[float] = None,
+                 max_attempts: int = 3, lease: float = JOB_LEASE_SECONDS):
+        self.handler = handler
+        self.backend = backend
+        self.db_path = db_path or os.getenv('JOB_QUEUE_DB', 'jobs.db')
+        self.workers = workers or int(os.getenv('JOB_WORKERS', 2))
+        self.poll_interval = poll_interval
+        self.retention = retention if retention is not None else float(os.getenv('JOB_RETENTION_SECONDS', 86400))
+        self.max_attempts = max_attempts
+        self.lease = lease
+        self.worker_id = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+
+        self._wakeup = threading.Event()
+        self._stopping = threading.Event()
+        self._threads: List[threading.Thread] = []
+        self._start_lock = threading.Lock()
+        self._last_purge = 0.0
+
+    def start(self):
+        """Create the database if needed and start the worker and lease renewal threads"""
+        if self._threads:
+            # Called on every request by the Flask apps; skip the lock once started
+            return
+        with self._start_lock:
+            if self._threads:
+                return
+            self._init_db()
+            for i in range(self.workers):
+                thread = threading.Thread(target=self._worker_loop, name=f"job-worker-{i}", daemon=True)
+                thread.start()
+                self._threads.append(thread)
+            thread = threading.Thread(target=self._renew_loop, name="job-lease-renewal", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+        logger.info(f"⚙️ Job queue started for {self.backend} ({self.workers} workers, worker id {self.worker_id})")
+
+    def stop(self):
+        self._stopping.set()
+        self._wakeup.set()
+
+    def enqueue(self, payload: Dict[str, Any]) -> str:
+        """Persist a job and return its id"""
+        self.start()
+        job_id = uuid.uuid4().hex
+        with closing(self._connect()) as conn, conn:
+            conn.execute(
+                "INSERT INTO jobs (id, status, payload, created_at, attempts, backend) VALUES (?, ?, ?, ?, 0, ?)",
+                (job_id, QUEUED, json.dumps(payload), time.time(), self.backend)
+            )
+        self._wakeup.set()
+        return job_id
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Return a job's status and, once finished, its result or error"""
+        self.start()
+        with closing(self._connect()) as conn:
+            row = conn.execute(
+                "SELECT id, status, result, error, created_at, started_at, finished_at, attempts "
+                "FROM jobs WHERE id = ?", (job_id,)
+            ).fetchone()
+        if row is None:
+            return None
+
+        job = {
+            "job_id": row[0],
+            "status": row[1],
+            "created_at": _iso(row[4]),
+            "started_at": _iso(row[5]),
+            "finished_at": _iso(row[6]),
+            "attempts": row[7],
+        }
+        if row[1] == SUCCEEDED:
+            job["result"] = json.loads(row[2])
+        elif row[1] == FAILED:
+            job["error"] = row[3]
+        return job
+
+    def stats(self) -> Dict[str, Any]:
+        """Job counts by status for this backend, for the status endpoint"""
+        counts = {QUEUED: 0, RUNNING: 0, SUCCEEDED: 0, FAILED: 0}
+        if self._threads:
+            with closing(self._connect()) as conn:
+                rows = conn.execute(
+                    "SELECT status, COUNT(*) FROM jobs WHERE backend = ? GROUP BY status", (self.backend,)
+                ).fetchall()
+            counts.update(dict(rows))
+        counts["workers"] = self.workers
+        counts["started"] = bool(self._threads)
+        counts["backend"] = self.backend
+        counts["worker_id"] = self.worker_id
+        return counts
+
+    def _connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(self.db_path, timeout=30)
+
+    def _init_db(self):
+        with closing(self._connect()) as conn, conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS jobs (
+                    id TEXT PRIMARY KEY,
+                    status TEXT NOT NULL,
+                    payload TEXT NOT NULL,
+                    result TEXT,
+                    error TEXT,
+                    created_at REAL NOT NULL,
+                    started_at REAL,
+                    finished_at REAL,
+                    attempts INTEGER NOT NULL DEFAULT 0
+                )
+            """)
+            columns = {row[1] for row in conn.execute("PRAGMA table_info(jobs)")}
+            # Databases created before leases and backends get the new columns
+            for column, definition in (("backend", "TEXT"), ("worker_id", "TEXT"), ("lease_expires_at", "REAL")):
+                if column not in columns:
+                    conn.execute(f"ALTER TABLE jobs ADD COLUMN {column} {definition}")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_jobs_status_created ON jobs (status, created_at)")
+
+    def _claim(self) -> Optional[tuple]:
+        with closing(self._connect()) as conn:
+            conn.isolation_level = None
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                now = time.time()
+                self._requeue_expired(conn, now)
+                # Jobs from before backends were recorded can be run by any backend
+                row = conn.execute(
+                    "SELECT id, payload, attempts FROM jobs WHERE status = ? AND (backend = ? OR backend IS NULL) "
+                    "ORDER BY created_at LIMIT 1", (QUEUED, self.backend)
+                ).fetchone()
+                if row is not None:
+                    conn.execute(
+                        "UPDATE jobs SET status = ?, started_at = ?, attempts = attempts + 1, worker_id = ?, "
+                        "lease_expires_at = ? WHERE id = ?",
+                        (RUNNING, now, self.worker_id, now + self.lease, row[0])
+                    )
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+        return row
+
+    def _requeue_expired(self, conn: sqlite3.Connection, now: float):
+        """Requeue running jobs whose worker stopped renewing their lease"""
+        expired = "status = ? AND (lease_expires_at IS NULL OR lease_expires_at < ?)"
+        # A job that keeps getting interrupted is probably what kills the process
+        conn.execute(
+            f"UPDATE jobs SET status = ?, error = ?, finished_at = ? WHERE {expired} AND attempts >= ?",
+            (FAILED, "Job was interrupted too many times", now, RUNNING, now, self.max_attempts)
+        )
+        requeued = conn.execute(
+            f"UPDATE jobs SET status = ?, started_at = NULL, worker_id = NULL, lease_expires_at = NULL WHERE {expired}",
+            (QUEUED, RUNNING, now)
+        ).rowcount
+        if requeued:
+            logger.info(f"♻️ Requeued {requeued} interrupted jobs")
+
+    def _renew_leases(self):
+        with closing(self._connect()) as conn, conn:
+            conn.execute(
+                "UPDATE jobs SET lease_expires_at = ? WHERE status = ? AND worker_id = ?",
+                (time.time() + self.lease, RUNNING, self.worker_id)
+            )
+
+    def _finish(self, job_id: str, status: str, result: Optional[Dict[str, Any]] = None, error: Optional[str] = None):
+        with closing(self._connect()) as conn, conn:
+            # A job whose lease expired may have been claimed by another worker since
+            updated = conn.execute(
+                "UPDATE jobs SET status = ?, result = ?, error = ?, finished_at = ?, lease_expires_at = NULL "
+                "WHERE id = ? AND worker_id = ? AND status = ?",
+                (status, json.dumps(result) if result is not None else None, error, time.time(), job_id,
+                 self.worker_id, RUNNING)
+            ).rowcount
+        if not updated:
+            logger.warning(f"⚠️ Job {job_id} lost its lease before finishing; its result was discarded")
+
+    def _purge_expired(self):
+        now = time.time()
+        if now - self._last_purge < 60:
+            return
+        self._last_purge = now
+        with closing(self._connect()) as conn, conn:
+            conn.execute(
+                "DELETE FROM jobs WHERE status IN (?, ?) AND finished_at < ?",
+                (SUCCEEDED, FAILED, now - self.retention)
+            )
+
+    def _renew_loop(self):
+        while not self._stopping.wait(self.lease / 3):
+            try:
+                self._renew_leases()
+            except sqlite3.Error as e:
+                logger.warning(f"⚠️ Could not renew job leases: {e}")
+
+    def _worker_loop(self):
+        while not self._stopping.is_set():
+            try:
+                claimed = self._claim()
+            except sqlite3.Error as e:
+                logger.error(f"❌ Could not claim job: {e}")
+                claimed = None
+
+            if claimed is None:
+                try:
+                    self._purge_expired()
+                except sqlite3.Error as e:
+                    logger.warning(f"⚠️ Could not purge expired jobs: {e}")
+                self._wakeup.wait(self.poll_interval)
+                self._wakeup.clear()
+                continue
+
+            job_id, payload, attempts = claimed
+            logger.info(f"⚙️ Running job {job_id} (attempt {attempts + 1})")
+            try:
+                result = self.handler(json.loads(payload))
+                self._finish(job_id, SUCCEEDED, result=result)
+                logger.info(f"✅ Job {job_id} succeeded")
+            except Exception as e:
+                logger.error(f"❌ Job {job_id} failed: {str(e)}")
+                self._finish(job_id, FAILED, error=str(e))
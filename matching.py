@@ -0,0 +1,116 @@
+import logging
+import re
+from typing import List, Dict, Any, Optional
+
+# Shortcode extraction and reel matching shared by the API servers and
+# bulk_main.py. Kept free of pandas and reelscraper so the servers can use
+# them without importing the bulk scraping stack.
+
+logger = logging.getLogger(__name__)
+
+def extract_shortcode_from_url(url: str) -> Optional[str]:
+    """Extract shortcode from Instagram post/reel URL"""
+    if not url:
+        return None
+    
+    # Patterns to match Instagram post/reel URLs
+    patterns = [
+        r'/reel/([^/?]+)',
+        r'/p/([^/?]+)',
+        r'reel/([^/?]+)',
+        r'p/([^/?]+)',
+        r'instagram\.com/reel/([^/?]+)',
+        r'instagram\.com/p/([^/?]+)'
+    ]
+    
+    for pattern in patterns:
+        match = re.search(pattern, url)
+        if match:
+            return match.group(1)
+    
+    return None
+
+# Same patterns in the same priority order as extract_shortcode_from_url, for
+# the vectorized path in bulk_main.extract_shortcodes. The instagram.com/...
+# variants can never win over the shorter /reel/ and /p/ patterns, so they
+# are left out.
+SHORTCODE_PATTERNS = [
+    r'/reel/([^/?]+)',
+    r'/p/([^/?]+)',
+    r'reel/([^/?]+)',
+    r'p/([^/?]+)',
+]
+
+def build_matched_post(reel: Dict[str, Any], target_link: str) -> Dict[str, Any]:
+    """Build the matched post record for a scraped reel and the link it matched"""
+    return {
+        'username': reel.get('username'),
+        'target_link': target_link,
+        'matched_post_data': {
+            'url': reel.get('url'),
+            'shortcode': reel.get('shortcode'),
+            'likes': reel.get('likes', 0),
+            'comments': reel.get('comments', 0),
+            'views': reel.get('views', 0),
+            'posted_time': reel.get('posted_time', 0),
+            'video_duration': reel.get('video_duration', 0.0),
+            'dimensions': reel.get('dimensions', {}),
+            'numbers_of_qualities': reel.get('numbers_of_qualities', 1)
+        }
+    }
+
+def match_posts_with_targets(scraped_reels: List[Dict[str, Any]], target_links: List[str]) -> List[Dict[str, Any]]:
+    """Match scraped reels with target post links based on shortcode"""
+    matched_posts = []
+    
+    # Extract shortcodes from target links
+    target_shortcodes = {}
+    for link in target_links:
+        shortcode = extract_shortcode_from_url(link)
+        if shortcode:
+            target_shortcodes[shortcode] = link
+    
+    logger.debug(f"🔍 Looking for {len(target_shortcodes)} target shortcodes: {list(target_shortcodes.keys())}")
+    
+    # Match scraped reels with target shortcodes
+    for reel in scraped_reels:
+        reel_shortcode = reel.get('shortcode')
+        if reel_shortcode and reel_shortcode in target_shortcodes:
+            matched_posts.append(build_matched_post(reel, target_shortcodes[reel_shortcode]))
+            logger.debug(f"✅ Matched: {reel_shortcode} for user {reel.get('username')}")
+    
+    return matched_posts
+
+# Fields of a matched post that can be selected with a fields= projection:
+# the top-level keys, then the keys of matched_post_data
+MATCHED_POST_FIELDS = ('username', 'target_link')
+MATCHED_POST_DATA_FIELDS = ('url', 'shortcode', 'likes', 'comments', 'views', 'posted_time',
+                            'video_duration', 'dimensions', 'numbers_of_qualities')
+
+def parse_fields(value: Optional[str]) -> Optional[List[str]]:
+    """Parse a comma-separated fields= projection; None when no projection is requested.
+
+    Raises ValueError naming any field that isn't a matched post field.
+    """
+    if not value:
+        return None
+    fields = [field.strip() for field in value.split(',') if field.strip()]
+    unknown = [field for field in fields if field not in MATCHED_POST_FIELDS + MATCHED_POST_DATA_FIELDS]
+    if unknown:
+        raise ValueError(f"Unknown fields {unknown}; choose from {list(MATCHED_POST_FIELDS + MATCHED_POST_DATA_FIELDS)}")
+    return fields or None
+
+def project_matched_posts(matched_posts: List[Dict[str, Any]], fields: Optional[List[str]]) -> List[Dict[str, Any]]:
+    """Keep only the requested fields of each matched post (all of them when fields is None)"""
+    if fields is None:
+        return matched_posts
+    top = [field for field in fields if field in MATCHED_POST_FIELDS]
+    data = [field for field in fields if field in MATCHED_POST_DATA_FIELDS]
+    projected = []
+    for post in matched_posts:
+        item = {field: post.get(field) for field in top}
+        if data:
+            post_data = post['matched_post_data']
+            item['matched_post_data'] = {field: post_data.get(field) for field in data}
+        projected.append(item)
+    return projected
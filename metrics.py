@@ -0,0 +1,185 @@
+import asyncio
+import bisect
+import functools
+import threading
+import time
+from contextlib import contextmanager
+from typing import List, Dict, Any, Callable, Iterable, Iterator, Optional, Sequence, Tuple
+
+# Content type of the Prometheus text exposition format
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+PREFIX = "instagram_matcher"
+
+STAGE_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 20, 30, 60, 120)
+REELS_BUCKETS = (0, 1, 5, 10, 25, 50, 100, 250, 500)
+
+
+def _escape(value: str) -> str:
+    return value.replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _format_labels(labels: Sequence[Tuple[str, str]]) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in labels) + "}"
+
+
+def _format_value(value: float) -> str:
+    if value == float('inf'):
+        return "+Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class _Metric:
+    kind = "untyped"
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        self._values: Dict[Tuple[str, ...], Any] = {}
+        _registry.append(self)
+
+    def _key(self, labels: Dict[str, Any]) -> Tuple[str, ...]:
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}, got {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+        with self._lock:
+            items = sorted(self._values.items())
+        for key, value in items:
+            lines.extend(self._samples(list(zip(self.labelnames, key)), value))
+        return lines
+
+    def _samples(self, labels: List[Tuple[str, str]], value: Any) -> Iterable[str]:
+        yield f"{self.name}{_format_labels(labels)} {_format_value(value)}"
+
+
+class Counter(_Metric):
+    """Monotonic counter, one value per label combination"""
+    kind = "counter"
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+
+class Histogram(_Metric):
+    """Cumulative histogram over fixed bucket bounds"""
+    kind = "histogram"
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = STAGE_BUCKETS):
+        super().__init__(name, help, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                # Per-bucket counts (the last one is +Inf), sum, count
+                state = self._values[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            state[0][bisect.bisect_left(self.buckets, value)] += 1
+            state[1] += value
+            state[2] += 1
+
+    @contextmanager
+    def time(self, **labels) -> Iterator[None]:
+        """Observe the duration of the block in seconds, including when it raises"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def _samples(self, labels: List[Tuple[str, str]], value: Any) -> Iterable[str]:
+        counts, total, count = value
+        cumulative = 0
+        for bound, bucket_count in zip(self.buckets + (float('inf'),), counts):
+            cumulative += bucket_count
+            yield f"{self.name}_bucket{_format_labels(labels + [('le', _format_value(bound))])} {cumulative}"
+        yield f"{self.name}_sum{_format_labels(labels)} {_format_value(total)}"
+        yield f"{self.name}_count{_format_labels(labels)} {count}"
+
+
+_registry: List[_Metric] = []
+_collectors: List[Tuple[str, Callable[[], Dict[str, Any]], Tuple[str, ...]]] = []
+
+stage_seconds = Histogram(f"{PREFIX}_stage_seconds",
+                          "Time spent in each request stage (validation, scrape, match, serialization)",
+                          ("stage", "backend"))
+scrapes_total = Counter(f"{PREFIX}_scrapes_total",
+                        "Upstream profile scrapes by backend and outcome (success, empty, failure)",
+                        ("backend", "outcome"))
+reels_scraped = Histogram(f"{PREFIX}_reels_scraped", "Reels scraped per request", ("backend",), REELS_BUCKETS)
+
+
+def register_stats(subsystem: str, stats_fn: Callable[[], Dict[str, Any]], counters: Sequence[str] = ()):
+    """Export the numeric fields of a stats() dict on every scrape of /v1/metrics.
+
+    Fields named in counters become `<prefix>_<subsystem>_<field>_total`
+    counters, the other numbers and booleans become gauges. Nested values
+    and None are skipped.
+    """
+    _collectors.append((subsystem, stats_fn, tuple(counters)))
+
+
+def _render_stats(subsystem: str, stats_fn: Callable[[], Dict[str, Any]], counters: Tuple[str, ...]) -> List[str]:
+    try:
+        stats = stats_fn()
+    except Exception:
+        return []
+    lines = []
+    for field, value in stats.items():
+        if isinstance(value, bool):
+            value = int(value)
+        if not isinstance(value, (int, float)):
+            continue
+        kind = "counter" if field in counters else "gauge"
+        name = f"{PREFIX}_{subsystem}_{field}" + ("_total" if kind == "counter" else "")
+        lines.extend([f"# TYPE {name} {kind}", f"{name} {_format_value(value)}"])
+    return lines
+
+
+def render_metrics() -> str:
+    """All metrics in the Prometheus text exposition format"""
+    lines = []
+    for metric in _registry:
+        lines.extend(metric.render())
+    for subsystem, stats_fn, counters in _collectors:
+        lines.extend(_render_stats(subsystem, stats_fn, counters))
+    return "\n".join(lines) + "\n"
+
+
+def _record_outcome(backend: str, reels: Optional[List[Dict[str, Any]]]):
+    scrapes_total.inc(backend=backend, outcome="success" if reels else "empty")
+
+
+def counted_scrape(backend: str, scrape_fn: Callable[[str, int], List[Dict[str, Any]]]) -> Callable[[str, int], List[Dict[str, Any]]]:
+    """Wrap an upstream scrape function to count its outcomes"""
+    if asyncio.iscoroutinefunction(scrape_fn):
+        @functools.wraps(scrape_fn)
+        async def counted_async(username: str, max_posts: int) -> List[Dict[str, Any]]:
+            try:
+                reels = await scrape_fn(username, max_posts)
+            except Exception:
+                scrapes_total.inc(backend=backend, outcome="failure")
+                raise
+            _record_outcome(backend, reels)
+            return reels
+        return counted_async
+
+    @functools.wraps(scrape_fn)
+    def counted(username: str, max_posts: int) -> List[Dict[str, Any]]:
+        try:
+            reels = scrape_fn(username, max_posts)
+        except Exception:
+            scrapes_total.inc(backend=backend, outcome="failure")
+            raise
+        _record_outcome(backend, reels)
+        return reels
+    return counted
@@ -1,30 +1,167 @@
 import asyncio
 import json
 import re
-from typing import List, Dict, Any, Optional
-from playwright.async_api import async_playwright, Browser, Page
+from typing import List, Dict, Any, Optional, Callable, Awaitable, Set
+import os
+from playwright.async_api import async_playwright, Browser, BrowserContext, Page
+from api_common import UpstreamError
+from browser_pool import BrowserPool, get_browser_pool, CHROMIUM_LAUNCH_ARGS, USER_AGENT
+from instagram_payloads import is_media_response_url, extract_reels_from_payload
+from post_lookup import post_from_payload, alookup_posts
+from resource_policy import ResourcePolicy, ResourceStats, resource_totals
+from proxy_pool import get_proxy_pool, playwright_proxy
+from tracing import current_trace
+from urllib.parse import urlparse
 import logging
+import time
 
 logger = logging.getLogger(__name__)
 
+REEL_ANCHOR_SELECTOR = 'a[href*="/reel/"]'
+REELS_TAB_SELECTOR = 'a[href*="/reels/"]'
+PROFILE_NOT_FOUND_TEXT = "Sorry, this page isn't available."
+
+# Overridable so the scraper can be pointed at a local stand-in serving recorded pages
+INSTAGRAM_BASE_URL = os.getenv('INSTAGRAM_BASE_URL', 'https://www.instagram.com').rstrip('/')
+# 'network' parses reel metadata from the profile's XHR/GraphQL responses,
+# 'dom' only harvests reel anchors from the rendered grid
+CAPTURE_MODE = os.getenv('PLAYWRIGHT_CAPTURE_MODE', 'network').lower()
+
+# Per-stage readiness timeouts (milliseconds)
+NAVIGATION_TIMEOUT_MS = int(os.getenv('PLAYWRIGHT_NAVIGATION_TIMEOUT_MS', 30000))
+PROFILE_TIMEOUT_MS = int(os.getenv('PLAYWRIGHT_PROFILE_TIMEOUT_MS', 10000))
+REELS_TAB_TIMEOUT_MS = int(os.getenv('PLAYWRIGHT_REELS_TAB_TIMEOUT_MS', 5000))
+GRID_TIMEOUT_MS = int(os.getenv('PLAYWRIGHT_GRID_TIMEOUT_MS', 10000))
+# Grid counts as settled once the anchor count has not changed for this long
+GRID_STABLE_MS = int(os.getenv('PLAYWRIGHT_GRID_STABLE_MS', 750))
+READINESS_POLL_MS = int(os.getenv('PLAYWRIGHT_READINESS_POLL_MS', 100))
+# Incremental scroll: at most this many steps, each waiting this long for new anchors
+SCROLL_MAX_STEPS = int(os.getenv('PLAYWRIGHT_SCROLL_MAX_STEPS', 20))
+SCROLL_WAIT_MS = int(os.getenv('PLAYWRIGHT_SCROLL_WAIT_MS', 2000))
+
+# Deduplicated reel hrefs in grid order, collected in one round trip
+COLLECT_REEL_HREFS_JS = """(selector) => {
+    const hrefs = new Set();
+    for (const anchor of document.querySelectorAll(selector)) {
+        const href = anchor.getAttribute('href');
+        if (href) hrefs.add(href);
+    }
+    return Array.from(hrefs);
+}"""
+
+# Scroll to the bottom, then wait in the page (not over IPC) until new anchors
+# appear or `timeoutMs` passes; returns the anchor counts before and after
+SCROLL_STEP_JS = """async ([selector, timeoutMs, pollMs]) => {
+    const before = document.querySelectorAll(selector).length;
+    const root = document.scrollingElement || document.documentElement;
+    window.scrollTo(0, root.scrollHeight);
+    const deadline = performance.now() + timeoutMs;
+    let count = before;
+    while (count <= before && performance.now() < deadline) {
+        await new Promise((resolve) => setTimeout(resolve, pollMs));
+        count = document.querySelectorAll(selector).length;
+    }
+    return [before, count];
+}"""
+
+async def wait_for_reel_anchors(page: Page, target_count: int, timeout_ms: int = GRID_TIMEOUT_MS,
+                                stable_ms: int = GRID_STABLE_MS, poll_ms: int = READINESS_POLL_MS,
+                                extra_count: Optional[Callable[[], int]] = None) -> int:
+    """Wait until the reel grid has target_count anchors or stops changing.
+
+    extra_count lets another source of reels (e.g. captured JSON responses)
+    count towards the target. Returns the count seen when the wait resolved;
+    on timeout the current count is returned rather than raising.
+    """
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + timeout_ms / 1000
+    last_count = -1
+    last_change = loop.time()
+
+    while True:
+        count = await page.evaluate("(selector) => document.querySelectorAll(selector).length", REEL_ANCHOR_SELECTOR)
+        if extra_count is not None:
+            count = max(count, extra_count())
+        now = loop.time()
+
+        if count >= target_count:
+            return count
+        if count != last_count:
+            last_count = count
+            last_change = now
+        elif count > 0 and (now - last_change) * 1000 >= stable_ms:
+            return count
+        if now >= deadline:
+            logger.warning(f"Reel grid not settled after {timeout_ms}ms, continuing with {count} anchors")
+            return count
+
+        await asyncio.sleep(poll_ms / 1000)
+
+# Text of the JSON blobs a post page embeds its media payload in, plus whether
+# the page is Instagram's not-found page, in one round trip
+POST_PAGE_JSON_JS = """(notFound) => ({
+    notFound: document.body !== null && document.body.innerText.includes(notFound),
+    scripts: Array.from(document.querySelectorAll('script[type="application/json"]'), (s) => s.textContent),
+})"""
+
+def track_task(tasks: Set[asyncio.Task], coro: Awaitable[Any]) -> asyncio.Task:
+    """Start coro as a task held in tasks until it finishes, so it can't be garbage-collected mid-flight"""
+    task = asyncio.ensure_future(coro)
+    tasks.add(task)
+    task.add_done_callback(tasks.discard)
+    return task
+
+
+async def drain_tasks(tasks: Set[asyncio.Task]):
+    """Wait for the tracked tasks still running, retrieving their exceptions"""
+    if tasks:
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+
+class PlaywrightScrapeError(UpstreamError):
+    """A Playwright scrape ended early with an error (see PlaywrightInstagramScraper.last_error)"""
+
+
+def raise_for_error(scraper: 'PlaywrightInstagramScraper', username: str):
+    """Raise if the scraper's last scrape failed, so callers count it as a failure rather than empty"""
+    if scraper.last_error is not None:
+        raise PlaywrightScrapeError(f"Playwright scrape of {username} failed: {scraper.last_error}")
+
+
 class PlaywrightInstagramScraper:
-    def __init__(self):
+    def __init__(self, context: Optional[BrowserContext] = None, base_url: Optional[str] = None,
+                 capture_mode: Optional[str] = None, resource_policy: Optional[ResourcePolicy] = None,
+                 proxy: Optional[str] = None):
+        # When a context is borrowed from a BrowserPool, no browser is launched here
+        self.context: Optional[BrowserContext] = context
+        # Only used for a browser launched here; pooled contexts carry their own proxy
+        self.proxy = proxy
+        self.base_url = (base_url or INSTAGRAM_BASE_URL).rstrip('/')
+        self.capture_mode = (capture_mode or CAPTURE_MODE).lower()
+        self.resource_policy = resource_policy or ResourcePolicy()
+        self.resource_policy.allow_host(urlparse(self.base_url).hostname)
         self.browser: Optional[Browser] = None
         self.page: Optional[Page] = None
+        # Per-stage timing breakdown (ms) of the most recent scrape
+        self.last_timings: Dict[str, float] = {}
+        # Requests/bytes blocked vs. allowed during the most recent scrape
+        self.last_resource_stats: Dict[str, Any] = {}
+        # Error that ended the most recent scrape early, None if it completed
+        self.last_error: Optional[str] = None
+        # Scroll steps, page round trips and anchors seen extracting the most recent scrape
+        self.last_extraction: Dict[str, int] = {}
+        self._captured: List[Dict[str, Any]] = []
+        # Response captures still running; tasks remove themselves when done
+        self._capture_tasks: Set[asyncio.Task] = set()
         
     async def __aenter__(self):
+        if self.context is not None:
+            return self
         self.playwright = await async_playwright().start()
         self.browser = await self.playwright.chromium.launch(
             headless=True,
-            args=[
-                '--no-sandbox',
-                '--disable-setuid-sandbox',
-                '--disable-dev-shm-usage',
-                '--disable-accelerated-2d-canvas',
-                '--no-first-run',
-                '--no-zygote',
-                '--disable-gpu'
-            ]
+            args=CHROMIUM_LAUNCH_ARGS,
+            proxy=playwright_proxy(self.proxy)
         )
         return self
         
@@ -35,75 +172,273 @@ class PlaywrightInstagramScraper:
             await self.playwright.stop()
     
     async def get_user_reels(self, username: str, max_posts: int = 10) -> List[Dict[str, Any]]:
-        """Scrape Instagram reels using Playwright"""
+        """Scrape Instagram reels using Playwright.
+
+        Errors are logged and return []; check last_error (or use
+        raise_for_error) to tell a failed scrape from a profile without reels.
+        """
+        resource_stats = ResourceStats()
+        self.last_error = None
         try:
-            self.page = await self.browser.new_page()
+            if self.context is not None:
+                self.page = await self.context.new_page()
+            else:
+                self.page = await self.browser.new_page()
             
             # Set user agent to look more like a real browser
             await self.page.set_extra_http_headers({
-                'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36'
+                'User-Agent': USER_AGENT
             })
             
+            # Abort media, fonts, stylesheets and third-party requests we never read
+            resource_stats = await self.resource_policy.attach(self.page)
+            
+            # Parse reel metadata from the profile's own JSON responses as they arrive
+            self._captured = []
+            self._capture_tasks = set()
+            if self.capture_mode == 'network':
+                self.page.on('response', lambda response: track_task(
+                    self._capture_tasks, self._capture_response(response, username)
+                ))
+            
+            # In debug mode, record the page's events on the request's timeline
+            trace = current_trace()
+            if trace is not None and trace.debug:
+                self._record_page_events(self.page, trace)
+            
+            timings: Dict[str, float] = {}
+            stage_start = time.perf_counter()
+
+            def mark(stage: str):
+                nonlocal stage_start
+                now = time.perf_counter()
+                timings[stage] = round((now - stage_start) * 1000, 1)
+                stage_start = now
+                if trace is not None:
+                    trace.add_event('stage', stage)
+
             # Navigate to Instagram profile
-            profile_url = f"https://www.instagram.com/{username}/"
+            profile_url = f"{self.base_url}/{username}/"
             logger.info(f"Navigating to: {profile_url}")
             
-            await self.page.goto(profile_url, wait_until='networkidle', timeout=30000)
-            await asyncio.sleep(3)
+            await self.page.goto(profile_url, wait_until='domcontentloaded', timeout=NAVIGATION_TIMEOUT_MS)
+            mark('navigation')
+            
+            # Wait until the profile has rendered either content or the not-found page
+            try:
+                await self.page.wait_for_function(
+                    """([anchorSelector, tabSelector, notFound]) =>
+                        document.querySelector(anchorSelector) !== null ||
+                        document.querySelector(tabSelector) !== null ||
+                        (document.body !== null && document.body.innerText.includes(notFound))""",
+                    arg=[REEL_ANCHOR_SELECTOR, REELS_TAB_SELECTOR, PROFILE_NOT_FOUND_TEXT],
+                    timeout=PROFILE_TIMEOUT_MS
+                )
+            except Exception as e:
+                logger.warning(f"Profile content not detected within {PROFILE_TIMEOUT_MS}ms: {e}")
+            mark('profile')
             
             # Check if profile exists
-            if "Sorry, this page isn't available." in await self.page.content():
+            if PROFILE_NOT_FOUND_TEXT in await self.page.content():
                 logger.error(f"Profile not found: {username}")
                 return []
             
             # Click on reels tab
             try:
-                reels_tab = await self.page.wait_for_selector('a[href*="/reels/"]', timeout=10000)
+                reels_tab = await self.page.wait_for_selector(REELS_TAB_SELECTOR, timeout=REELS_TAB_TIMEOUT_MS)
                 await reels_tab.click()
-                await asyncio.sleep(3)
                 logger.info("Clicked on reels tab")
             except Exception as e:
                 logger.warning(f"Could not find reels tab: {e}")
                 # Try to find posts instead
                 pass
+            mark('reels_tab')
             
-            # Wait for content to load
-            await asyncio.sleep(5)
+            # Wait for the reel grid to fill up or settle
+            anchors = await wait_for_reel_anchors(self.page, max_posts, extra_count=lambda: len(self._captured))
+            mark('grid')
             
-            # Extract reel links
-            reel_links = await self.page.query_selector_all('a[href*="/reel/"]')
-            logger.info(f"Found {len(reel_links)} reel links")
+            # Scroll only as far as needed to reach max_posts
+            scroll_steps = await self._scroll_for_reels(anchors, max_posts)
+            mark('scroll')
+            
+            # Extract every reel link in a single round trip
+            hrefs = await self.page.evaluate(COLLECT_REEL_HREFS_JS, REEL_ANCHOR_SELECTOR)
+            logger.info(f"Found {len(hrefs)} reel links")
             
             reels_data = []
-            for i, link in enumerate(reel_links[:max_posts]):
-                try:
-                    href = await link.get_attribute('href')
-                    if href:
-                        shortcode = self.extract_shortcode_from_url(href)
-                        if shortcode:
-                            reel_data = {
-                                'url': f"https://www.instagram.com{href}",
-                                'shortcode': shortcode,
-                                'username': username,
-                                'likes': 0,  # Will be updated if we can scrape individual posts
-                                'comments': 0,
-                                'views': 0,
-                                'posted_time': 0,
-                                'video_duration': 0.0,
-                                'dimensions': {'width': 1080, 'height': 1920},
-                                'numbers_of_qualities': 1
-                            }
-                            reels_data.append(reel_data)
-                            logger.info(f"Added reel: {shortcode}")
-                except Exception as e:
-                    logger.error(f"Error processing reel {i}: {e}")
+            seen = set()
+            for href in hrefs:
+                shortcode = self.extract_shortcode_from_url(href)
+                if not shortcode or shortcode in seen:
                     continue
+                seen.add(shortcode)
+                reels_data.append({
+                    'url': f"{self.base_url}{href}",
+                    'shortcode': shortcode,
+                    'username': username,
+                    'likes': 0,  # Will be updated if we can scrape individual posts
+                    'comments': 0,
+                    'views': 0,
+                    'posted_time': 0,
+                    'video_duration': 0.0,
+                    'dimensions': {'width': 1080, 'height': 1920},
+                    'numbers_of_qualities': 1
+                })
+                if len(reels_data) >= max_posts:
+                    break
+            
+            await drain_tasks(self._capture_tasks)
+            if self._captured:
+                reels_data = self._merge_captured(reels_data, max_posts)
+            mark('extract')
+            
+            timings['total'] = round(sum(timings.values()), 1)
+            self.last_timings = timings
+            # One evaluate per scroll step plus the final extraction
+            self.last_extraction = {'scroll_steps': scroll_steps, 'round_trips': scroll_steps + 1, 'anchors': len(hrefs)}
+            if trace is not None:
+                trace.add_stage('navigation', timings['navigation'])
+                trace.add_stage('wait', timings['profile'] + timings['reels_tab'] + timings['grid'])
+                trace.add_stage('scroll', timings['scroll'])
+                trace.add_stage('extract', timings['extract'])
+                trace.add_event('extraction', f"{scroll_steps} scroll steps, {scroll_steps + 1} round trips, {len(hrefs)} anchors")
+            logger.info(f"⏱️ Timing for {username}: " + ", ".join(f"{stage}={ms}ms" for stage, ms in timings.items()))
+            logger.info(f"📜 Extraction for {username}: {scroll_steps} scroll steps, {scroll_steps + 1} round trips, "
+                        f"{len(hrefs)} anchors")
             
             return reels_data
             
         except Exception as e:
             logger.error(f"Error scraping profile {username}: {e}")
+            self.last_error = str(e)
             return []
+        finally:
+            self.last_resource_stats = resource_stats.to_dict()
+            resource_totals.merge(resource_stats)
+            logger.info(f"🚫 Resources for {username}: {resource_stats.allowed_requests} allowed "
+                        f"({resource_stats.allowed_bytes} bytes), {resource_stats.blocked_requests} blocked")
+            if self.page is not None:
+                try:
+                    await self.page.close()
+                except Exception:
+                    pass
+                self.page = None
+            # No new responses arrive once the page is closed; let the captures still running finish
+            # so none is left pending (e.g. after the not-found page or an error)
+            await drain_tasks(self._capture_tasks)
+    
+    async def _scroll_for_reels(self, anchors: int, max_posts: int) -> int:
+        """Scroll until max_posts reels are loaded or a step brings no new anchors.
+
+        anchors is the count the grid wait ended with (DOM or captured).
+        Returns the number of scroll steps taken.
+        """
+        steps = 0
+        while max(anchors, len(self._captured)) < max_posts and steps < SCROLL_MAX_STEPS:
+            before, anchors = await self.page.evaluate(SCROLL_STEP_JS, [REEL_ANCHOR_SELECTOR, SCROLL_WAIT_MS, READINESS_POLL_MS])
+            steps += 1
+            if anchors <= before:
+                logger.info(f"No new reels after scrolling, stopping at {anchors} anchors")
+                break
+        return steps
+
+    async def get_post(self, shortcode: str) -> Optional[Dict[str, Any]]:
+        """Fetch one post from its page by shortcode; None if it isn't found.
+
+        The media node is parsed from the JSON embedded in the page or, failing
+        that, from the media XHR the page makes. Safe to call concurrently: each
+        call uses its own page.
+        """
+        page = await (self.context or self.browser).new_page()
+        found: asyncio.Future = asyncio.get_running_loop().create_future()
+        captures: Set[asyncio.Task] = set()
+        resource_stats = ResourceStats()
+
+        async def capture(response):
+            if found.done() or not is_media_response_url(response.url):
+                return
+            try:
+                post = post_from_payload(await response.json(), shortcode, self.base_url)
+            except Exception:
+                return
+            if post is not None and not found.done():
+                found.set_result(post)
+
+        try:
+            resource_stats = await self.resource_policy.attach(page)
+            page.on('response', lambda response: track_task(captures, capture(response)))
+            await page.goto(f"{self.base_url}/reel/{shortcode}/", wait_until='domcontentloaded',
+                            timeout=NAVIGATION_TIMEOUT_MS)
+
+            embedded = await page.evaluate(POST_PAGE_JSON_JS, PROFILE_NOT_FOUND_TEXT)
+            if embedded['notFound']:
+                return None
+            for text in embedded['scripts']:
+                try:
+                    post = post_from_payload(json.loads(text), shortcode, self.base_url)
+                except ValueError:
+                    continue
+                if post is not None:
+                    return post
+
+            try:
+                return await asyncio.wait_for(asyncio.shield(found), PROFILE_TIMEOUT_MS / 1000)
+            except asyncio.TimeoutError:
+                logger.warning(f"Post {shortcode} not found in its page within {PROFILE_TIMEOUT_MS}ms")
+                return None
+        finally:
+            resource_totals.merge(resource_stats)
+            try:
+                await page.close()
+            except Exception:
+                pass
+            await drain_tasks(captures)
+
+    def _record_page_events(self, page: Page, trace):
+        """Add navigation, load and network events of page to trace's timeline"""
+        def on_navigated(frame):
+            if frame == page.main_frame:
+                trace.add_event('navigated', frame.url)
+
+        def on_console(message):
+            if message.type == 'error':
+                trace.add_event('console_error', message.text)
+
+        page.on('framenavigated', on_navigated)
+        page.on('domcontentloaded', lambda _: trace.add_event('domcontentloaded'))
+        page.on('load', lambda _: trace.add_event('load'))
+        page.on('request', lambda req: trace.add_event('request', f"{req.resource_type} {req.url}"))
+        page.on('response', lambda res: trace.add_event('response', f"{res.status} {res.url}"))
+        page.on('requestfailed', lambda req: trace.add_event('requestfailed', f"{req.failure} {req.url}"))
+        page.on('console', on_console)
+
+    async def _capture_response(self, response, username: str):
+        """Collect reels from a profile XHR/GraphQL response"""
+        if not is_media_response_url(response.url):
+            return
+        content_type = response.headers.get('content-type', '')
+        if 'json' not in content_type and 'javascript' not in content_type:
+            return
+        try:
+            payload = await response.json()
+        except Exception as e:
+            logger.debug(f"Could not decode JSON from {response.url}: {e}")
+            return
+
+        known = {reel['shortcode'] for reel in self._captured}
+        for reel in extract_reels_from_payload(payload, username=username, base_url=self.base_url):
+            if reel['shortcode'] not in known:
+                known.add(reel['shortcode'])
+                self._captured.append(reel)
+
+    def _merge_captured(self, dom_reels: List[Dict[str, Any]], max_posts: int) -> List[Dict[str, Any]]:
+        """Prefer captured JSON metadata, keeping DOM-only reels as a fallback"""
+        captured_codes = {reel['shortcode'] for reel in self._captured}
+        merged = list(self._captured)
+        merged.extend(reel for reel in dom_reels if reel['shortcode'] not in captured_codes)
+        logger.info(f"Captured {len(self._captured)} reels from JSON responses, {len(merged) - len(self._captured)} from DOM only")
+        return merged[:max_posts]
     
     def extract_shortcode_from_url(self, url: str) -> Optional[str]:
         """Extract shortcode from Instagram URL"""
@@ -127,10 +462,58 @@ class PlaywrightInstagramScraper:
 # Helper function to use the scraper
 async def scrape_user_reels_playwright(username: str, max_posts: int = 10) -> List[Dict[str, Any]]:
     """Scrape user reels using Playwright"""
-    async with PlaywrightInstagramScraper() as scraper:
-        return await scraper.get_user_reels(username, max_posts)
+    proxy_pool = get_proxy_pool()
+    proxy = proxy_pool.choose(username)
+    start = time.perf_counter()
+    async with PlaywrightInstagramScraper(proxy=proxy) as scraper:
+        reels = await scraper.get_user_reels(username, max_posts)
+    proxy_pool.record(proxy, scraper.last_error is None, time.perf_counter() - start)
+    raise_for_error(scraper, username)
+    return reels
+
+async def scrape_user_reels_pooled(pool: BrowserPool, username: str, max_posts: int = 10) -> List[Dict[str, Any]]:
+    """Scrape user reels with a context borrowed from a warm browser pool"""
+    async with pool.context(username) as context:
+        start = time.perf_counter()
+        async with PlaywrightInstagramScraper(context=context) as scraper:
+            reels = await scraper.get_user_reels(username, max_posts)
+        if pool.proxy_pool is not None:
+            pool.proxy_pool.record(pool.proxy_of(context), scraper.last_error is None, time.perf_counter() - start)
+    raise_for_error(scraper, username)
+    return reels
+
+async def lookup_posts_playwright(username: str, shortcodes: List[str]) -> Dict[str, Any]:
+    """Fetch posts by shortcode with a browser launched for this lookup"""
+    proxy = get_proxy_pool().choose(username)
+    async with PlaywrightInstagramScraper(proxy=proxy) as scraper:
+        return await alookup_posts(username, shortcodes, scraper.get_post)
+
+async def lookup_posts_pooled(pool: BrowserPool, username: str, shortcodes: List[str]) -> Dict[str, Any]:
+    """Fetch posts by shortcode as concurrent pages of one context from a warm browser pool"""
+    async with pool.context(username) as context:
+        start = time.perf_counter()
+        async with PlaywrightInstagramScraper(context=context) as scraper:
+            result = await alookup_posts(username, shortcodes, scraper.get_post)
+        if pool.proxy_pool is not None:
+            pool.proxy_pool.record(pool.proxy_of(context), not result["failed"], time.perf_counter() - start)
+        return result
 
 # Synchronous wrapper for Flask
 def scrape_user_reels_sync(username: str, max_posts: int = 10) -> List[Dict[str, Any]]:
     """Synchronous wrapper for Playwright scraper"""
-    return asyncio.run(scrape_user_reels_playwright(username, max_posts)) 
\ No newline at end of file
+    if os.getenv('PLAYWRIGHT_POOL_ENABLED', 'True').lower() != 'true':
+        return asyncio.run(scrape_user_reels_playwright(username, max_posts))
+
+    pool = get_browser_pool()
+    timeout = float(os.getenv('PLAYWRIGHT_SCRAPE_TIMEOUT', 90))
+    return pool.run(scrape_user_reels_pooled(pool, username, max_posts), timeout=timeout)
+ 
+
+def lookup_posts_sync(username: str, shortcodes: List[str]) -> Dict[str, Any]:
+    """Synchronous wrapper for the Playwright post lookup"""
+    if os.getenv('PLAYWRIGHT_POOL_ENABLED', 'True').lower() != 'true':
+        return asyncio.run(lookup_posts_playwright(username, shortcodes))
+
+    pool = get_browser_pool()
+    timeout = float(os.getenv('PLAYWRIGHT_SCRAPE_TIMEOUT', 90))
+    return pool.run(lookup_posts_pooled(pool, username, shortcodes), timeout=timeout)
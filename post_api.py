@@ -0,0 +1,39 @@
+import json
+import os
+from typing import Dict, Any, Optional
+
+from reelscraper.utils.instagram_api import InstagramAPI
+
+# GraphQL query behind Instagram's public post pages; Instagram rotates these ids now and then
+POST_QUERY_DOC_ID = os.getenv('INSTAGRAM_POST_DOC_ID', '8845758582119845')
+
+
+class PostLookupAPI(InstagramAPI):
+    """InstagramAPI that can also fetch one post by shortcode.
+
+    reelscraper only fetches profiles. get_post_data makes the GraphQL query
+    of a public post page, which answers without a login (the media info
+    endpoint does not). base_url (default INSTAGRAM_BASE_URL) points every
+    endpoint at a local stand-in such as benchmarks/fake_instagram.py.
+    """
+
+    def __init__(self, timeout: Optional[int] = 40, proxy: Optional[str] = None, base_url: Optional[str] = None):
+        super().__init__(timeout=timeout, proxy=proxy)
+        base_url = (base_url or os.getenv('INSTAGRAM_BASE_URL') or '').rstrip('/')
+        if base_url:
+            self.BASE_URL = base_url
+            self.GRAPHQL_URL = f"{base_url}/graphql/query/"
+            self.CLIPS_USER_URL = f"{base_url}/api/v1/clips/user/"
+
+    def get_post_data(self, shortcode: str) -> Optional[Dict[str, Any]]:
+        """Fetch the GraphQL data of the post with shortcode, None on network or decoding errors"""
+        headers = self._get_default_headers(referer=f"{self.BASE_URL}/p/{shortcode}/")
+        if self.csrf_token:
+            headers["x-csrftoken"] = self.csrf_token
+        variables = {"shortcode": shortcode, "fetch_tagged_user_count": None,
+                     "hoisted_comment_id": None, "hoisted_reply_id": None}
+        return self._handle_request(
+            "post", self.GRAPHQL_URL,
+            headers=headers,
+            data={"variables": json.dumps(variables), "doc_id": POST_QUERY_DOC_ID, "server_timestamps": "true"},
+        )
@@ -0,0 +1,133 @@
+import asyncio
+import logging
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Dict, Any, Awaitable, Callable, Iterable, Optional
+
+from instagram_payloads import extract_reels_from_payload
+from matching import extract_shortcode_from_url
+
+logger = logging.getLogger(__name__)
+
+# Target posts fetched at once for one source=lookup request
+LOOKUP_MAX_CONCURRENCY = int(os.getenv('LOOKUP_MAX_CONCURRENCY', 4))
+
+# Shortcodes are the media id in base 64 with this alphabet
+SHORTCODE_ALPHABET = "ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789-_"
+
+# Field of the post query's data (see post_api.PostLookupAPI) holding the post,
+# null for a post that doesn't exist or isn't public
+POST_QUERY_FIELD = "xdt_shortcode_media"
+
+Post = Optional[Dict[str, Any]]
+
+
+def shortcode_to_media_id(shortcode: str) -> Optional[int]:
+    """Media id encoded by a public post shortcode, None if it isn't one"""
+    media_id = 0
+    for char in shortcode:
+        digit = SHORTCODE_ALPHABET.find(char)
+        if digit < 0:
+            return None
+        media_id = media_id * 64 + digit
+    return media_id
+
+
+def post_from_payload(payload: Any, shortcode: str, base_url: str) -> Post:
+    """The media node for shortcode in an API payload, with its owner as username"""
+    for reel in extract_reels_from_payload(payload, base_url=base_url):
+        if reel['shortcode'] == shortcode:
+            return reel
+    return None
+
+
+def fetch_post(api, shortcode: str) -> Post:
+    """Fetch one post with a post_api.PostLookupAPI.
+
+    Returns None for a post that doesn't exist and raises on any other error
+    answer (throttling, login walls), so proxy failover and "failed" apply.
+    """
+    if shortcode_to_media_id(shortcode) is None:
+        return None
+    response = api.get_post_data(shortcode)
+    if not isinstance(response, dict):
+        # None on network or decoding errors; a missing post still answers JSON
+        raise RuntimeError(f"post request for {shortcode} failed")
+    if not isinstance(response.get("data"), dict):
+        message = str(response.get("message") or "no post data")
+        raise RuntimeError(f"post request for {shortcode} failed: {message}")
+    if response["data"].get(POST_QUERY_FIELD) is None:
+        return None
+    return post_from_payload(response, shortcode, api.BASE_URL)
+
+
+def _sort_results(username: str, shortcodes: List[str], posts: Dict[str, Post],
+                  failed: List[str]) -> Dict[str, Any]:
+    """Keep posts owned by username; report the others by reason"""
+    reels, not_found, owner_mismatch = [], [], []
+    for shortcode in shortcodes:
+        if shortcode in failed:
+            continue
+        post = posts.get(shortcode)
+        if post is None:
+            not_found.append(shortcode)
+        elif (post['username'] or '').lower() != username.lower():
+            # A post without owner information can't be verified either
+            owner_mismatch.append(shortcode)
+        else:
+            reels.append(post)
+    return {"reels": reels, "not_found": not_found, "owner_mismatch": owner_mismatch, "failed": failed}
+
+
+def lookup_posts(username: str, shortcodes: Iterable[str], fetch_fn: Callable[[str], Post],
+                 max_concurrency: int = LOOKUP_MAX_CONCURRENCY) -> Dict[str, Any]:
+    """Fetch each shortcode directly with fetch_fn, at most max_concurrency at a time.
+
+    Returns the posts owned by username as "reels" and the other shortcodes
+    under "not_found", "owner_mismatch" or "failed" (fetch_fn raised).
+    """
+    shortcodes = list(dict.fromkeys(shortcodes))
+    posts: Dict[str, Post] = {}
+    failed: List[str] = []
+    if shortcodes:
+        with ThreadPoolExecutor(max_workers=min(max_concurrency, len(shortcodes)),
+                                thread_name_prefix="lookup") as executor:
+            futures = {shortcode: executor.submit(fetch_fn, shortcode) for shortcode in shortcodes}
+            for shortcode, future in futures.items():
+                try:
+                    posts[shortcode] = future.result()
+                except Exception as e:
+                    logger.warning(f"⚠️ Could not fetch post {shortcode}: {e}")
+                    failed.append(shortcode)
+    return _sort_results(username, shortcodes, posts, failed)
+
+
+async def alookup_posts(username: str, shortcodes: Iterable[str], fetch_fn: Callable[[str], Awaitable[Post]],
+                        max_concurrency: int = LOOKUP_MAX_CONCURRENCY) -> Dict[str, Any]:
+    """lookup_posts for a coroutine fetch_fn"""
+    shortcodes = list(dict.fromkeys(shortcodes))
+    limit = asyncio.Semaphore(max_concurrency)
+    posts: Dict[str, Post] = {}
+    failed: List[str] = []
+
+    async def fetch(shortcode: str):
+        async with limit:
+            try:
+                posts[shortcode] = await fetch_fn(shortcode)
+            except Exception as e:
+                logger.warning(f"⚠️ Could not fetch post {shortcode}: {e}")
+                failed.append(shortcode)
+
+    await asyncio.gather(*(fetch(shortcode) for shortcode in shortcodes))
+    return _sort_results(username, shortcodes, posts, failed)
+
+
+def lookup_summary(result: Dict[str, Any], post_links: List[str]) -> Dict[str, Any]:
+    """The "lookup" block of a response: counts and the target links not matched, by reason"""
+    links = {extract_shortcode_from_url(link): link for link in post_links}
+    return {
+        "fetched": len(result["reels"]) + len(result["not_found"]) + len(result["owner_mismatch"]),
+        "not_found": [links[code] for code in result["not_found"]],
+        "owner_mismatch": [links[code] for code in result["owner_mismatch"]],
+        "failed": [links[code] for code in result["failed"]],
+    }
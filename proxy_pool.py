@@ -0,0 +1,256 @@
+import hashlib
+import logging
+import os
+import re
+import threading
+import time
+from contextlib import contextmanager
+from typing import List, Dict, Any, Optional, Callable, Iterable, Iterator, TypeVar
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar('T')
+
+PROXY_QUARANTINE_SECONDS = float(os.getenv('PROXY_QUARANTINE_SECONDS', 60))
+PROXY_QUARANTINE_MAX_SECONDS = float(os.getenv('PROXY_QUARANTINE_MAX_SECONDS', 900))
+PROXY_STRIKE_DECAY_SECONDS = float(os.getenv('PROXY_STRIKE_DECAY_SECONDS', 600))
+PROXY_FAILURE_THRESHOLD = float(os.getenv('PROXY_FAILURE_THRESHOLD', 0.5))
+PROXY_FAILOVER_ATTEMPTS = int(os.getenv('PROXY_FAILOVER_ATTEMPTS', 2))
+# Consecutive failures that quarantine a proxy regardless of its failure rate
+PROXY_MAX_CONSECUTIVE_FAILURES = 3
+# Weight of the newest sample in the failure rate and latency moving averages
+EWMA_ALPHA = 0.2
+
+# Same pattern as reelscraper's InstagramAPI._configure_proxy, so a proxy accepted
+# here doesn't fail later when the scrapers are built
+PROXY_PATTERN = re.compile(r"^(?:(?P<username>[\w.\-]+):(?P<password>[\w.\-]+)@)?(?P<host>[\w.\-]+):(?P<port>\d+)$")
+
+
+def load_proxies(value: Optional[str] = None, path: Optional[str] = None) -> List[Optional[str]]:
+    """Read proxies from SCRAPER_PROXIES, SCRAPER_PROXY_FILE or SCRAPER_PROXY.
+
+    Lists are comma or whitespace separated and files have one proxy per
+    line (# starts a comment). Without any proxy the list is [None], i.e. a
+    single direct connection.
+    """
+    value = value if value is not None else os.getenv('SCRAPER_PROXIES', '')
+    path = path if path is not None else os.getenv('SCRAPER_PROXY_FILE', '')
+
+    entries = re.split(r"[,\s]+", value)
+    if path:
+        with open(path, encoding='utf-8') as f:
+            entries.extend(line.split('#', 1)[0].strip() for line in f)
+    if not any(entries):
+        entries = [os.getenv('SCRAPER_PROXY', '')]
+
+    proxies = []
+    for entry in entries:
+        entry = entry.strip()
+        if not entry or entry in proxies:
+            continue
+        if not PROXY_PATTERN.match(entry):
+            raise ValueError(f"Invalid proxy '{entry}'. Expected format 'host:port' or 'user:pass@host:port'.")
+        proxies.append(entry)
+    return proxies or [None]
+
+
+def redact_proxy(proxy: Optional[str]) -> str:
+    """Proxy label safe for logs and the status endpoint"""
+    if proxy is None:
+        return "direct"
+    match = PROXY_PATTERN.match(proxy)
+    if match and match.group("username"):
+        return f"{match.group('username')}:***@{match.group('host')}:{match.group('port')}"
+    return proxy
+
+
+def playwright_proxy(proxy: Optional[str]) -> Optional[Dict[str, str]]:
+    """Convert a proxy string to Playwright's proxy settings"""
+    if proxy is None:
+        return None
+    match = PROXY_PATTERN.match(proxy)
+    settings = {"server": f"http://{match.group('host')}:{match.group('port')}"}
+    if match.group("username"):
+        settings["username"] = match.group("username")
+        settings["password"] = match.group("password")
+    return settings
+
+
+class _ProxyState:
+    def __init__(self, proxy: Optional[str]):
+        self.proxy = proxy
+        self.requests = 0
+        self.failures = 0
+        self.consecutive_failures = 0
+        self.failure_rate = 0.0
+        self.latency_ms: Optional[float] = None
+        self.in_flight = 0
+        self.strikes = 0
+        self.quarantines = 0
+        self.quarantined_until = 0.0
+        self.last_quarantined = 0.0
+
+    def score(self) -> float:
+        """Higher is healthier: success rate discounted by latency"""
+        latency_penalty = 1 + (self.latency_ms or 0) / 1000
+        return (1 - self.failure_rate) / latency_penalty
+
+    def to_dict(self, now: float) -> Dict[str, Any]:
+        return {
+            "proxy": redact_proxy(self.proxy),
+            "requests": self.requests,
+            "failures": self.failures,
+            "failure_rate": round(self.failure_rate, 3),
+            "latency_ms": round(self.latency_ms, 1) if self.latency_ms is not None else None,
+            "score": round(self.score(), 3),
+            "in_flight": self.in_flight,
+            "quarantined": self.quarantined_until > now,
+            "quarantined_for": round(max(0.0, self.quarantined_until - now), 1),
+            "quarantines": self.quarantines,
+        }
+
+
+class ProxyPool:
+    """Spreads scrapes across proxies, tracking their health.
+
+    Each key (a username) sticks to one proxy via rendezvous hashing, so its
+    requests keep one egress and CSRF session, and only moves when that
+    proxy is quarantined. A proxy is quarantined when its failure rate or a
+    run of consecutive failures crosses the threshold. The quarantine
+    doubles with every strike, and one strike is forgiven for every
+    PROXY_STRIKE_DECAY_SECONDS without a new quarantine.
+    """
+
+    def __init__(self, proxies: Optional[Iterable[Optional[str]]] = None,
+                 quarantine_seconds: float = PROXY_QUARANTINE_SECONDS,
+                 max_quarantine_seconds: float = PROXY_QUARANTINE_MAX_SECONDS,
+                 strike_decay_seconds: float = PROXY_STRIKE_DECAY_SECONDS,
+                 failure_threshold: float = PROXY_FAILURE_THRESHOLD):
+        proxies = list(proxies) if proxies is not None else load_proxies()
+        self._states = [_ProxyState(proxy) for proxy in proxies or [None]]
+        self.quarantine_seconds = quarantine_seconds
+        self.max_quarantine_seconds = max_quarantine_seconds
+        self.strike_decay_seconds = strike_decay_seconds
+        self.failure_threshold = failure_threshold
+        self._lock = threading.Lock()
+
+    @property
+    def proxies(self) -> List[Optional[str]]:
+        return [state.proxy for state in self._states]
+
+    def choose(self, key: Optional[str] = None, exclude: Iterable[Optional[str]] = ()) -> Optional[str]:
+        """Pick a proxy for key, avoiding quarantined and excluded ones when possible"""
+        exclude = set(exclude)
+        now = time.time()
+        with self._lock:
+            candidates = [s for s in self._states if s.proxy not in exclude] or self._states
+            healthy = [s for s in candidates if s.quarantined_until <= now]
+            if not healthy:
+                # Everything is quarantined: use whichever comes back first
+                return min(candidates, key=lambda s: s.quarantined_until).proxy
+            if key is None:
+                return min(healthy, key=lambda s: (s.in_flight, -s.score())).proxy
+            return max(healthy, key=lambda s: self._rendezvous(key, s.proxy)).proxy
+
+    def record(self, proxy: Optional[str], ok: bool, latency: Optional[float] = None):
+        """Record the outcome of a request through proxy (latency in seconds)"""
+        now = time.time()
+        with self._lock:
+            state = self._state(proxy)
+            if state is None:
+                return
+            state.requests += 1
+            state.failure_rate = EWMA_ALPHA * (0.0 if ok else 1.0) + (1 - EWMA_ALPHA) * state.failure_rate
+            if latency is not None:
+                latency_ms = latency * 1000
+                state.latency_ms = latency_ms if state.latency_ms is None else (
+                    EWMA_ALPHA * latency_ms + (1 - EWMA_ALPHA) * state.latency_ms)
+
+            if ok:
+                state.consecutive_failures = 0
+                return
+            state.failures += 1
+            state.consecutive_failures += 1
+            if (state.failure_rate >= self.failure_threshold
+                    or state.consecutive_failures >= PROXY_MAX_CONSECUTIVE_FAILURES):
+                self._quarantine(state, now)
+
+    @contextmanager
+    def session(self, key: Optional[str] = None, exclude: Iterable[Optional[str]] = ()) -> Iterator[Optional[str]]:
+        """Choose a proxy for key and record the outcome of the block that uses it"""
+        proxy = self.choose(key, exclude)
+        with self._lock:
+            self._state(proxy).in_flight += 1
+        start = time.perf_counter()
+        ok = False
+        try:
+            yield proxy
+            ok = True
+        finally:
+            with self._lock:
+                self._state(proxy).in_flight -= 1
+            self.record(proxy, ok, time.perf_counter() - start)
+
+    def call(self, key: Optional[str], fn: Callable[[Optional[str]], T],
+             attempts: int = PROXY_FAILOVER_ATTEMPTS) -> T:
+        """Run fn(proxy), failing over to another proxy if it raises"""
+        tried: List[Optional[str]] = []
+        while True:
+            try:
+                with self.session(key, exclude=tried) as proxy:
+                    tried.append(proxy)
+                    return fn(proxy)
+            except Exception as e:
+                if len(tried) >= min(attempts, len(self._states)):
+                    raise
+                logger.warning(f"⚠️ Request for {key} via {redact_proxy(proxy)} failed, failing over: {e}")
+
+    def stats(self) -> Dict[str, Any]:
+        """Per-proxy health for the status endpoint"""
+        now = time.time()
+        with self._lock:
+            proxies = [state.to_dict(now) for state in self._states]
+        return {
+            "total": len(proxies),
+            "healthy": sum(1 for p in proxies if not p["quarantined"]),
+            "proxies": proxies,
+        }
+
+    def _state(self, proxy: Optional[str]) -> Optional[_ProxyState]:
+        for state in self._states:
+            if state.proxy == proxy:
+                return state
+        return None
+
+    def _quarantine(self, state: _ProxyState, now: float):
+        if state.last_quarantined:
+            forgiven = int((now - state.last_quarantined) / self.strike_decay_seconds)
+            state.strikes = max(0, state.strikes - forgiven)
+        state.strikes += 1
+        duration = min(self.max_quarantine_seconds, self.quarantine_seconds * 2 ** (state.strikes - 1))
+        state.quarantined_until = now + duration
+        state.last_quarantined = now
+        state.quarantines += 1
+        # Come back on probation: one more failure right away re-quarantines it
+        state.failure_rate = self.failure_threshold * 0.9
+        state.consecutive_failures = 0
+        logger.warning(f"🚧 Quarantined proxy {redact_proxy(state.proxy)} for {duration:.0f}s (strike {state.strikes})")
+
+    @staticmethod
+    def _rendezvous(key: str, proxy: Optional[str]) -> int:
+        digest = hashlib.md5(f"{key.lower()}|{proxy}".encode('utf-8')).digest()
+        return int.from_bytes(digest[:8], 'big')
+
+
+_proxy_pool: Optional[ProxyPool] = None
+_proxy_pool_lock = threading.Lock()
+
+
+def get_proxy_pool() -> ProxyPool:
+    """Return the process-wide proxy pool built from the environment"""
+    global _proxy_pool
+    if _proxy_pool is None:
+        with _proxy_pool_lock:
+            if _proxy_pool is None:
+                _proxy_pool = ProxyPool()
+    return _proxy_pool
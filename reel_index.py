@@ -0,0 +1,120 @@
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from contextlib import closing
+from typing import List, Dict, Any, Optional, Iterable, Set
+
+logger = logging.getLogger(__name__)
+
+# Where /v1/fetch-instagram-post takes its reels from, relative to the index:
+#   live  - scrape the profile (default)
+#   delta - scrape only posts newer than the newest indexed one, the rest comes from the index
+#   index - answer from the index alone, without any network access
+REEL_SOURCES = ("live", "delta", "index")
+
+
+class ReelIndex:
+    """Persistent per-user index of scraped reels keyed by shortcode.
+
+    Every scrape (API or bulk) is written here with its metrics, so matching
+    can be answered from the index and later scrapes only need the delta.
+    """
+
+    def __init__(self, db_path: Optional[str] = None, enabled: Optional[bool] = None):
+        if enabled is None:
+            enabled = os.getenv('REEL_INDEX_ENABLED', 'True').lower() == 'true'
+        self.enabled = enabled
+        self.db_path = db_path or os.getenv('REEL_INDEX_DB', 'reel_index.db')
+        self._local = threading.local()
+        if self.enabled:
+            self._init_db()
+
+    def upsert(self, username: str, reels: Iterable[Dict[str, Any]]) -> int:
+        """Insert or refresh reels for username, returning how many were written"""
+        if not self.enabled:
+            return 0
+        now = time.time()
+        rows = [
+            (username.lower(), reel["shortcode"], json.dumps(reel), int(reel.get("posted_time") or 0), now, now)
+            for reel in reels if reel.get("shortcode")
+        ]
+        if not rows:
+            return 0
+        try:
+            conn = self._connection()
+            with conn:
+                conn.executemany("""
+                    INSERT INTO reels (username, shortcode, data, posted_time, first_seen, last_seen)
+                    VALUES (?, ?, ?, ?, ?, ?)
+                    ON CONFLICT (username, shortcode) DO UPDATE SET
+                        data = excluded.data,
+                        posted_time = excluded.posted_time,
+                        last_seen = excluded.last_seen
+                """, rows)
+        except sqlite3.Error as e:
+            logger.warning(f"⚠️ Could not write {len(rows)} reels for {username} to the reel index: {e}")
+            return 0
+        return len(rows)
+
+    def lookup(self, username: str, shortcodes: Iterable[str]) -> List[Dict[str, Any]]:
+        """Return indexed reels of username with the given shortcodes, newest first"""
+        shortcodes = list(dict.fromkeys(code for code in shortcodes if code))
+        if not self.enabled or not shortcodes:
+            return []
+        placeholders = ",".join("?" for _ in shortcodes)
+        rows = self._connection().execute(
+            f"SELECT data, last_seen FROM reels WHERE username = ? AND shortcode IN ({placeholders}) "
+            "ORDER BY posted_time DESC",
+            [username.lower(), *shortcodes]
+        ).fetchall()
+
+        reels = []
+        for data, last_seen in rows:
+            reel = json.loads(data)
+            reel["last_seen"] = last_seen
+            reels.append(reel)
+        return reels
+
+    def known_shortcodes(self, username: str) -> Set[str]:
+        """All shortcodes indexed for username"""
+        if not self.enabled:
+            return set()
+        rows = self._connection().execute(
+            "SELECT shortcode FROM reels WHERE username = ?", (username.lower(),)
+        ).fetchall()
+        return {row[0] for row in rows}
+
+    def stats(self) -> Dict[str, Any]:
+        """Index size for the status endpoint"""
+        if not self.enabled:
+            return {"enabled": False}
+        users, reels = self._connection().execute(
+            "SELECT COUNT(DISTINCT username), COUNT(*) FROM reels"
+        ).fetchone()
+        return {"enabled": True, "users": users, "reels": reels}
+
+    def _connection(self) -> sqlite3.Connection:
+        # One connection per thread; lookups must stay in the millisecond range
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=30)
+            self._local.conn = conn
+        return conn
+
+    def _init_db(self):
+        with closing(sqlite3.connect(self.db_path, timeout=30)) as conn, conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS reels (
+                    username TEXT NOT NULL,
+                    shortcode TEXT NOT NULL,
+                    data TEXT NOT NULL,
+                    posted_time INTEGER NOT NULL DEFAULT 0,
+                    first_seen REAL NOT NULL,
+                    last_seen REAL NOT NULL,
+                    PRIMARY KEY (username, shortcode)
+                )
+            """)
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_reels_username_posted ON reels (username, posted_time)")
@@ -0,0 +1,116 @@
+import os
+import logging
+from typing import Dict, Any, Iterable, Optional
+from urllib.parse import urlparse
+
+from playwright.async_api import Page, Route, Request, Response
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BLOCKED_TYPES = 'image,media,font,stylesheet'
+DEFAULT_ALLOWED_HOSTS = 'instagram.com,cdninstagram.com'
+
+
+def _csv_env(name: str, default: str) -> list:
+    return [item.strip().lower() for item in os.getenv(name, default).split(',') if item.strip()]
+
+
+class ResourceStats:
+    """Per-scrape counters of requests and bytes blocked vs. allowed"""
+
+    def __init__(self):
+        self.allowed_requests = 0
+        self.allowed_bytes = 0
+        self.blocked_requests = 0
+        self.blocked_by_type: Dict[str, int] = {}
+        self.blocked_third_party = 0
+
+    def merge(self, other: 'ResourceStats'):
+        self.allowed_requests += other.allowed_requests
+        self.allowed_bytes += other.allowed_bytes
+        self.blocked_requests += other.blocked_requests
+        self.blocked_third_party += other.blocked_third_party
+        for resource_type, count in other.blocked_by_type.items():
+            self.blocked_by_type[resource_type] = self.blocked_by_type.get(resource_type, 0) + count
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "allowed_requests": self.allowed_requests,
+            "allowed_bytes": self.allowed_bytes,
+            "blocked_requests": self.blocked_requests,
+            "blocked_third_party": self.blocked_third_party,
+            "blocked_by_type": dict(self.blocked_by_type),
+        }
+
+
+class ResourcePolicy:
+    """page.route-based policy that aborts requests the scraper never reads.
+
+    Media, fonts and stylesheets are aborted by default, as is every request
+    to a host outside the allowlist (subdomains of allowed hosts are allowed).
+    """
+
+    def __init__(self, blocked_types: Optional[Iterable[str]] = None,
+                 allowed_hosts: Optional[Iterable[str]] = None, enabled: Optional[bool] = None):
+        if enabled is None:
+            enabled = os.getenv('PLAYWRIGHT_BLOCK_RESOURCES', 'True').lower() == 'true'
+        self.enabled = enabled
+        self.blocked_types = set(blocked_types if blocked_types is not None
+                                 else _csv_env('PLAYWRIGHT_BLOCKED_RESOURCE_TYPES', DEFAULT_BLOCKED_TYPES))
+        self.allowed_hosts = set(allowed_hosts if allowed_hosts is not None
+                                 else _csv_env('PLAYWRIGHT_ALLOWED_HOSTS', DEFAULT_ALLOWED_HOSTS))
+
+    def allow_host(self, host: str):
+        """Add a host (e.g. a local stand-in origin) to the allowlist"""
+        if host:
+            self.allowed_hosts.add(host.lower())
+
+    def is_allowed_host(self, host: str) -> bool:
+        host = host.lower()
+        return any(host == allowed or host.endswith('.' + allowed) for allowed in self.allowed_hosts)
+
+    def block_reason(self, url: str, resource_type: str) -> Optional[str]:
+        """Return why a request should be aborted, or None to let it through"""
+        if not self.enabled:
+            return None
+        parsed = urlparse(url)
+        if parsed.scheme in ('data', 'blob'):
+            return None
+        if resource_type in self.blocked_types:
+            return resource_type
+        if not self.is_allowed_host(parsed.hostname or ''):
+            return 'third_party'
+        return None
+
+    async def attach(self, page: Page) -> ResourceStats:
+        """Install the routing policy on a page and return its live counters"""
+        stats = ResourceStats()
+        if not self.enabled:
+            return stats
+
+        async def handle_route(route: Route, request: Request):
+            reason = self.block_reason(request.url, request.resource_type)
+            if reason is None:
+                stats.allowed_requests += 1
+                await route.continue_()
+                return
+
+            stats.blocked_requests += 1
+            if reason == 'third_party':
+                stats.blocked_third_party += 1
+            else:
+                stats.blocked_by_type[reason] = stats.blocked_by_type.get(reason, 0) + 1
+            await route.abort()
+
+        def count_bytes(response: Response):
+            length = response.headers.get('content-length')
+            if length and length.isdigit():
+                stats.allowed_bytes += int(length)
+
+        await page.route('**/*', handle_route)
+        page.on('response', count_bytes)
+        return stats
+
+
+# Totals across all scrapes in this process, reported on /v1/status
+resource_totals = ResourceStats()
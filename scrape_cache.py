@@ -0,0 +1,261 @@
+import asyncio
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from contextlib import closing
+from typing import List, Dict, Any, Optional, Callable, Set, Tuple, Awaitable
+
+logger = logging.getLogger(__name__)
+
+ScrapeFn = Callable[[str, int], List[Dict[str, Any]]]
+AsyncScrapeFn = Callable[[str, int], Awaitable[List[Dict[str, Any]]]]
+
+
+class ScrapeCache:
+    """TTL/LRU cache of per-user scrape results, shared by both API servers.
+
+    Entries are keyed by (backend, username) and remember the max_posts they
+    were scraped with, so a larger cached scrape also answers smaller requests.
+    Entries older than `ttl` are served stale for up to `stale_ttl` more seconds
+    while a background refresh runs. An optional SQLite file keeps entries
+    across restarts.
+    """
+
+    def __init__(self, ttl: Optional[float] = None, stale_ttl: Optional[float] = None,
+                 max_entries: Optional[int] = None, db_path: Optional[str] = None,
+                 enabled: Optional[bool] = None):
+        if enabled is None:
+            enabled = os.getenv('SCRAPE_CACHE_ENABLED', 'True').lower() == 'true'
+        self.enabled = enabled
+        self.ttl = ttl if ttl is not None else float(os.getenv('SCRAPE_CACHE_TTL', 300))
+        self.stale_ttl = stale_ttl if stale_ttl is not None else float(os.getenv('SCRAPE_CACHE_STALE_TTL', 900))
+        self.max_entries = max_entries or int(os.getenv('SCRAPE_CACHE_MAX_ENTRIES', 1000))
+        self.db_path = db_path if db_path is not None else os.getenv('SCRAPE_CACHE_DB', '')
+
+        self._entries: 'OrderedDict[Tuple[str, str], Dict[str, Any]]' = OrderedDict()
+        self._lock = threading.Lock()
+        self._refreshing = set()
+        # Running async refreshes, referenced until done so they can't be garbage-collected
+        self._refresh_tasks: Set[asyncio.Task] = set()
+        self._stats = {"hits": 0, "stale_hits": 0, "misses": 0, "disk_hits": 0,
+                       "refreshes": 0, "refresh_errors": 0, "evictions": 0}
+
+        if self.enabled and self.db_path:
+            self._init_db()
+
+    def get_or_scrape(self, username: str, max_posts: int, backend: str, scrape_fn: ScrapeFn) -> List[Dict[str, Any]]:
+        """Return cached reels for username if they cover max_posts, otherwise scrape"""
+        if not self.enabled:
+            return scrape_fn(username, max_posts)
+
+        key = (backend, username.lower())
+        entry = self._lookup(key, max_posts)
+        if entry is not None:
+            age = time.time() - entry["fetched_at"]
+            if age <= self.ttl:
+                self._count("hits")
+                return entry["reels"][:max_posts]
+            if age <= self.ttl + self.stale_ttl:
+                self._count("stale_hits")
+                self._refresh_in_background(key, username, entry["max_posts"], scrape_fn)
+                return entry["reels"][:max_posts]
+
+        self._count("misses")
+        reels = scrape_fn(username, max_posts)
+        if reels:
+            self.put(backend, username, max_posts, reels)
+        return reels
+
+    async def get_or_scrape_async(self, username: str, max_posts: int, backend: str,
+                                  scrape_fn: AsyncScrapeFn) -> List[Dict[str, Any]]:
+        """get_or_scrape for coroutine scrapers; stale entries are refreshed in a task.
+
+        With a SQLite tier, lookups and stores run in a worker thread so disk
+        I/O does not block the event loop.
+        """
+        if not self.enabled:
+            return await scrape_fn(username, max_posts)
+
+        key = (backend, username.lower())
+        entry = await self._off_loop(self._lookup, key, max_posts)
+        if entry is not None:
+            age = time.time() - entry["fetched_at"]
+            if age <= self.ttl:
+                self._count("hits")
+                return entry["reels"][:max_posts]
+            if age <= self.ttl + self.stale_ttl:
+                self._count("stale_hits")
+                self._refresh_async(key, username, entry["max_posts"], scrape_fn)
+                return entry["reels"][:max_posts]
+
+        self._count("misses")
+        reels = await scrape_fn(username, max_posts)
+        if reels:
+            await self._off_loop(self.put, backend, username, max_posts, reels)
+        return reels
+
+    def get(self, username: str, max_posts: int, backend: str) -> Optional[List[Dict[str, Any]]]:
+        """Return fresh cached reels covering max_posts without scraping, or None"""
+        if not self.enabled:
+            return None
+        entry = self._lookup((backend, username.lower()), max_posts)
+        if entry is None or time.time() - entry["fetched_at"] > self.ttl:
+            return None
+        self._count("hits")
+        return entry["reels"][:max_posts]
+
+    def put(self, backend: str, username: str, max_posts: int, reels: List[Dict[str, Any]]):
+        """Store a scrape result in memory (and on disk when configured)"""
+        if not self.enabled:
+            return
+        key = (backend, username.lower())
+        entry = {"reels": reels, "max_posts": max_posts, "fetched_at": time.time()}
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self._stats["evictions"] += 1
+        if self.db_path:
+            self._db_put(key, entry)
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit/miss statistics for the status endpoint"""
+        with self._lock:
+            stats = dict(self._stats)
+            stats["entries"] = len(self._entries)
+        lookups = stats["hits"] + stats["stale_hits"] + stats["misses"]
+        stats["hit_rate"] = round((stats["hits"] + stats["stale_hits"]) / lookups, 3) if lookups else 0.0
+        stats.update({"enabled": self.enabled, "ttl": self.ttl, "stale_ttl": self.stale_ttl,
+                      "max_entries": self.max_entries, "persistent": bool(self.db_path)})
+        return stats
+
+    async def _off_loop(self, fn: Callable[..., Any], *args) -> Any:
+        """Call fn in a worker thread when it may touch the SQLite file"""
+        if self.db_path:
+            return await asyncio.to_thread(fn, *args)
+        return fn(*args)
+
+    def _count(self, name: str):
+        with self._lock:
+            self._stats[name] += 1
+
+    def _lookup(self, key: Tuple[str, str], max_posts: int) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+
+        if entry is None and self.db_path:
+            entry = self._db_get(key)
+            if entry is not None:
+                self._count("disk_hits")
+                with self._lock:
+                    self._entries[key] = entry
+                    self._entries.move_to_end(key)
+
+        if entry is None or entry["max_posts"] < max_posts:
+            return None
+        if time.time() - entry["fetched_at"] > self.ttl + self.stale_ttl:
+            return None
+        return entry
+
+    def _refresh_in_background(self, key: Tuple[str, str], username: str, max_posts: int, scrape_fn: ScrapeFn):
+        with self._lock:
+            if key in self._refreshing:
+                return
+            self._refreshing.add(key)
+
+        def refresh():
+            try:
+                reels = scrape_fn(username, max_posts)
+                if reels:
+                    self.put(key[0], username, max_posts, reels)
+                self._count("refreshes")
+            except Exception as e:
+                self._count("refresh_errors")
+                logger.warning(f"⚠️ Background cache refresh failed for {username}: {e}")
+            finally:
+                with self._lock:
+                    self._refreshing.discard(key)
+
+        threading.Thread(target=refresh, name=f"cache-refresh-{username}", daemon=True).start()
+
+    def _refresh_async(self, key: Tuple[str, str], username: str, max_posts: int, scrape_fn: AsyncScrapeFn):
+        with self._lock:
+            if key in self._refreshing:
+                return
+            self._refreshing.add(key)
+
+        async def refresh():
+            try:
+                reels = await scrape_fn(username, max_posts)
+                if reels:
+                    await self._off_loop(self.put, key[0], username, max_posts, reels)
+                self._count("refreshes")
+            except Exception as e:
+                self._count("refresh_errors")
+                logger.warning(f"⚠️ Background cache refresh failed for {username}: {e}")
+            finally:
+                with self._lock:
+                    self._refreshing.discard(key)
+
+        task = asyncio.ensure_future(refresh())
+        self._refresh_tasks.add(task)
+        task.add_done_callback(self._refresh_done)
+
+    def _refresh_done(self, task: asyncio.Task):
+        self._refresh_tasks.discard(task)
+        if task.cancelled():
+            logger.warning("⚠️ Background cache refresh was cancelled")
+        elif task.exception() is not None:
+            logger.warning(f"⚠️ Background cache refresh failed: {task.exception()}")
+
+    # ------------------------------------------------------------------
+    # SQLite tier
+    # ------------------------------------------------------------------
+
+    def _connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(self.db_path, timeout=10)
+
+    def _init_db(self):
+        with closing(self._connect()) as conn, conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS scrape_cache (
+                    backend TEXT NOT NULL,
+                    username TEXT NOT NULL,
+                    max_posts INTEGER NOT NULL,
+                    fetched_at REAL NOT NULL,
+                    reels TEXT NOT NULL,
+                    PRIMARY KEY (backend, username)
+                )
+            """)
+
+    def _db_get(self, key: Tuple[str, str]) -> Optional[Dict[str, Any]]:
+        try:
+            with closing(self._connect()) as conn, conn:
+                row = conn.execute(
+                    "SELECT max_posts, fetched_at, reels FROM scrape_cache WHERE backend = ? AND username = ?",
+                    key
+                ).fetchone()
+        except sqlite3.Error as e:
+            logger.warning(f"⚠️ Could not read scrape cache from {self.db_path}: {e}")
+            return None
+        if row is None:
+            return None
+        return {"max_posts": row[0], "fetched_at": row[1], "reels": json.loads(row[2])}
+
+    def _db_put(self, key: Tuple[str, str], entry: Dict[str, Any]):
+        try:
+            with closing(self._connect()) as conn, conn:
+                conn.execute(
+                    "INSERT OR REPLACE INTO scrape_cache (backend, username, max_posts, fetched_at, reels) "
+                    "VALUES (?, ?, ?, ?, ?)",
+                    (key[0], key[1], entry["max_posts"], entry["fetched_at"], json.dumps(entry["reels"]))
+                )
+        except sqlite3.Error as e:
+            logger.warning(f"⚠️ Could not write scrape cache to {self.db_path}: {e}")
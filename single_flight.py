@@ -0,0 +1,106 @@
+import asyncio
+import threading
+from typing import List, Dict, Any, Callable, Optional, Tuple, Awaitable
+
+ScrapeFn = Callable[[str, int], List[Dict[str, Any]]]
+AsyncScrapeFn = Callable[[str, int], Awaitable[List[Dict[str, Any]]]]
+
+
+class _Flight:
+    def __init__(self, max_posts: int):
+        self.max_posts = max_posts
+        self.done = threading.Event()
+        self.result: Optional[List[Dict[str, Any]]] = None
+        self.error: Optional[BaseException] = None
+
+
+class SingleFlight:
+    """Coalesce concurrent scrapes of the same profile into one.
+
+    A request joins an in-flight scrape of the same (backend, username) when
+    that scrape covers at least as many posts; otherwise it starts its own,
+    which later requests can then join. Every caller gets the shared result
+    (or exception) trimmed to its own max_posts.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._flights: Dict[Tuple[str, str], _Flight] = {}
+        self._stats = {"scrapes": 0, "coalesced": 0}
+
+    def scrape(self, username: str, max_posts: int, backend: str, scrape_fn: ScrapeFn) -> List[Dict[str, Any]]:
+        key = (backend, username.lower())
+        with self._lock:
+            flight = self._flights.get(key)
+            if flight is not None and flight.max_posts >= max_posts:
+                self._stats["coalesced"] += 1
+                leader = False
+            else:
+                flight = _Flight(max_posts)
+                self._flights[key] = flight
+                self._stats["scrapes"] += 1
+                leader = True
+
+        if leader:
+            try:
+                flight.result = scrape_fn(username, max_posts)
+            except BaseException as e:
+                flight.error = e
+            finally:
+                with self._lock:
+                    if self._flights.get(key) is flight:
+                        del self._flights[key]
+                flight.done.set()
+        else:
+            flight.done.wait()
+
+        if flight.error is not None:
+            raise flight.error
+        return flight.result[:max_posts] if flight.result else flight.result
+
+    def stats(self) -> Dict[str, Any]:
+        """Coalescing statistics for the status endpoint"""
+        with self._lock:
+            stats = dict(self._stats)
+            stats["in_flight"] = len(self._flights)
+        return stats
+
+
+class AsyncSingleFlight:
+    """SingleFlight for coroutine scrapers sharing one event loop.
+
+    Same joining rules as SingleFlight; followers await the leader's task. A
+    cancelled follower does not cancel the shared scrape.
+    """
+
+    def __init__(self):
+        self._flights: Dict[Tuple[str, str], Tuple[int, asyncio.Task]] = {}
+        self._stats = {"scrapes": 0, "coalesced": 0}
+
+    async def scrape(self, username: str, max_posts: int, backend: str,
+                     scrape_fn: AsyncScrapeFn) -> List[Dict[str, Any]]:
+        key = (backend, username.lower())
+        flight = self._flights.get(key)
+        if flight is not None and flight[0] >= max_posts:
+            self._stats["coalesced"] += 1
+            task = flight[1]
+        else:
+            task = asyncio.ensure_future(scrape_fn(username, max_posts))
+            self._flights[key] = (max_posts, task)
+            self._stats["scrapes"] += 1
+            task.add_done_callback(lambda done: self._forget(key, done))
+
+        result = await asyncio.shield(task)
+        return result[:max_posts] if result else result
+
+    def _forget(self, key: Tuple[str, str], task: asyncio.Task):
+        # A larger scrape may have replaced this flight in the meantime
+        flight = self._flights.get(key)
+        if flight is not None and flight[1] is task:
+            del self._flights[key]
+
+    def stats(self) -> Dict[str, Any]:
+        """Coalescing statistics for the status endpoint"""
+        stats = dict(self._stats)
+        stats["in_flight"] = len(self._flights)
+        return stats
@@ -0,0 +1,51 @@
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Any, Iterator, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class StartupReport:
+    """Wall-clock cost of each import and initialization phase of an app.
+
+    Phases wrapped before ready() make up the cold start; phases recorded
+    later are lazy initializations (scrapers, browser) paid by the warmup
+    request or the first request that needs them.
+    """
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.phases: Dict[str, float] = {}
+        self.lazy_phases: Dict[str, float] = {}
+        self.ready_ms: Optional[float] = None
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            ms = round((time.perf_counter() - start) * 1000, 1)
+            with self._lock:
+                if self.ready_ms is None:
+                    self.phases[name] = ms
+                else:
+                    self.lazy_phases[name] = ms
+                    logger.info(f"⏱️ Lazy init {name} took {ms}ms")
+
+    def ready(self):
+        """Mark the app as imported and log the cold start breakdown"""
+        self.ready_ms = round((time.perf_counter() - self.started) * 1000, 1)
+        logger.info(f"⏱️ Started in {self.ready_ms}ms: " +
+                    ", ".join(f"{name}={ms}ms" for name, ms in self.phases.items()))
+
+    def to_dict(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "ready_ms": self.ready_ms,
+                "phases_ms": dict(self.phases),
+                "lazy_phases_ms": dict(self.lazy_phases),
+            }
@@ -0,0 +1,153 @@
+import os
+import time
+from typing import List, Dict, Any, Optional, Iterable, Iterator, Callable, Mapping, Set, AsyncIterable, AsyncIterator, Awaitable
+
+TARGET_SCAN_MAX_POSTS = int(os.getenv('TARGET_SCAN_MAX_POSTS', 200))
+TARGET_SCAN_CUTOFF_DAYS = os.getenv('TARGET_SCAN_CUTOFF_DAYS')
+# Instagram lets a profile pin up to 3 posts to the top of its feed, so the
+# first few reels can be older than everything after them
+PINNED_SLOTS = 3
+
+
+def parse_scan_options(args: Mapping[str, Any]) -> Optional[Dict[str, Any]]:
+    """Read target-aware scan options from query parameters.
+
+    Returns None unless scan=targets was requested.
+    """
+    if str(args.get('scan', '')).lower() != 'targets':
+        return None
+
+    max_depth = int(args.get('max_depth', TARGET_SCAN_MAX_POSTS))
+    cutoff_days = args.get('cutoff_days', TARGET_SCAN_CUTOFF_DAYS)
+    cutoff = int(time.time() - float(cutoff_days) * 86400) if cutoff_days else None
+    return {"max_depth": min(max_depth, TARGET_SCAN_MAX_POSTS), "cutoff": cutoff}
+
+
+def iter_reel_pages(scraper, username: str, max_retries: int = 10) -> Iterator[List[Dict[str, Any]]]:
+    """Yield a user's reels one API page at a time, newest first.
+
+    Uses the same InstagramAPI calls and Extractor as ReelScraper.get_user_reels,
+    but lets the caller stop paginating at any point.
+    """
+    max_id = None
+    while True:
+        response = None
+        for _ in range(max_retries):
+            if max_id is None:
+                response = scraper.api.get_user_first_reels(username)
+            else:
+                response = scraper.api.get_user_paginated_reels(max_id, username)
+            if response is not None:
+                break
+        if response is None:
+            raise Exception(f"Failed to fetch reels for '{username}' after {max_retries} retries.")
+
+        page = []
+        for item in response.get("items", []):
+            reel_info = scraper.extractor.extract_reel_info(item.get("media", {}))
+            if reel_info:
+                page.append(reel_info)
+        yield page
+
+        paging_info = response.get("paging_info", {})
+        if not paging_info.get("more_available") or not paging_info.get("max_id"):
+            return
+        max_id = paging_info["max_id"]
+
+
+def iter_growing_scrapes(scrape_fn: Callable[[str, int], List[Dict[str, Any]]], username: str,
+                         start: int, max_depth: int) -> Iterator[List[Dict[str, Any]]]:
+    """Page through a scraper that only takes max_posts by doubling it each round.
+
+    Each round yields only the reels not seen in the previous one and the scan
+    ends when a round brings nothing new.
+    """
+    seen = 0
+    count = max(1, min(start, max_depth))
+    while True:
+        reels = scrape_fn(username, count)
+        if len(reels) <= seen:
+            return
+        yield reels[seen:]
+        seen = len(reels)
+        if count >= max_depth or len(reels) < count:
+            return
+        count = min(count * 2, max_depth)
+
+
+async def aiter_growing_scrapes(scrape_fn: Callable[[str, int], Awaitable[List[Dict[str, Any]]]], username: str,
+                                start: int, max_depth: int) -> AsyncIterator[List[Dict[str, Any]]]:
+    """Async iter_growing_scrapes for coroutine scrapers"""
+    seen = 0
+    count = max(1, min(start, max_depth))
+    while True:
+        reels = await scrape_fn(username, count)
+        if len(reels) <= seen:
+            return
+        yield reels[seen:]
+        seen = len(reels)
+        if count >= max_depth or len(reels) < count:
+            return
+        count = min(count * 2, max_depth)
+
+
+class _TargetScan:
+    """Running state of one scan; add() returns a stop reason once the scan should end"""
+
+    def __init__(self, target_shortcodes: Set[str], max_depth: int, cutoff: Optional[int],
+                 known_shortcodes: Optional[Set[str]]):
+        self.target_shortcodes = target_shortcodes
+        self.max_depth = max_depth
+        self.cutoff = cutoff
+        self.known_shortcodes = known_shortcodes
+        self.reels: List[Dict[str, Any]] = []
+        self.remaining = set(target_shortcodes)
+
+    def add(self, reel: Dict[str, Any]) -> Optional[str]:
+        self.reels.append(reel)
+        self.remaining.discard(reel.get("shortcode"))
+
+        past_pinned = len(self.reels) > PINNED_SLOTS
+        if self.target_shortcodes and not self.remaining:
+            return "all_found"
+        if len(self.reels) >= self.max_depth:
+            return "max_depth"
+        if self.known_shortcodes and past_pinned and reel.get("shortcode") in self.known_shortcodes:
+            return "reached_index"
+        if self.cutoff and past_pinned and 0 < reel.get("posted_time", 0) < self.cutoff:
+            return "cutoff"
+        return None
+
+    def result(self, stop_reason: str) -> Dict[str, Any]:
+        return {"reels": self.reels, "depth": len(self.reels), "stop_reason": stop_reason, "unmatched": self.remaining}
+
+
+def scan_for_targets(pages: Iterable[List[Dict[str, Any]]], target_shortcodes: Set[str],
+                     max_depth: int, cutoff: Optional[int] = None,
+                     known_shortcodes: Optional[Set[str]] = None) -> Dict[str, Any]:
+    """Consume reel pages until every target shortcode is found.
+
+    Also stops at max_depth reels, once reels are older than cutoff (a Unix
+    timestamp) or, for delta scrapes, on reaching a reel in known_shortcodes.
+    Returns the reels seen, how deep the scan went and why it stopped.
+    """
+    scan = _TargetScan(target_shortcodes, max_depth, cutoff, known_shortcodes)
+    for page in pages:
+        for reel in page:
+            stop_reason = scan.add(reel)
+            if stop_reason:
+                return scan.result(stop_reason)
+    return scan.result("exhausted")
+
+
+async def ascan_for_targets(pages: AsyncIterable[List[Dict[str, Any]]], target_shortcodes: Set[str],
+                            max_depth: int, cutoff: Optional[int] = None,
+                            known_shortcodes: Optional[Set[str]] = None) -> Dict[str, Any]:
+    """scan_for_targets over an async iterable of pages"""
+    scan = _TargetScan(target_shortcodes, max_depth, cutoff, known_shortcodes)
+    async for page in pages:
+        for reel in page:
+            stop_reason = scan.add(reel)
+            if stop_reason:
+                return scan.result(stop_reason)
+    return scan.result("exhausted")
@@ -0,0 +1,81 @@
+import pytest
+
+from adaptive_scheduler import AdaptiveScheduler, AIMDLimiter, ThrottleAwareInstagramAPI, ThrottledError, backoff_delay
+from fake_instagram import make_reels
+from post_lookup import fetch_post
+
+
+def test_limit_grows_by_about_one_per_round():
+    limiter = AIMDLimiter(initial=2, minimum=1, maximum=4)
+    for _ in range(2):
+        limiter.release(limiter.acquire())
+    assert limiter.limit == pytest.approx(2 + 1 / 2 + 1 / 2.5)
+
+    for _ in range(50):
+        limiter.release(limiter.acquire())
+    assert limiter.limit == 4
+
+
+def test_a_burst_of_throttles_from_one_round_cuts_once():
+    limiter = AIMDLimiter(initial=8, minimum=1, maximum=10)
+    round_started = [limiter.acquire() for _ in range(4)]
+    assert limiter.in_flight == 4
+
+    for started in round_started:
+        limiter.release(started, throttled=True)
+    assert limiter.limit == 4
+    assert limiter.in_flight == 0
+
+    # A request started after the cut is a fresh signal
+    limiter.release(limiter.acquire(), throttled=True)
+    assert limiter.limit == 2
+    for _ in range(3):
+        limiter.release(limiter.acquire(), throttled=True)
+    assert limiter.limit == 1
+
+
+def test_backoff_is_jittered_below_a_capped_exponential():
+    for attempt, ceiling in [(1, 2), (2, 4), (4, 16), (10, 60)]:
+        delays = [backoff_delay(attempt, base=2, cap=60) for _ in range(200)]
+        assert all(0 <= delay <= ceiling for delay in delays)
+        assert max(delays) > ceiling / 2
+
+
+def test_429s_from_instagram_raise_throttled_error(fake_instagram):
+    fake, base_url = fake_instagram
+    fake.register("nasa")
+    code = make_reels("nasa", 1)[0]["code"]
+    api = ThrottleAwareInstagramAPI(timeout=5, base_url=base_url)
+
+    assert fetch_post(api, code)["shortcode"] == code
+
+    fake.throttle_prob = 1
+    with pytest.raises(ThrottledError, match="HTTP 429"):
+        fetch_post(api, code)
+    assert fake.counts["throttled"] == 1
+
+
+def test_scheduler_retries_throttled_accounts_and_shrinks_concurrency(fake_instagram):
+    fake, base_url = fake_instagram
+    fake.register("nasa")
+    code = make_reels("nasa", 1)[0]["code"]
+    scheduler = AdaptiveScheduler(rate=100, burst=10, max_concurrency=4, initial_concurrency=4,
+                                  max_attempts=3, base_delay=0)
+    api = ThrottleAwareInstagramAPI(timeout=5, bucket=scheduler.bucket, base_url=base_url)
+    fake.throttle_prob = 1
+
+    def lookup():
+        # Instagram recovers after the second 429
+        if fake.counts["throttled"] == 2:
+            fake.throttle_prob = 0
+        return fetch_post(api, code)
+
+    assert scheduler.call("nasa", lookup)["shortcode"] == code
+    stats = scheduler.stats()
+    assert (stats["succeeded"], stats["throttled"], stats["retries"], stats["attempts"]) == (1, 2, 2, 3)
+    assert stats["concurrency_limit"] < 4
+
+    fake.throttle_prob = 1
+    with pytest.raises(ThrottledError):
+        scheduler.call("nasa", lambda: fetch_post(api, code))
+    assert scheduler.stats()["failed"] == 1
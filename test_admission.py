@@ -0,0 +1,172 @@
+import asyncio
+import json
+import threading
+import time
+
+import pytest
+
+import app as flask_app
+from admission import AdmissionGate, AsyncAdmissionGate, AdmissionRejected, client_key
+
+
+def hold(gate, client, release, order=None, patient=False):
+    """Thread that takes a slot on behalf of client and keeps it until release is set"""
+    def run():
+        try:
+            with gate.admit(client, patient=patient):
+                if order is not None:
+                    order.append(client)
+                release.wait(5)
+        except AdmissionRejected:
+            if order is not None:
+                order.append(f"rejected {client}")
+
+    thread = threading.Thread(target=run, daemon=True)
+    thread.start()
+    return thread
+
+
+def wait_until(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "condition not met in time"
+        time.sleep(0.005)
+
+
+def test_client_key_prefers_client_id_then_forwarded_address():
+    assert client_key({"X-Client-Id": " team-a ", "X-Forwarded-For": "1.2.3.4"}, "10.0.0.1") == "team-a"
+    assert client_key({"X-Forwarded-For": "1.2.3.4, 10.0.0.2"}, "10.0.0.1") == "1.2.3.4"
+    assert client_key({}, "10.0.0.1") == "10.0.0.1"
+    assert client_key({}, None) == "anonymous"
+
+
+def test_freed_slots_go_round_robin_across_clients():
+    gate = AdmissionGate(max_concurrent=1, max_queue=8, max_queue_per_client=4, max_wait=5)
+    busy = threading.Event()
+    order = []
+    hold(gate, "busy", busy)
+    wait_until(lambda: gate.active == 1)
+
+    # "greedy" queues three requests before "polite" queues one
+    release = threading.Event()
+    threads = []
+    for client in ("greedy", "greedy", "greedy", "polite"):
+        threads.append(hold(gate, client, release, order))
+        wait_until(lambda: gate.queued == len(threads))
+
+    release.set()
+    busy.set()
+    for thread in threads:
+        thread.join(5)
+    assert order == ["greedy", "polite", "greedy", "greedy"]
+    assert gate.stats()["admitted"] == 5
+
+
+def test_full_queues_reject_with_retry_after():
+    gate = AdmissionGate(max_concurrent=1, max_queue=2, max_queue_per_client=1, max_wait=5)
+    release = threading.Event()
+    try:
+        hold(gate, "a", release)
+        wait_until(lambda: gate.active == 1)
+        hold(gate, "a", release)
+        wait_until(lambda: gate.queued == 1)
+
+        # Per-client limit
+        with pytest.raises(AdmissionRejected) as rejected:
+            with gate.admit("a"):
+                pass
+        assert rejected.value.retry_after >= 1
+
+        hold(gate, "b", release)
+        wait_until(lambda: gate.queued == 2)
+        # Whole queue
+        with pytest.raises(AdmissionRejected):
+            with gate.admit("c"):
+                pass
+    finally:
+        release.set()
+    assert gate.stats()["rejected"] == 2
+
+
+def test_waiting_longer_than_max_wait_is_rejected():
+    gate = AdmissionGate(max_concurrent=1, max_queue=4, max_queue_per_client=4, max_wait=0.05)
+    release = threading.Event()
+    try:
+        hold(gate, "a", release)
+        wait_until(lambda: gate.active == 1)
+        with pytest.raises(AdmissionRejected):
+            with gate.admit("b"):
+                pass
+    finally:
+        release.set()
+    stats = gate.stats()
+    assert (stats["timed_out"], stats["queued"]) == (1, 0)
+
+
+def test_patient_requests_skip_the_client_limit_and_max_wait():
+    gate = AdmissionGate(max_concurrent=1, max_queue=8, max_queue_per_client=1, max_wait=0.05)
+    release = threading.Event()
+    order = []
+    hold(gate, "busy", release)
+    wait_until(lambda: gate.active == 1)
+
+    done = threading.Event()
+    done.set()
+    threads = [hold(gate, "batch", done, order, patient=True) for _ in range(3)]
+    wait_until(lambda: gate.queued == 3)
+    time.sleep(0.1)
+    release.set()
+    for thread in threads:
+        thread.join(5)
+    assert order == ["batch", "batch", "batch"]
+    assert gate.stats()["rejected"] == 0
+
+
+def test_async_gate_times_out_and_hands_back_cancelled_slots():
+    gate = AsyncAdmissionGate(max_concurrent=1, max_queue=4, max_queue_per_client=4, max_wait=0.05)
+
+    async def main():
+        release = asyncio.Event()
+
+        async def holder():
+            async with gate.admit("a"):
+                await release.wait()
+
+        holding = asyncio.ensure_future(holder())
+        await asyncio.sleep(0.01)
+        with pytest.raises(AdmissionRejected):
+            async with gate.admit("b"):
+                pass
+
+        waiting = asyncio.ensure_future(gate.admit("c", patient=True).__aenter__())
+        await asyncio.sleep(0.01)
+        waiting.cancel()
+        release.set()
+        await holding
+        await asyncio.gather(waiting, return_exceptions=True)
+
+    asyncio.run(main())
+    stats = gate.stats()
+    assert (stats["active"], stats["queued"], stats["timed_out"]) == (0, 0, 1)
+
+
+def test_batch_never_rejects_its_own_items(monkeypatch):
+    # Fewer slots and per-client queue places than the batch has items, and a short max_wait
+    monkeypatch.setattr(flask_app, "admission", AdmissionGate(max_concurrent=1, max_queue=16,
+                                                              max_queue_per_client=1, max_wait=0.05))
+    monkeypatch.setattr(flask_app.job_queue, "start", lambda: None)
+
+    def fetch_and_match(username, post_links, max_posts, **options):
+        time.sleep(0.05)
+        return {"username": username, "total_reels_scraped": 1, "total_target_links": len(post_links),
+                "matched_posts_count": 0, "matched_posts": []}
+
+    monkeypatch.setattr(flask_app, "fetch_and_match", fetch_and_match)
+    items = [{"username": f"user{i}", "post_links": ["https://www.instagram.com/reel/ABC/"]} for i in range(5)]
+
+    response = flask_app.app.test_client().post("/v1/fetch-instagram-posts/batch", json={"items": items})
+    lines = [json.loads(line) for line in response.data.splitlines()]
+
+    assert sorted(line["index"] for line in lines) == [0, 1, 2, 3, 4]
+    assert all(line["success"] for line in lines), lines
+    assert flask_app.admission.stats()["rejected"] == 0
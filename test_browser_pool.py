@@ -0,0 +1,126 @@
+import asyncio
+
+import pytest
+
+import browser_pool
+from browser_pool import BrowserPool
+from proxy_pool import ProxyPool
+
+
+class StubContext:
+    def __init__(self, browser, proxy):
+        self.browser = browser
+        self.proxy = proxy
+        self.pages = []
+
+    async def clear_cookies(self):
+        pass
+
+    async def close(self):
+        self.browser.open.discard(self)
+
+
+class StubBrowser:
+    """Stands in for Chromium, tracking how many contexts are open at once"""
+
+    def __init__(self):
+        self.open = set()
+        self.peak = 0
+
+    def is_connected(self):
+        return True
+
+    def on(self, event, callback):
+        pass
+
+    async def new_context(self, **options):
+        # Creating a context takes a moment, so concurrent borrowers interleave
+        await asyncio.sleep(0.001)
+        context = StubContext(self, options.get('proxy'))
+        self.open.add(context)
+        self.peak = max(self.peak, len(self.open))
+        return context
+
+    async def close(self):
+        self.open.clear()
+
+
+class StubPlaywright:
+    def __init__(self):
+        self.chromium = self
+        self.browser = StubBrowser()
+
+    async def launch(self, **options):
+        return self.browser
+
+    async def start(self):
+        return self
+
+    async def stop(self):
+        pass
+
+
+@pytest.fixture
+def stub_playwright(monkeypatch):
+    playwright = StubPlaywright()
+    monkeypatch.setattr(browser_pool, "async_playwright", lambda: playwright)
+    return playwright
+
+
+def test_contexts_stay_within_size_with_many_proxies(stub_playwright):
+    proxies = ProxyPool([f"10.0.0.{i}:8080" for i in range(10)])
+    pool = BrowserPool(size=3, acquire_timeout=5, health_interval=60, proxy_pool=proxies)
+
+    async def borrow(key):
+        async with pool.context(key):
+            await asyncio.sleep(0.002)
+
+    async def main():
+        await pool.start()
+        await asyncio.gather(*(borrow(f"user{i}") for i in range(60)))
+        stats = pool.stats()
+        await pool.close()
+        return stats
+
+    stats = asyncio.run(main())
+    assert stub_playwright.browser.peak == 3
+    assert stats["contexts"] == 3
+    assert stats["borrowed_total"] == 60
+    assert stats["retired_total"] > 0
+
+
+def test_checkout_waits_for_a_context_when_the_full_pool_has_none_idle(stub_playwright):
+    pool = BrowserPool(size=2, acquire_timeout=5, health_interval=60)
+
+    async def main():
+        await pool.start()
+        # As during a relaunch: every context counted, none idle yet
+        landing = list(pool._idle[None])
+        pool._idle[None].clear()
+
+        async def land():
+            await asyncio.sleep(0.1)
+            pool._idle[None].extend(landing)
+
+        asyncio.ensure_future(land())
+        context = await pool._checkout(None)
+        await pool.close()
+        return context, landing
+
+    context, landing = asyncio.run(main())
+    assert context in landing
+
+
+def test_checkout_times_out_when_no_context_lands(stub_playwright):
+    pool = BrowserPool(size=1, acquire_timeout=0.2, health_interval=60)
+
+    async def main():
+        await pool.start()
+        pool._idle[None].clear()
+        try:
+            await pool._checkout(None)
+        finally:
+            await pool.close()
+
+    with pytest.raises(asyncio.TimeoutError):
+        asyncio.run(main())
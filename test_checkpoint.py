@@ -0,0 +1,88 @@
+import json
+import time
+
+from checkpoint import CheckpointJournal
+
+
+def reels(tag):
+    return [{"shortcode": f"{tag}-{i}"} for i in range(3)]
+
+
+def journal_lines(path):
+    with open(path, 'rb') as f:
+        return f.read().splitlines(keepends=True)
+
+
+def test_finished_accounts_are_read_back_after_a_restart(tmp_path):
+    path = str(tmp_path / "run.journal.jsonl")
+    with CheckpointJournal(path) as journal:
+        journal.record_success("nasa", 10, reels("nasa"))
+        journal.record_failure("spacex", 10, "timed out")
+
+    journal = CheckpointJournal(path)
+    try:
+        assert journal.is_done("nasa", 10)
+        assert journal.is_done("nasa", 5)
+        # More posts than were journaled, a failure, or an unknown account are scraped again
+        assert not journal.is_done("nasa", 20)
+        assert not journal.is_done("spacex", 10)
+        assert not journal.is_done("esa", 10)
+        assert journal.load_reels("nasa") == reels("nasa")
+        assert journal.stats() == {"done": 1, "failed": 1}
+        assert journal.compacted == 0
+    finally:
+        journal.close()
+
+
+def test_refreshed_accounts_are_not_done(tmp_path):
+    path = str(tmp_path / "run.journal.jsonl")
+    with CheckpointJournal(path) as journal:
+        journal.record_success("nasa", 10, reels("nasa"))
+
+    with CheckpointJournal(path, refresh=[" nasa "]) as journal:
+        assert not journal.is_done("nasa", 10)
+
+
+def test_superseded_and_truncated_lines_are_compacted(tmp_path):
+    path = str(tmp_path / "run.journal.jsonl")
+    with CheckpointJournal(path) as journal:
+        journal.record_failure("nasa", 10, "timed out")
+        journal.record_success("spacex", 10, reels("spacex"))
+        journal.record_success("nasa", 10, reels("nasa"))
+    # A crash mid-write leaves a partial last line
+    with open(path, 'ab') as f:
+        f.write(b'{"username": "esa", "status": "do')
+
+    journal = CheckpointJournal(path)
+    try:
+        assert journal.compacted == 2
+        assert journal.is_done("nasa", 10)
+        assert journal.load_reels("nasa") == reels("nasa")
+        assert journal.load_reels("spacex") == reels("spacex")
+        assert not journal.is_done("esa", 10)
+
+        # Appending after compaction keeps offsets valid
+        journal.record_success("esa", 10, reels("esa"))
+        assert journal.load_reels("esa") == reels("esa")
+    finally:
+        journal.close()
+
+    usernames = [json.loads(line)["username"] for line in journal_lines(path)]
+    assert usernames == ["spacex", "nasa", "esa"]
+
+
+def test_stale_entries_expire_and_are_dropped(tmp_path, monkeypatch):
+    path = str(tmp_path / "run.journal.jsonl")
+    with CheckpointJournal(path) as journal:
+        journal.record_success("nasa", 10, reels("nasa"))
+
+    later = time.time() + 7200
+    monkeypatch.setattr("checkpoint.time.time", lambda: later)
+
+    with CheckpointJournal(path, max_age=3 * 3600) as journal:
+        assert journal.is_done("nasa", 10)
+
+    with CheckpointJournal(path, max_age=3600) as journal:
+        assert journal.compacted == 1
+        assert not journal.is_done("nasa", 10)
+    assert journal_lines(path) == []
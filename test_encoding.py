@@ -0,0 +1,58 @@
+import gzip
+import json
+
+import pytest
+
+import encoding
+from encoding import encode_body, encode_json, negotiate_encoding
+
+
+@pytest.fixture
+def zstd_and_gzip(monkeypatch):
+    monkeypatch.setattr(encoding, "SUPPORTED_ENCODINGS", ("zstd", "gzip"))
+
+
+@pytest.mark.parametrize("accept_encoding, expected", [
+    ("", None),
+    ("identity", None),
+    ("gzip", "gzip"),
+    ("GZIP, deflate", "gzip"),
+    ("br, zstd, gzip", "zstd"),
+    # The client's q-values beat our order of preference
+    ("zstd;q=0.5, gzip", "gzip"),
+    ("zstd;q=0, gzip;q=0", None),
+    ("*", "zstd"),
+    ("*;q=0.1, gzip;q=0.5", "gzip"),
+    ("gzip;q=oops", None),
+    (" , gzip ; q=0.8 ", "gzip"),
+])
+def test_negotiation(zstd_and_gzip, accept_encoding, expected):
+    assert negotiate_encoding(accept_encoding) == expected
+
+
+def test_encode_json_is_compact_utf8():
+    body = encode_json({"username": "café", "ok": True, 1: [1, 2]})
+    assert json.loads(body) == {"username": "café", "ok": True, "1": [1, 2]}
+    assert b": " not in body and b", " not in body
+    assert "café".encode("utf-8") in body
+
+
+def test_small_bodies_are_sent_uncompressed(monkeypatch):
+    monkeypatch.setattr(encoding, "RESPONSE_COMPRESS_MIN_BYTES", 1024)
+    body, headers = encode_body({"success": True}, "gzip")
+    assert json.loads(body) == {"success": True}
+    assert headers == {"Vary": "Accept-Encoding"}
+
+
+def test_large_bodies_are_compressed_when_accepted(monkeypatch):
+    monkeypatch.setattr(encoding, "RESPONSE_COMPRESS_MIN_BYTES", 100)
+    monkeypatch.setattr(encoding, "SUPPORTED_ENCODINGS", ("gzip",))
+    payload = [{"shortcode": f"C{i}", "views": i} for i in range(50)]
+
+    body, headers = encode_body(payload, "gzip, br")
+    assert headers == {"Vary": "Accept-Encoding", "Content-Encoding": "gzip"}
+    assert json.loads(gzip.decompress(body)) == payload
+
+    body, headers = encode_body(payload, "br")
+    assert "Content-Encoding" not in headers
+    assert json.loads(body) == payload
@@ -0,0 +1,94 @@
+import threading
+from concurrent.futures import Future
+
+import pytest
+
+from hedging import HedgedScraper
+
+REELS = [{"shortcode": "ABC"}]
+# Short enough to keep the tests fast, long enough for a "slow" primary to miss it
+HEDGE_DELAY = 0.05
+
+
+class ScrapeFailed(Exception):
+    pass
+
+
+def backend(outcome, after=0.0):
+    """StartFn whose scrape returns reels, returns empty or raises, after some seconds"""
+    def start(username, max_posts):
+        future = Future()
+
+        def finish():
+            if not future.set_running_or_notify_cancel():
+                return
+            if outcome == "error":
+                future.set_exception(ScrapeFailed(username))
+            else:
+                future.set_result(REELS if outcome == "reels" else [])
+
+        if after:
+            threading.Timer(after, finish).start()
+        else:
+            finish()
+        return future
+    return start
+
+
+def hedged(primary, hedge):
+    return HedgedScraper(("primary", primary), ("hedge", hedge),
+                         initial_delay=HEDGE_DELAY, min_samples=1000)
+
+
+@pytest.mark.parametrize("primary_outcome, primary_after, reason", [
+    ("error", 4 * HEDGE_DELAY, "slow"),
+    ("empty", 4 * HEDGE_DELAY, "slow"),
+    ("error", 0.0, "error"),
+    ("empty", 0.0, "empty"),
+])
+@pytest.mark.parametrize("hedge_outcome", ["error", "empty"])
+def test_no_reels_from_either_backend(primary_outcome, primary_after, reason, hedge_outcome):
+    scraper = hedged(backend(primary_outcome, primary_after), backend(hedge_outcome))
+
+    if primary_outcome == "error" and hedge_outcome == "error":
+        # Both failed: the scrape fails rather than reporting a profile without reels
+        with pytest.raises(ScrapeFailed):
+            scraper.scrape("nasa", 10)
+    else:
+        # Either backend answering empty means the profile has no reels
+        assert scraper.scrape("nasa", 10) == []
+
+    stats = scraper.stats()
+    assert stats["hedged"] == 1
+    assert stats["hedged_" + reason] == 1
+
+
+@pytest.mark.parametrize("hedge_outcome", ["error", "empty"])
+def test_slow_primary_wins_over_failed_hedge(hedge_outcome):
+    scraper = hedged(backend("reels", 4 * HEDGE_DELAY), backend(hedge_outcome))
+
+    assert scraper.scrape("nasa", 10) == REELS
+    stats = scraper.stats()
+    assert stats["hedged_slow"] == 1
+    assert stats["primary_wins"] == 1
+
+
+@pytest.mark.parametrize("primary_outcome, primary_after", [
+    ("reels", 4 * HEDGE_DELAY),
+    ("error", 0.0),
+    ("empty", 0.0),
+])
+def test_hedge_wins(primary_outcome, primary_after):
+    scraper = hedged(backend(primary_outcome, primary_after), backend("reels"))
+
+    assert scraper.scrape("nasa", 10) == REELS
+    assert scraper.stats()["hedge_wins"] == 1
+
+
+def test_fast_primary_is_not_hedged():
+    scraper = hedged(backend("reels"), backend("error"))
+
+    assert scraper.scrape("nasa", 10) == REELS
+    stats = scraper.stats()
+    assert stats["hedged"] == 0
+    assert stats["backends"]["hedge"]["started"] == 0
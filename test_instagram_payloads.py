@@ -0,0 +1,67 @@
+from instagram_payloads import extract_reels_from_payload, is_media_response_url, parse_media_node
+
+
+def clips_item(code, username="nasa", **fields):
+    media = {"code": code, "taken_at": 1750000000, "like_count": 10, "comment_count": 2, "play_count": 300,
+             "video_duration": 12.5, "original_width": 1080, "original_height": 1920,
+             "video_versions": [{}, {}], "owner": {"username": username}}
+    media.update(fields)
+    return {"media": media}
+
+
+def test_media_response_urls():
+    assert is_media_response_url("https://www.instagram.com/api/v1/clips/user/?a=1")
+    assert is_media_response_url("https://www.instagram.com/graphql/query?doc_id=1")
+    assert not is_media_response_url("https://www.instagram.com/static/bundle.js")
+
+
+def test_v1_clips_payload_in_document_order():
+    payload = {"items": [clips_item("AAA"), clips_item("BBB", like_count=5)], "paging_info": {"more_available": False}}
+
+    reels = extract_reels_from_payload(payload, base_url="http://fake")
+
+    assert [reel["shortcode"] for reel in reels] == ["AAA", "BBB"]
+    assert reels[0] == {
+        "url": "http://fake/reel/AAA",
+        "shortcode": "AAA",
+        "username": "nasa",
+        "likes": 10,
+        "comments": 2,
+        "views": 300,
+        "posted_time": 1750000000,
+        "video_duration": 12.5,
+        "dimensions": {"width": 1080, "height": 1920},
+        "numbers_of_qualities": 2,
+    }
+    assert reels[1]["likes"] == 5
+
+
+def test_graphql_nodes_use_edge_counts():
+    node = {"shortcode": "CCC", "taken_at_timestamp": 1700000000, "video_view_count": 42,
+            "edge_media_preview_like": {"count": 7}, "edge_media_to_comment": {"count": 3},
+            "dimensions": {"width": 720, "height": 1280}, "owner": {"username": "nasa"}}
+    payload = {"data": {"user": {"edge_owner_to_timeline_media": {"edges": [{"node": node}]}}}}
+
+    [reel] = extract_reels_from_payload(payload)
+
+    assert (reel["likes"], reel["comments"], reel["views"]) == (7, 3, 42)
+    assert reel["posted_time"] == 1700000000
+    assert reel["dimensions"] == {"width": 720, "height": 1280}
+    assert reel["numbers_of_qualities"] == 1
+    assert reel["video_duration"] == 0.0
+
+
+def test_other_owners_duplicates_and_non_media_are_skipped():
+    payload = {
+        "items": [clips_item("AAA"), clips_item("BBB", username="spacex"), clips_item("AAA")],
+        # A code without any media marker key is some other object
+        "viewer": {"code": "not-media"},
+    }
+    # Nodes without an owner are attributed to the requested username
+    payload["items"].append({"media": {"code": "DDD", "taken_at": 1}})
+
+    reels = extract_reels_from_payload(payload, username="NASA")
+
+    assert [reel["shortcode"] for reel in reels] == ["AAA", "DDD"]
+    assert reels[1]["username"] == "NASA"
+    assert parse_media_node({"code": "not-media"}) is None
@@ -0,0 +1,129 @@
+import os
+import threading
+import time
+
+from api_common import job_payload
+from job_queue import JobQueue, QUEUED, RUNNING, SUCCEEDED, FAILED
+
+
+def wait_for(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        value = condition()
+        if value:
+            return value
+        time.sleep(0.02)
+    raise AssertionError("condition not met in time")
+
+
+def status_of(queue, job_id, *statuses):
+    return lambda: (queue.get(job_id) or {}).get("status") in statuses and queue.get(job_id)
+
+
+def test_nothing_touches_the_database_until_started(tmp_path):
+    db_path = str(tmp_path / "jobs.db")
+    queue = JobQueue(lambda payload: payload, backend="reelscraper", db_path=db_path)
+
+    assert not os.path.exists(db_path)
+    assert queue.stats()["started"] is False
+    assert not os.path.exists(db_path)
+
+
+def test_job_runs_with_its_stored_options(tmp_path):
+    queue = JobQueue(lambda payload: {"echo": payload}, backend="reelscraper",
+                     db_path=str(tmp_path / "jobs.db"), workers=1, poll_interval=0.05)
+    options = {"max_posts": 12, "scan": None, "source": "live", "fields": ["shortcode", "views"]}
+    try:
+        job_id = queue.enqueue(job_payload({"username": "nasa", "post_links": ["x"]}, options))
+        job = wait_for(status_of(queue, job_id, SUCCEEDED, FAILED))
+    finally:
+        queue.stop()
+
+    assert job["status"] == SUCCEEDED
+    assert job["result"]["echo"]["fields"] == ["shortcode", "views"]
+    assert job["result"]["echo"]["max_posts"] == 12
+    assert job["attempts"] == 1
+
+
+def test_failed_handler_fails_the_job(tmp_path):
+    def handler(payload):
+        raise LookupError("No reels found for user 'nasa'")
+
+    queue = JobQueue(handler, backend="reelscraper", db_path=str(tmp_path / "jobs.db"), workers=1, poll_interval=0.05)
+    try:
+        job_id = queue.enqueue({"username": "nasa"})
+        job = wait_for(status_of(queue, job_id, SUCCEEDED, FAILED))
+    finally:
+        queue.stop()
+
+    assert job["status"] == FAILED
+    assert job["error"] == "No reels found for user 'nasa'"
+
+
+def crashed_queue(db_path, lease, max_attempts=3):
+    """A queue whose worker picks up a job and never finishes it, like a process that died"""
+    hang = threading.Event()
+    queue = JobQueue(lambda payload: hang.wait(), backend="reelscraper", db_path=db_path, workers=1,
+                     poll_interval=0.05, lease=lease, max_attempts=max_attempts)
+    job_id = queue.enqueue({"username": "nasa"})
+    wait_for(status_of(queue, job_id, RUNNING))
+    # Stops the lease renewal; the hung worker is what a dead process leaves behind
+    queue.stop()
+    return queue, job_id, hang
+
+
+def test_live_lease_is_not_stolen_and_expired_lease_is_requeued(tmp_path):
+    db_path = str(tmp_path / "jobs.db")
+    crashed, job_id, hang = crashed_queue(db_path, lease=0.5)
+    survivor = JobQueue(lambda payload: {"ok": True}, backend="reelscraper", db_path=db_path, workers=1,
+                        poll_interval=0.05, lease=0.5)
+    try:
+        survivor.start()
+        time.sleep(0.2)
+        assert survivor.get(job_id)["status"] == RUNNING
+
+        job = wait_for(status_of(survivor, job_id, SUCCEEDED, FAILED))
+        assert job["status"] == SUCCEEDED
+        assert job["attempts"] == 2
+    finally:
+        survivor.stop()
+        hang.set()
+
+    # The crashed worker's late finish is discarded
+    time.sleep(0.1)
+    assert survivor.get(job_id)["status"] == SUCCEEDED
+
+
+def test_job_interrupted_max_attempts_times_fails(tmp_path):
+    db_path = str(tmp_path / "jobs.db")
+    crashed, job_id, hang = crashed_queue(db_path, lease=0.2, max_attempts=1)
+    survivor = JobQueue(lambda payload: {"ok": True}, backend="reelscraper", db_path=db_path, workers=1,
+                        poll_interval=0.05, lease=0.2, max_attempts=1)
+    try:
+        survivor.start()
+        job = wait_for(status_of(survivor, job_id, SUCCEEDED, FAILED))
+    finally:
+        survivor.stop()
+        hang.set()
+
+    assert job["status"] == FAILED
+    assert job["error"] == "Job was interrupted too many times"
+
+
+def test_jobs_only_run_on_the_queuing_backend(tmp_path):
+    db_path = str(tmp_path / "jobs.db")
+    playwright = JobQueue(lambda payload: {"ok": True}, backend="playwright", db_path=db_path, workers=1,
+                          poll_interval=0.05)
+    reelscraper = JobQueue(lambda payload: {"ok": True}, backend="reelscraper", db_path=db_path, workers=1,
+                           poll_interval=0.05)
+    # A stopped queue still enqueues, but its workers exit at once: the job waits for a playwright worker
+    playwright.stop()
+    try:
+        reelscraper.start()
+        job_id = playwright.enqueue({"username": "nasa"})
+        time.sleep(0.3)
+        assert reelscraper.get(job_id)["status"] == QUEUED
+        assert reelscraper.stats()[QUEUED] == 0
+        assert playwright.stats()[QUEUED] == 1
+    finally:
+        reelscraper.stop()
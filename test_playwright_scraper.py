@@ -0,0 +1,100 @@
+import asyncio
+import json
+
+import app as flask_app
+from api_common import batch_item_line
+from playwright_scraper import PlaywrightInstagramScraper, PROFILE_NOT_FOUND_TEXT, raise_for_error
+from resource_policy import ResourcePolicy
+
+MEDIA_URL = "https://www.instagram.com/api/v1/clips/user/"
+
+
+class SlowMediaResponse:
+    """A profile XHR whose body takes a while to arrive"""
+
+    url = MEDIA_URL
+    headers = {'content-type': 'application/json'}
+
+    def __init__(self, delay):
+        self.delay = delay
+
+    async def json(self):
+        await asyncio.sleep(self.delay)
+        return {"items": [{"code": "ABC", "taken_at": 1, "owner": {"username": "missing"}}]}
+
+
+class NotFoundPage:
+    """A page that fires a slow media response, then renders Instagram's not-found page"""
+
+    def __init__(self):
+        self.handlers = {}
+        self.closed = False
+
+    def on(self, event, handler):
+        self.handlers.setdefault(event, []).append(handler)
+
+    async def set_extra_http_headers(self, headers):
+        pass
+
+    async def goto(self, url, **options):
+        for handler in self.handlers.get('response', []):
+            handler(SlowMediaResponse(0.05))
+
+    async def wait_for_function(self, *args, **options):
+        pass
+
+    async def content(self):
+        return f"<body>{PROFILE_NOT_FOUND_TEXT}</body>"
+
+    async def close(self):
+        self.closed = True
+
+
+class StubContext:
+    def __init__(self, page):
+        self.page = page
+
+    async def new_page(self):
+        return self.page
+
+
+def test_not_found_profile_leaves_no_capture_running():
+    page = NotFoundPage()
+    scraper = PlaywrightInstagramScraper(context=StubContext(page), capture_mode='network',
+                                         resource_policy=ResourcePolicy(enabled=False))
+
+    async def main():
+        reels = await scraper.get_user_reels("missing", 10)
+        # Anything still running besides this test would be a capture left behind
+        others = [task for task in asyncio.all_tasks() if task is not asyncio.current_task()]
+        return reels, others
+
+    reels, others = asyncio.run(main())
+    assert reels == []
+    assert scraper.last_error is None
+    assert page.closed
+    assert others == []
+    assert not scraper._capture_tasks
+
+
+class FailedScraper:
+    last_error = "Timeout 30000ms exceeded."
+
+
+def failing_fetch(username, post_links, *args, **options):
+    raise_for_error(FailedScraper(), username)
+
+
+def test_failed_scrape_is_a_bad_gateway(monkeypatch):
+    monkeypatch.setattr(flask_app, "fetch_and_match", failing_fetch)
+    monkeypatch.setattr(flask_app.job_queue, "start", lambda: None)
+
+    response = flask_app.app.test_client().post("/v1/fetch-instagram-post", json={
+        "username": "natgeo", "post_links": ["https://www.instagram.com/reel/ABC/"]})
+    body, status_code = json.loads(response.data)
+    assert status_code == 502
+    assert body["error"] == "Playwright scrape of natgeo failed: Timeout 30000ms exceeded."
+
+    line = batch_item_line((True, "", {"username": "natgeo", "post_links": ["x"]}), failing_fetch)
+    assert line["success"] is False
+    assert line["error"] == body["error"]
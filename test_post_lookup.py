@@ -0,0 +1,74 @@
+import json
+
+import pytest
+
+import app as flask_app
+from fake_instagram import make_reels
+from post_api import PostLookupAPI
+from post_lookup import fetch_post, lookup_posts, lookup_summary
+
+
+def test_fetch_post_reads_the_public_post_query(fake_instagram):
+    fake, base_url = fake_instagram
+    fake.register("nasa")
+    api = PostLookupAPI(timeout=5, base_url=base_url)
+    reel = make_reels("nasa", 3)[2]
+
+    post = fetch_post(api, reel["code"])
+
+    assert post["shortcode"] == reel["code"]
+    assert post["username"] == "nasa"
+    assert post["likes"] == reel["like_count"]
+    assert post["views"] == reel["play_count"]
+    assert post["posted_time"] == reel["taken_at"]
+    assert post["url"] == f"{base_url}/reel/{reel['code']}"
+
+
+def test_fetch_post_tells_missing_posts_from_errors(fake_instagram):
+    fake, base_url = fake_instagram
+    api = PostLookupAPI(timeout=5, base_url=base_url)
+
+    # Nobody registered owns this post
+    assert fetch_post(api, make_reels("nasa", 1)[0]["code"]) is None
+    # Not a shortcode at all
+    assert fetch_post(api, "not*a*shortcode") is None
+
+    fake.throttle_prob = 1
+    with pytest.raises(RuntimeError, match="Please wait"):
+        fetch_post(api, make_reels("nasa", 1)[0]["code"])
+
+
+def test_lookup_sorts_targets_by_outcome(fake_instagram):
+    fake, base_url = fake_instagram
+    for username in ("nasa", "spacex"):
+        fake.register(username)
+    api = PostLookupAPI(timeout=5, base_url=base_url)
+    own, other = make_reels("nasa", 1)[0]["code"], make_reels("spacex", 1)[0]["code"]
+    missing = make_reels("esa", 1)[0]["code"]
+
+    result = lookup_posts("NASA", [own, other, missing, own], lambda code: fetch_post(api, code))
+
+    assert [reel["shortcode"] for reel in result["reels"]] == [own]
+    assert result["owner_mismatch"] == [other]
+    assert result["not_found"] == [missing]
+    assert result["failed"] == []
+    links = [f"https://www.instagram.com/reel/{code}/" for code in (own, other, missing)]
+    assert lookup_summary(result, links)["fetched"] == 3
+
+
+def test_lookup_request_through_the_app(fake_instagram, monkeypatch):
+    fake, base_url = fake_instagram
+    fake.register("nasa")
+    monkeypatch.setattr(flask_app, "INSTAGRAM_BASE_URL", base_url)
+    monkeypatch.setattr(flask_app, "_scrapers", None)
+    monkeypatch.setattr(flask_app.job_queue, "start", lambda: None)
+    monkeypatch.setattr(flask_app.reel_index, "upsert", lambda username, reels: None)
+    code = make_reels("nasa", 5)[4]["code"]
+
+    response = flask_app.app.test_client().post("/v1/fetch-instagram-post?source=lookup", json={
+        "username": "nasa", "post_links": [f"https://www.instagram.com/reel/{code}/"]})
+    body, status_code = json.loads(response.data)
+
+    assert status_code == 200, body
+    assert body["data"]["matched_posts_count"] == 1
+    assert body["data"]["lookup"]["fetched"] == 1
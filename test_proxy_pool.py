@@ -0,0 +1,135 @@
+import pytest
+
+import proxy_pool
+from fake_instagram import make_reels
+from fake_proxy import start_fake_proxy
+from post_api import PostLookupAPI
+from post_lookup import fetch_post
+from proxy_pool import ProxyPool, load_proxies, redact_proxy
+
+PROXIES = ["10.0.0.1:8080", "10.0.0.2:8080", "10.0.0.3:8080"]
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def time(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(proxy_pool.time, "time", clock.time)
+    return clock
+
+
+def fail(pool, proxy, times):
+    for _ in range(times):
+        pool.record(proxy, False, 0.1)
+
+
+def test_load_proxies_from_list_and_file(tmp_path):
+    path = tmp_path / "proxies.txt"
+    path.write_text("10.0.0.2:8080  # second\n\nuser:pass@10.0.0.3:8080\n", encoding="utf-8")
+
+    assert load_proxies("10.0.0.1:8080, 10.0.0.2:8080", str(path)) == [
+        "10.0.0.1:8080", "10.0.0.2:8080", "user:pass@10.0.0.3:8080"]
+    assert load_proxies("", "") in ([None], [proxy_pool.os.getenv('SCRAPER_PROXY')])
+    with pytest.raises(ValueError):
+        load_proxies("http://10.0.0.1:8080", "")
+    assert redact_proxy("user:pass@10.0.0.3:8080") == "user:***@10.0.0.3:8080"
+
+
+def test_keys_stick_to_one_proxy_until_it_is_quarantined(clock):
+    pool = ProxyPool(PROXIES)
+    proxy = pool.choose("nasa")
+    assert {pool.choose("NASA") for _ in range(5)} == {proxy}
+
+    fail(pool, proxy, 3)
+    moved = pool.choose("nasa")
+    assert moved != proxy
+    assert pool.stats()["healthy"] == 2
+
+    clock.now += 61
+    assert pool.choose("nasa") == proxy
+
+
+def test_quarantine_doubles_per_strike_and_strikes_decay(clock):
+    pool = ProxyPool(PROXIES, quarantine_seconds=60, max_quarantine_seconds=200, strike_decay_seconds=600)
+    proxy = PROXIES[0]
+
+    def quarantined_for():
+        return next(p for p in pool.stats()["proxies"] if p["proxy"] == proxy)["quarantined_for"]
+
+    fail(pool, proxy, 3)
+    assert quarantined_for() == 60
+    clock.now += 61
+    # On probation: a single failure quarantines it again, for twice as long
+    fail(pool, proxy, 1)
+    assert quarantined_for() == 120
+    clock.now += 121
+    fail(pool, proxy, 1)
+    assert quarantined_for() == 200
+
+    # A quiet spell forgives one strike per strike_decay_seconds
+    clock.now += 1200
+    fail(pool, proxy, 1)
+    assert quarantined_for() == 120
+    clock.now += 1800
+    fail(pool, proxy, 1)
+    assert quarantined_for() == 60
+
+
+def test_everything_quarantined_uses_the_first_to_come_back(clock):
+    pool = ProxyPool(PROXIES[:2])
+    fail(pool, PROXIES[0], 3)
+    clock.now += 10
+    fail(pool, PROXIES[1], 3)
+    assert pool.choose("nasa") == PROXIES[0]
+
+
+def test_call_fails_over_and_raises_after_the_attempts():
+    pool = ProxyPool(PROXIES)
+    used = []
+
+    def flaky(proxy):
+        used.append(proxy)
+        if len(used) == 1:
+            raise RuntimeError("connection reset")
+        return proxy
+
+    assert pool.call("nasa", flaky) == used[1]
+    assert used[0] != used[1]
+
+    def broken(proxy):
+        raise RuntimeError("down")
+
+    with pytest.raises(RuntimeError, match="down"):
+        pool.call("nasa", broken, attempts=2)
+
+
+def test_failover_through_fake_proxies(fake_instagram):
+    fake, base_url = fake_instagram
+    fake.register("nasa")
+    broken_server, broken = start_fake_proxy(fail_rate=1)
+    healthy_server, healthy = start_fake_proxy()
+    try:
+        pool = ProxyPool([broken, healthy])
+        apis = {proxy: PostLookupAPI(timeout=5, proxy=proxy, base_url=base_url) for proxy in pool.proxies}
+        codes = [reel["code"] for reel in make_reels("nasa", 30)]
+
+        # Lookups are keyed by shortcode, so about half of them start on the broken proxy
+        posts = [pool.call(code, lambda proxy, code=code: fetch_post(apis[proxy], code)) for code in codes]
+
+        assert [post["shortcode"] for post in posts] == codes
+        stats = {p["proxy"]: p for p in pool.stats()["proxies"]}
+        assert stats[broken]["quarantined"] and not stats[healthy]["quarantined"]
+        # Three straight failures quarantine it; after that it is left alone
+        assert broken_server.counts["failed"] == stats[broken]["failures"] == 3
+        assert healthy_server.counts["requests"] == len(codes)
+    finally:
+        for server in (broken_server, healthy_server):
+            server.shutdown()
+            server.server_close()
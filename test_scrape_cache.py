@@ -0,0 +1,135 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+import scrape_cache
+from scrape_cache import ScrapeCache
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def time(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(scrape_cache.time, "time", clock.time)
+    return clock
+
+
+def reels(count, tag="v1"):
+    return [{"shortcode": f"{tag}-{i}"} for i in range(count)]
+
+
+class Scraper:
+    def __init__(self, tag="v1"):
+        self.tag = tag
+        self.calls = []
+
+    def __call__(self, username, max_posts):
+        self.calls.append(max_posts)
+        return reels(max_posts, self.tag)
+
+
+def test_fresh_entry_answers_equal_and_smaller_requests(clock):
+    cache = ScrapeCache(ttl=60, stale_ttl=120, db_path="", enabled=True)
+    scrape = Scraper()
+
+    assert cache.get_or_scrape("Nasa", 10, "reelscraper", scrape) == reels(10)
+    assert cache.get_or_scrape("nasa", 5, "reelscraper", scrape) == reels(5)
+    assert scrape.calls == [10]
+    # More posts than the entry holds is a miss
+    cache.get_or_scrape("nasa", 20, "reelscraper", scrape)
+    assert scrape.calls == [10, 20]
+    # Backends don't share entries
+    cache.get_or_scrape("nasa", 5, "playwright", scrape)
+    assert scrape.calls == [10, 20, 5]
+
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"]) == (1, 3)
+
+
+def test_stale_entry_is_served_while_refreshed_in_the_background(clock):
+    cache = ScrapeCache(ttl=60, stale_ttl=120, db_path="", enabled=True)
+    cache.put("reelscraper", "nasa", 10, reels(10))
+    clock.now += 90
+
+    refreshed = threading.Event()
+    scrape = Scraper("v2")
+
+    def refresh(username, max_posts):
+        try:
+            return scrape(username, max_posts)
+        finally:
+            refreshed.set()
+
+    assert cache.get_or_scrape("nasa", 10, "reelscraper", refresh) == reels(10)
+    assert refreshed.wait(5)
+    for _ in range(100):
+        if cache.stats()["refreshes"]:
+            break
+        time.sleep(0.01)
+    assert cache.get("nasa", 10, "reelscraper") == reels(10, "v2")
+    assert cache.stats()["stale_hits"] == 1
+
+
+def test_expired_entry_is_scraped_again(clock):
+    cache = ScrapeCache(ttl=60, stale_ttl=120, db_path="", enabled=True)
+    cache.put("reelscraper", "nasa", 10, reels(10))
+    clock.now += 181
+    scrape = Scraper("v2")
+
+    assert cache.get_or_scrape("nasa", 10, "reelscraper", scrape) == reels(10, "v2")
+    assert scrape.calls == [10]
+    assert cache.get("nasa", 10, "reelscraper") == reels(10, "v2")
+
+
+def test_lru_evicts_the_least_recently_used(clock):
+    cache = ScrapeCache(ttl=60, stale_ttl=0, max_entries=2, db_path="", enabled=True)
+    cache.put("reelscraper", "a", 1, reels(1))
+    cache.put("reelscraper", "b", 1, reels(1))
+    cache.get("a", 1, "reelscraper")
+    cache.put("reelscraper", "c", 1, reels(1))
+
+    assert cache.get("b", 1, "reelscraper") is None
+    assert cache.get("a", 1, "reelscraper") is not None
+    assert cache.stats()["evictions"] == 1
+
+
+def test_sqlite_tier_survives_a_restart(clock, tmp_path):
+    db_path = str(tmp_path / "cache.db")
+    ScrapeCache(ttl=60, stale_ttl=120, db_path=db_path, enabled=True).put("reelscraper", "nasa", 10, reels(10))
+
+    cache = ScrapeCache(ttl=60, stale_ttl=120, db_path=db_path, enabled=True)
+    assert cache.get("nasa", 10, "reelscraper") == reels(10)
+    assert cache.stats()["disk_hits"] == 1
+
+
+def test_async_stale_refresh_is_held_until_done_and_counts_failures(clock):
+    cache = ScrapeCache(ttl=60, stale_ttl=120, db_path="", enabled=True)
+    cache.put("playwright", "nasa", 10, reels(10))
+    clock.now += 90
+
+    async def failing_scrape(username, max_posts):
+        await asyncio.sleep(0.01)
+        raise RuntimeError("upstream down")
+
+    async def main():
+        served = await cache.get_or_scrape_async("nasa", 10, "playwright", failing_scrape)
+        running = len(cache._refresh_tasks)
+        while cache._refresh_tasks:
+            await asyncio.sleep(0.01)
+        return served, running
+
+    served, running = asyncio.run(main())
+    assert served == reels(10)
+    assert running == 1
+    assert cache.stats()["refresh_errors"] == 1
+    # The failed refresh leaves the stale entry in place
+    assert cache.get_or_scrape("nasa", 10, "playwright", Scraper("v2")) == reels(10)
@@ -0,0 +1,79 @@
+import asyncio
+import time
+
+from target_scan import (aiter_growing_scrapes, ascan_for_targets, iter_growing_scrapes,
+                         parse_scan_options, scan_for_targets)
+
+
+def reels(count, newest=1750000000):
+    return [{"shortcode": f"R{i}", "posted_time": newest - i * 86400} for i in range(count)]
+
+
+def pages(items, size=5):
+    return [items[i:i + size] for i in range(0, len(items), size)]
+
+
+def test_scan_options_only_with_scan_targets():
+    assert parse_scan_options({}) is None
+    assert parse_scan_options({"scan": "targets", "max_depth": "30"})["max_depth"] == 30
+    options = parse_scan_options({"scan": "Targets", "cutoff_days": "2"})
+    assert abs(options["cutoff"] - (time.time() - 2 * 86400)) < 5
+
+
+def test_stops_once_all_targets_are_found():
+    result = scan_for_targets(pages(reels(30)), {"R2", "R7"}, max_depth=30)
+    assert (result["stop_reason"], result["depth"]) == ("all_found", 8)
+    assert result["unmatched"] == set()
+
+
+def test_stops_at_max_depth():
+    result = scan_for_targets(pages(reels(30)), {"missing"}, max_depth=12)
+    assert (result["stop_reason"], result["depth"]) == ("max_depth", 12)
+    assert result["unmatched"] == {"missing"}
+
+
+def test_stops_past_the_cutoff_but_not_on_pinned_posts():
+    items = reels(20)
+    # An old pinned post at the top doesn't end the scan
+    items[0]["posted_time"] = 1
+    cutoff = items[6]["posted_time"] + 1
+    result = scan_for_targets(pages(items), {"missing"}, max_depth=20, cutoff=cutoff)
+    assert (result["stop_reason"], result["depth"]) == ("cutoff", 7)
+
+
+def test_delta_scan_stops_on_reaching_the_index():
+    known = {"R0", "R9"}
+    result = scan_for_targets(pages(reels(20)), {"missing"}, max_depth=20, known_shortcodes=known)
+    # R0 could be pinned, so only R9 ends the scan
+    assert (result["stop_reason"], result["depth"]) == ("reached_index", 10)
+
+
+def test_exhausted_profile():
+    result = scan_for_targets(pages(reels(7)), {"missing"}, max_depth=50)
+    assert (result["stop_reason"], result["depth"]) == ("exhausted", 7)
+
+
+def test_growing_scrapes_double_until_nothing_new():
+    profile = reels(13)
+    calls = []
+
+    def scrape(username, count):
+        calls.append(count)
+        return profile[:count]
+
+    fetched = [page for page in iter_growing_scrapes(scrape, "nasa", 4, 50)]
+    assert calls == [4, 8, 16]
+    assert [reel["shortcode"] for page in fetched for reel in page] == [reel["shortcode"] for reel in profile]
+
+
+def test_async_scan_over_growing_scrapes():
+    profile = reels(40)
+
+    async def scrape(username, count):
+        return profile[:count]
+
+    async def main():
+        return await ascan_for_targets(aiter_growing_scrapes(scrape, "nasa", 5, 40), {"R17"}, max_depth=40)
+
+    result = asyncio.run(main())
+    assert (result["stop_reason"], result["depth"]) == ("all_found", 18)
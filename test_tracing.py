@@ -0,0 +1,63 @@
+import asyncio
+
+import pytest
+
+import tracing
+from tracing import LoopActivity, RequestTrace, profiled
+
+
+@pytest.fixture(autouse=True)
+def profile_dir(monkeypatch, tmp_path):
+    monkeypatch.setattr(tracing, "DEBUG_PROFILE_DIR", str(tmp_path))
+
+
+def test_profile_of_a_request_alone_on_the_loop_is_kept():
+    activity = LoopActivity()
+
+    @activity.tracked
+    async def scrape():
+        await asyncio.sleep(0.01)
+
+    async def main():
+        trace = RequestTrace(debug=True)
+        tracing._current.set(trace)
+        with profiled("nasa", activity):
+            await scrape()
+        return trace
+
+    trace = asyncio.run(main())
+    assert "summary" in trace.profile
+    assert trace.profile["path"].endswith("-nasa.prof")
+
+
+def test_profile_is_skipped_or_discarded_when_other_scrapes_share_the_loop():
+    activity = LoopActivity()
+
+    @activity.tracked
+    async def scrape(delay):
+        await asyncio.sleep(delay)
+
+    async def profiled_scrape():
+        trace = RequestTrace(debug=True)
+        tracing._current.set(trace)
+        with profiled("nasa", activity):
+            await scrape(0.05)
+        return trace
+
+    async def main():
+        # Another scrape is already running: not profiled at all
+        running = asyncio.ensure_future(scrape(0.05))
+        await asyncio.sleep(0)
+        skipped = await profiled_scrape()
+        await running
+
+        # Another scrape starts while profiling: the mixed profile is dropped
+        profiling = asyncio.ensure_future(profiled_scrape())
+        await asyncio.sleep(0.01)
+        await scrape(0.01)
+        return skipped, await profiling
+
+    skipped, discarded = asyncio.run(main())
+    assert skipped.profile["error"].startswith("Other requests are running")
+    assert discarded.profile["error"].startswith("Other requests ran on the event loop")
+    assert activity.running == 0
@@ -0,0 +1,222 @@
+import asyncio
+import contextvars
+import cProfile
+import functools
+import io
+import logging
+import os
+import pstats
+import re
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from typing import List, Dict, Any, Callable, Iterator, Mapping, Optional
+
+logger = logging.getLogger(__name__)
+
+# Debug mode (profile + page timeline) is off unless enabled here
+DEBUG_PROFILING_ENABLED = os.getenv('DEBUG_PROFILING_ENABLED', 'False').lower() == 'true'
+DEBUG_PROFILE_DIR = os.getenv('DEBUG_PROFILE_DIR', '/tmp/profiles')
+# Functions listed in the profile summary returned with the response
+DEBUG_PROFILE_TOP = int(os.getenv('DEBUG_PROFILE_TOP', 25))
+# Cap on page events kept per request
+TIMELINE_MAX_EVENTS = 500
+
+DEBUG_HEADER = 'X-Debug-Profile'
+DEBUG_QUERY_PARAM = 'debug'
+
+
+class RequestTrace:
+    """Stage durations (and, in debug mode, a page event timeline) of one request"""
+
+    def __init__(self, debug: bool = False):
+        self.debug = debug
+        self.started = time.perf_counter()
+        self.stages: Dict[str, float] = {}
+        self.timeline: List[Dict[str, Any]] = []
+        self.profile: Optional[Dict[str, Any]] = None
+        self._lock = threading.Lock()
+
+    def add_stage(self, name: str, ms: float):
+        """Add ms to a stage; repeated stages (e.g. scan pages) accumulate"""
+        with self._lock:
+            self.stages[name] = self.stages.get(name, 0.0) + ms
+
+    def add_event(self, event: str, detail: str = ""):
+        if not self.debug:
+            return
+        with self._lock:
+            if len(self.timeline) < TIMELINE_MAX_EVENTS:
+                self.timeline.append({
+                    "t_ms": round((time.perf_counter() - self.started) * 1000, 1),
+                    "event": event,
+                    "detail": detail,
+                })
+
+    def server_timing(self) -> str:
+        """Server-Timing header value"""
+        with self._lock:
+            stages = list(self.stages.items())
+        stages.append(("total", (time.perf_counter() - self.started) * 1000))
+        return ", ".join(f"{name};dur={ms:.1f}" for name, ms in stages)
+
+    def debug_info(self) -> Dict[str, Any]:
+        """Timings, page timeline and profile returned in debug mode"""
+        with self._lock:
+            return {
+                "timings_ms": {name: round(ms, 1) for name, ms in self.stages.items()},
+                "timeline": list(self.timeline),
+                "profile": self.profile,
+            }
+
+
+_current: contextvars.ContextVar[Optional[RequestTrace]] = contextvars.ContextVar('request_trace', default=None)
+
+
+def current_trace() -> Optional[RequestTrace]:
+    """Trace of the request being handled, None outside traced views.
+
+    Context variables follow the request into Playwright coroutines run
+    through run_coroutine_threadsafe or asyncio.run, but not into executor
+    threads, so batch items are not traced.
+    """
+    return _current.get()
+
+
+@contextmanager
+def trace_stage(name: str) -> Iterator[None]:
+    """Record the duration of the block as a stage of the current trace"""
+    trace = _current.get()
+    if trace is not None:
+        # Register the stage now so stages nested in it are listed after it
+        trace.add_stage(name, 0.0)
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        if trace is not None:
+            trace.add_stage(name, (time.perf_counter() - start) * 1000)
+
+
+def debug_requested(headers: Mapping[str, str], args: Mapping[str, str]) -> bool:
+    """Whether the request asks for debug mode and debug mode is enabled"""
+    if not DEBUG_PROFILING_ENABLED:
+        return False
+    flag = headers.get(DEBUG_HEADER) or args.get(DEBUG_QUERY_PARAM) or ''
+    return flag.lower() in ('1', 'true', 'profile')
+
+
+def traced(view: Callable) -> Callable:
+    """Run a view under a RequestTrace and add its Server-Timing header"""
+    if asyncio.iscoroutinefunction(view):
+        @functools.wraps(view)
+        async def traced_async(*args, **kwargs):
+            token = _current.set(RequestTrace())
+            try:
+                response = await view(*args, **kwargs)
+                response.headers['Server-Timing'] = _current.get().server_timing()
+                return response
+            finally:
+                _current.reset(token)
+        return traced_async
+
+    @functools.wraps(view)
+    def traced_view(*args, **kwargs):
+        token = _current.set(RequestTrace())
+        try:
+            response = view(*args, **kwargs)
+            response.headers['Server-Timing'] = _current.get().server_timing()
+            return response
+        finally:
+            _current.reset(token)
+    return traced_view
+
+
+# cProfile allows one active profiler per thread (and on an event loop,
+# one per process would also sample unrelated requests), so debug
+# requests are profiled one at a time
+_profile_lock = threading.Lock()
+
+
+class LoopActivity:
+    """Counts the scrapes running on a shared event loop.
+
+    cProfile hooks the whole thread, so on an event loop it also records
+    every other request whose coroutines run while the profiled one awaits.
+    profiled() uses this to only profile a request that has the loop to
+    itself.
+    """
+
+    def __init__(self):
+        self.running = 0
+        self.started = 0
+
+    def tracked(self, fn: Callable) -> Callable:
+        """Count the calls of a coroutine function while they run"""
+        @functools.wraps(fn)
+        async def wrapper(*args, **kwargs):
+            self.running += 1
+            self.started += 1
+            try:
+                return await fn(*args, **kwargs)
+            finally:
+                self.running -= 1
+        return wrapper
+
+
+@contextmanager
+def profiled(label: str, activity: Optional[LoopActivity] = None) -> Iterator[None]:
+    """Profile the block with cProfile when the current trace is in debug mode.
+
+    The full profile is written to DEBUG_PROFILE_DIR and a summary of the
+    top functions by cumulative time is stored on the trace. With an
+    activity (event loop servers), the block is expected to run one tracked
+    scrape: the request is only profiled if no other scrape is running, and
+    the profile is discarded if another one started meanwhile.
+    """
+    trace = _current.get()
+    if trace is None or not trace.debug:
+        yield
+        return
+    if activity is not None and activity.running:
+        trace.profile = {"error": "Other requests are running on the event loop; retry when the server is idle"}
+        yield
+        return
+    if not _profile_lock.acquire(blocking=False):
+        trace.profile = {"error": "Another request is being profiled"}
+        yield
+        return
+
+    started = activity.started if activity is not None else 0
+    profiler = cProfile.Profile()
+    try:
+        profiler.enable()
+        try:
+            yield
+        finally:
+            profiler.disable()
+    finally:
+        _profile_lock.release()
+        if activity is not None and activity.started - started > 1:
+            trace.profile = {"error": "Other requests ran on the event loop while profiling; the profile was discarded"}
+        else:
+            trace.profile = _save_profile(profiler, label)
+
+
+def _save_profile(profiler: cProfile.Profile, label: str) -> Dict[str, Any]:
+    summary = io.StringIO()
+    stats = pstats.Stats(profiler, stream=summary)
+    stats.sort_stats('cumulative').print_stats(DEBUG_PROFILE_TOP)
+    result: Dict[str, Any] = {"summary": summary.getvalue()}
+
+    try:
+        os.makedirs(DEBUG_PROFILE_DIR, exist_ok=True)
+        stamp = datetime.now(timezone.utc).strftime('%Y%m%dT%H%M%S%f')
+        path = os.path.join(DEBUG_PROFILE_DIR, f"{stamp}-{re.sub(r'[^A-Za-z0-9_.-]', '_', label)}.prof")
+        stats.dump_stats(path)
+        result["path"] = path
+        logger.info(f"🔬 Saved profile to {path}")
+    except OSError as e:
+        logger.warning(f"⚠️ Could not save profile: {e}")
+    return result